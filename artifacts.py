@@ -0,0 +1,244 @@
+"""Artifact store for the DataFrames handed between pipeline stages.
+
+historical_data (features.py) -> preprocessed_data (preprocess.py) -> feature_engineered_data
+(feature_engineering.py) -> train_model.py / predict.py
+
+Every stage saves and loads its frames through save_frame() / load_frame(). The backend is chosen
+with the JOSAA_ARTIFACT_FORMAT environment variable:
+  csv     - <name>.csv, the original text format (default)
+  parquet - <name>.parquet (needs pyarrow)
+  feather - <name>.feather (needs pyarrow)
+  npy     - <name>.columns/, one memory-mapped .npy file per column plus a schema.json
+
+Known columns are stored with explicit dtypes (ARTIFACT_DTYPES; one-hot columns as uint8) and
+re-typed on load, and CSV floats are parsed with pandas' round-trip parser (its default one can
+be off by an ulp), so text backends round-trip to exactly the same frame. All backends support
+column-projected reads.
+
+save_partitions() splits a frame on key columns into one artifact per partition under
+<name>.partitions/, with an index.json mapping each partition to its key values, so readers
+can load only the partitions they need with load_partitions().
+"""
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+ARTIFACT_FORMAT_ENV = 'JOSAA_ARTIFACT_FORMAT'
+FORMATS = ['csv', 'parquet', 'feather', 'npy']
+DEFAULT_FORMAT = 'csv'
+FORMAT_SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather', 'npy': '.columns'}
+NPY_SCHEMA_FILENAME = 'schema.json'
+
+# Explicit storage dtypes per artifact. Integer dtypes are only applied to columns without missing
+# values; one-hot columns of the encoded artifacts are stored as ONEHOT_DTYPE.
+ENCODED_DTYPES = {
+    'year': 'int16',
+    'round': 'int8',
+    'is_final_round': 'int8',
+    'college_name_code': 'int32',
+    'academic_program_name_code': 'int32',
+}
+ARTIFACT_DTYPES = {
+    'historical_data': {
+        'year': 'int16',
+        'round': 'int8',
+        'is_final_round': 'int8',
+        'opening_rank': 'int32',
+        'closing_rank': 'int32',
+        'college_name': 'category',
+        'academic_program_name': 'category',
+    },
+    'preprocessed_data': ENCODED_DTYPES,
+    'feature_engineered_data': ENCODED_DTYPES,
+}
+ONEHOT_PREFIXES = ('college_name_', 'academic_program_name_')
+ONEHOT_DTYPE = 'uint8'
+PARTITIONS_SUFFIX = '.partitions'
+PARTITION_INDEX_FILENAME = 'index.json'
+# Combined report of partitions.py predict; here so eligibility.py can find it without importing partitions
+PARTITION_REPORT_FILENAME = 'partition_prediction_report.csv'
+
+def artifact_format():
+    """Returns the backend selected by JOSAA_ARTIFACT_FORMAT."""
+    fmt = os.environ.get(ARTIFACT_FORMAT_ENV, DEFAULT_FORMAT).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"{ARTIFACT_FORMAT_ENV}={fmt!r} is not one of {FORMATS}")
+    return fmt
+
+def artifact_path(name, fmt=None):
+    """Path of an artifact in the given (default: selected) backend."""
+    return Path(f"{name}{FORMAT_SUFFIXES[fmt or artifact_format()]}")
+
+def find_artifact(name):
+    """Returns (fmt, path) of the artifact to read: the selected backend if it exists,
+    otherwise the most recently written artifact of that name in any backend."""
+    preferred = artifact_format()
+    if artifact_path(name, preferred).exists():
+        return preferred, artifact_path(name, preferred)
+    existing = [(fmt, artifact_path(name, fmt)) for fmt in FORMATS if artifact_path(name, fmt).exists()]
+    if not existing:
+        raise FileNotFoundError(f"No artifact '{name}' found (looked for {', '.join(str(artifact_path(name, fmt)) for fmt in FORMATS)})")
+    return max(existing, key=lambda item: item[1].stat().st_mtime)
+
+def artifact_size(name):
+    """Size in bytes of the artifact that load_frame(name) would read."""
+    _, path = find_artifact(name)
+    if path.is_dir():
+        return sum(child.stat().st_size for child in path.iterdir())
+    return path.stat().st_size
+
+def apply_dtypes(name, frame):
+    """Casts the known columns of artifact `name` (or of a partition of it) to their storage dtypes."""
+    dtypes = ARTIFACT_DTYPES.get(name.split(PARTITIONS_SUFFIX + '/')[0], {})
+    encoded = dtypes is ENCODED_DTYPES
+    casts = {}
+    for column in frame.columns:
+        dtype = dtypes.get(column)
+        if dtype is None and encoded and column.startswith(ONEHOT_PREFIXES):
+            dtype = ONEHOT_DTYPE
+        if dtype is None or str(frame[column].dtype) == dtype:
+            continue
+        if dtype != 'category' and frame[column].isna().any():
+            continue
+        casts[column] = dtype
+    return frame.astype(casts) if casts else frame
+
+def save_frame(name, frame, fmt=None):
+    """Writes frame as artifact `name` and returns the path written."""
+    fmt = fmt or artifact_format()
+    path = artifact_path(name, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with instrumentation.stage('artifacts.save_frame', artifact=name, format=fmt) as metrics:
+        frame = apply_dtypes(name, frame.reset_index(drop=True))
+
+        if fmt == 'csv':
+            frame.to_csv(path, index=False)
+        elif fmt == 'parquet':
+            frame.to_parquet(path, index=False)
+        elif fmt == 'feather':
+            frame.to_feather(path)
+        else:
+            _save_npy(path, frame)
+        metrics.count('rows', len(frame))
+        metrics.count('columns', len(frame.columns))
+    return path
+
+def load_frame(name, columns=None):
+    """Reads artifact `name`, optionally only the given columns (in the stored column order)."""
+    fmt, path = find_artifact(name)
+    with instrumentation.stage('artifacts.load_frame', artifact=name, format=fmt) as metrics:
+        if fmt == 'csv':
+            frame = pd.read_csv(path, usecols=columns, float_precision='round_trip')
+        elif fmt == 'parquet':
+            frame = pd.read_parquet(path, columns=columns)
+        elif fmt == 'feather':
+            frame = pd.read_feather(path, columns=columns)
+        else:
+            frame = _load_npy(path, columns)
+        if columns is not None:
+            frame = frame[[column for column in frame_columns(name) if column in set(columns)]]
+        frame = apply_dtypes(name, frame)
+        metrics.count('rows', len(frame))
+        metrics.count('columns', len(frame.columns))
+    return frame
+
+def frame_columns(name):
+    """Column names of artifact `name`, without reading its data."""
+    fmt, path = find_artifact(name)
+    if fmt == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    if fmt == 'npy':
+        return [column['name'] for column in json.loads((path / NPY_SCHEMA_FILENAME).read_text())['columns']]
+    import pyarrow
+    import pyarrow.parquet
+    if fmt == 'parquet':
+        return pyarrow.parquet.read_schema(path).names
+    with pyarrow.memory_map(str(path)) as source:
+        return pyarrow.ipc.open_file(source).schema.names
+
+def partition_slug(values):
+    """File-system safe name of the partition with the given key values."""
+    return '__'.join(re.sub(r'[^A-Za-z0-9-]+', '_', str(value)).strip('_') or '_' for value in values)
+
+def partition_name(name, slug):
+    """Artifact name of one partition of artifact `name`."""
+    return f"{name}{PARTITIONS_SUFFIX}/{slug}"
+
+def save_partitions(name, frame, keys, fmt=None):
+    """Writes one artifact per distinct value of the `keys` columns (which are dropped from the
+    partition frames) and an index of their key values. Returns the index."""
+    directory = Path(f"{name}{PARTITIONS_SUFFIX}")
+    if directory.exists():
+        shutil.rmtree(directory)
+    index = {}
+    for values, partition in frame.groupby(keys, observed=True, sort=True):
+        slug = partition_slug(values)
+        if slug in index:
+            raise ValueError(f"Partitions {index[slug]['keys']} and {list(values)} of '{name}' map to the same file name '{slug}'")
+        save_frame(partition_name(name, slug), partition.drop(columns=keys), fmt)
+        index[slug] = {'keys': dict(zip(keys, (str(value) for value in values))), 'rows': len(partition)}
+    (directory / PARTITION_INDEX_FILENAME).write_text(json.dumps(index, indent=1))
+    return index
+
+def partition_index(name):
+    """Returns {slug: {'keys': {column: value}, 'rows': n}} for the partitions of artifact `name`."""
+    path = Path(f"{name}{PARTITIONS_SUFFIX}") / PARTITION_INDEX_FILENAME
+    if not path.exists():
+        raise FileNotFoundError(f"No partitioned artifact '{name}' found (looked for {path})")
+    return json.loads(path.read_text())
+
+def select_partitions(name, **key_values):
+    """Slugs of the partitions of artifact `name` whose keys match every given value (None matches all)."""
+    wanted = {key: str(value) for key, value in key_values.items() if value is not None}
+    return [slug for slug, entry in partition_index(name).items()
+            if all(entry['keys'].get(key) == value for key, value in wanted.items())]
+
+def load_partitions(name, slugs, columns=None):
+    """Reads the given partitions of artifact `name` into one frame, with their key columns restored."""
+    index = partition_index(name)
+    frames = []
+    for slug in slugs:
+        frame = load_frame(partition_name(name, slug), columns)
+        frames.append(frame.assign(**index[slug]['keys']))
+    return pd.concat(frames, ignore_index=True)
+
+def _save_npy(path, frame):
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir()
+    schema = []
+    for position, column in enumerate(frame.columns):
+        series = frame[column]
+        entry = {'name': column, 'file': f"{position}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['categories'] = [str(category) for category in series.cat.categories]
+            values = series.cat.codes.to_numpy()
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            entry['categories'] = sorted(series.dropna().astype(str).unique())
+            values = pd.Categorical(series, categories=entry['categories']).codes
+        else:
+            values = series.to_numpy()
+        np.save(path / entry['file'], values, allow_pickle=False)
+        schema.append(entry)
+    (path / NPY_SCHEMA_FILENAME).write_text(json.dumps({'columns': schema}))
+
+def _load_npy(path, columns):
+    schema = json.loads((path / NPY_SCHEMA_FILENAME).read_text())['columns']
+    wanted = set(columns) if columns is not None else None
+    data = {}
+    for entry in schema:
+        if wanted is not None and entry['name'] not in wanted:
+            continue
+        values = np.load(path / entry['file'], mmap_mode='r', allow_pickle=False)
+        if 'categories' in entry:
+            data[entry['name']] = pd.Categorical.from_codes(values, categories=entry['categories'])
+        else:
+            data[entry['name']] = values
+    return pd.DataFrame(data, copy=False)
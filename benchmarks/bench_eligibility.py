@@ -0,0 +1,61 @@
+"""Benchmarks eligibility.EligibilityIndex on random rank queries against a pandas filter.
+
+Run from the repository root after predict.py (or partitions.py predict) and features.py:
+    python -m benchmarks.bench_eligibility --queries 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import eligibility
+
+
+def pandas_reachable(frame, rank, k):
+    """The pandas equivalent of EligibilityIndex.reachable() over one flat frame."""
+    return frame[frame['closing_rank'] >= rank].nsmallest(k, 'closing_rank')
+
+
+def time_queries(function, ranks):
+    latencies = np.empty(len(ranks))
+    for i, rank in enumerate(ranks):
+        start = time.perf_counter()
+        function(rank)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rank-window eligibility queries.')
+    parser.add_argument('--queries', type=int, default=100000, help='Random rank queries per source')
+    parser.add_argument('--pandas_queries', type=int, default=1000, help='Queries timed for the pandas baseline')
+    parser.add_argument('--top', type=int, default=20, help='k of the top-k queries')
+    parser.add_argument('--sources', nargs='+', choices=eligibility.SOURCES, default=eligibility.SOURCES)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'source':>10} {'method':>8} {'queries':>8} {'mean us':>9} {'p50 us':>8} {'p99 us':>8} {'q/s':>9}")
+    for source in args.sources:
+        start = time.perf_counter()
+        index = eligibility.EligibilityIndex.build([source])
+        print(f"Built {source} index over {len(index)} rows in {time.perf_counter() - start:.2f}s")
+
+        # One flat frame of every partition's last round, for the pandas baseline
+        matches = index._matching(source, None, None, None, None)
+        flat = pd.DataFrame([row for partition, round_num, rank_index in matches
+                             for row in rank_index.rows(0, len(rank_index), partition, round_num)])
+        ranks = rng.integers(1, int(flat['closing_rank'].max()) + 1, size=args.queries)
+
+        for method, function, count in [
+            ('index', lambda rank: index.reachable(rank, args.top, source=source), args.queries),
+            ('pandas', lambda rank: pandas_reachable(flat, rank, args.top), args.pandas_queries),
+        ]:
+            latencies = time_queries(function, ranks[:count]) * 1e6
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{source:>10} {method:>8} {count:>8} {latencies.mean():>9.1f} {p50:>8.1f} {p99:>8.1f} "
+                  f"{count / latencies.sum() * 1e6:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmarks features.py against query.sql on the real data replicated 1x, 10x and 100x.
+
+Run from the repository root after build_db.py:
+    python -m benchmarks.bench_features --scales 1 10 100
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import build_db
+import features
+
+
+def build_scaled_db(source_conn, db_path, scale):
+    """Copies the rankings into a fresh database, replicating every college `scale` times.
+
+    Copy k of a college gets the name "<name> #k", so each copy forms its own set of
+    college/program groups with the same shape as the real data.
+    """
+    rankings = pd.read_sql_query(
+        "SELECT r.*, c.name AS college_name, apn.name AS program_name FROM rankings r "
+        "JOIN colleges c ON r.college_id = c.id "
+        "JOIN academic_program_name apn ON r.academic_program_name_id = apn.id ORDER BY r.id",
+        source_conn)
+
+    build_db.create_db_and_table(db_path)
+    conn = sqlite3.connect(db_path)
+    interner = build_db.NameInterner(conn)
+    insert_sql = build_db.build_insert_sql()
+    columns = ['college_name', 'program_name', 'quota', 'seat_type', 'gender',
+               'opening_rank', 'closing_rank', 'year', 'round']
+    with conn:
+        for copy in range(scale):
+            frame = rankings[columns].copy()
+            if copy:
+                frame['college_name'] = frame['college_name'] + f" #{copy}"
+            rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+            conn.executemany(insert_sql, [interner.intern_row(row) for row in rows])
+    conn.execute("ANALYZE")
+    conn.commit()
+    return conn
+
+
+def time_legacy_query(conn, timeout):
+    """Runs query.sql, giving up after `timeout` seconds. Returns (seconds, frame) or (None, None)."""
+    deadline = time.perf_counter() + timeout
+    conn.set_progress_handler(lambda: time.perf_counter() > deadline, 100000)
+    start = time.perf_counter()
+    try:
+        frame = features.run_legacy_query(conn)
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        return None, None
+    finally:
+        conn.set_progress_handler(None, 0)
+    return time.perf_counter() - start, frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark features.py against query.sql.')
+    parser.add_argument('--db', default=features.DB_FILENAME, help='Source database built by build_db.py')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='Replication factors to benchmark')
+    parser.add_argument('--legacy_timeout', type=float, default=600, help='Seconds before query.sql is abandoned')
+    args = parser.parse_args()
+
+    source_conn = sqlite3.connect(args.db)
+    print(f"{'scale':>6} {'rows':>10} {'output':>8} {'features.py':>12} {'query.sql':>12} {'speedup':>8}  match")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            conn = build_scaled_db(source_conn, Path(tmp_dir) / f"josaa_x{scale}.db", scale)
+            row_count = conn.execute("SELECT COUNT(*) FROM rankings").fetchone()[0]
+
+            start = time.perf_counter()
+            result = features.compute_features(features.load_rankings(conn))
+            fast_seconds = time.perf_counter() - start
+
+            legacy_seconds, legacy = time_legacy_query(conn, args.legacy_timeout)
+            if legacy_seconds is None:
+                legacy_text, speedup_text, match = f">{args.legacy_timeout:.0f}s", "-", "-"
+            else:
+                legacy_text = f"{legacy_seconds:.2f}s"
+                speedup_text = f"{legacy_seconds / fast_seconds:.0f}x"
+                match = "yes" if features.frames_match(result, legacy) else "NO"
+            print(f"{scale:>6} {row_count:>10} {len(result):>8} {fast_seconds:>11.2f}s {legacy_text:>12} {speedup_text:>8}  {match}")
+            conn.close()
+    source_conn.close()
+
+
+if __name__ == "__main__":
+    main()
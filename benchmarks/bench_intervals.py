@@ -0,0 +1,75 @@
+"""Benchmarks interval prediction against a plain predict on the same rows.
+
+Times, on the feature_engineered_data rows:
+  sklearn predict          - the pickled forest's own predict(), the baseline
+  sklearn predict_interval - flat_forest.predict_interval() on the pickled forest: each tree's
+                             compiled predict on pre-validated blocks, then mean, p10/p90 and std
+  flat predict             - FlatForest.predict()
+  flat predict_interval    - the same reductions over one batched (rows x trees) walk
+  per-estimator loop       - stacking estimator.predict() of every tree, then the same reductions
+and checks that all of them agree. Run from the repository root after train_model.py:
+    python -m benchmarks.bench_intervals --rows 10000
+"""
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+import flat_forest
+import predict
+from benchmarks.bench_model_format import load_rows
+
+
+def best_of(repeats, fn):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def per_estimator_interval(model, X, quantiles):
+    tree_predictions = np.stack([estimator.predict(X) for estimator in model.estimators_])
+    return tree_predictions.mean(axis=0), np.quantile(tree_predictions, quantiles, axis=0), tree_predictions.std(axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark interval prediction against a plain predict.')
+    parser.add_argument('--model', default='josaa_model.pkl', help='Pickled RandomForestRegressor')
+    parser.add_argument('--rows', type=int, default=10000, help='Rows of feature_engineered_data to predict')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed repetitions; the best is reported')
+    args = parser.parse_args()
+
+    model = pickle.load(open(args.model, 'rb'))
+    model.set_params(n_jobs=1)
+    forest = flat_forest.as_flat_forest(model)
+    X = load_rows(model, args.rows)
+    quantiles = predict.PREDICTION_INTERVAL
+
+    timings = {}
+    timings['sklearn predict'], expected = best_of(args.repeats, lambda: model.predict(X))
+    timings['sklearn predict_interval'], (tree_mean, tree_quantiles, tree_std) = best_of(
+        args.repeats, lambda: flat_forest.predict_interval(model, X, quantiles))
+    timings['flat predict'], flat = best_of(args.repeats, lambda: forest.predict(X))
+    timings['flat predict_interval'], (mean, quantile_values, std) = best_of(
+        args.repeats, lambda: forest.predict_interval(X, quantiles))
+    timings['per-estimator loop'], (loop_mean, loop_quantiles, loop_std) = best_of(
+        args.repeats, lambda: per_estimator_interval(model, X, quantiles))
+
+    baseline = timings['sklearn predict']
+    print(f"{X.shape[0]} rows, {forest.n_estimators} trees")
+    print(f"{'method':>24} {'time':>10} {'per row':>12} {'vs sklearn predict':>19}")
+    for name, seconds in timings.items():
+        print(f"{name:>24} {seconds * 1e3:>8.1f}ms {seconds / X.shape[0] * 1e6:>8.2f}us {seconds / baseline:>18.2f}x")
+
+    print(f"Max absolute difference: flat mean vs sklearn {np.abs(mean - expected).max():.3g}, "
+          f"sklearn interval mean vs sklearn {np.abs(tree_mean - expected).max():.3g}, "
+          f"predict vs predict_interval {np.abs(flat - mean).max():.3g}, "
+          f"quantiles vs loop {max(np.abs(quantile_values - loop_quantiles).max(), np.abs(tree_quantiles - loop_quantiles).max()):.3g}, "
+          f"std vs loop {max(np.abs(std - loop_std).max(), np.abs(tree_std - loop_std).max()):.3g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmarks scaling.inverse_transform_target() against predict.py's former dummy-DataFrame approach.
+
+The scaler is fitted on synthetic data shaped like scaling.NUMERICAL_COLUMNS, so no artifacts are
+needed. Run from the repository root:
+    python -m benchmarks.bench_inverse_scaling --sizes 1 100 10000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+import scaling
+
+
+def fit_scaler(rng, rows=10000):
+    """Fits a StandardScaler on synthetic rank-like columns."""
+    columns = scaling.NUMERICAL_COLUMNS
+    data = pd.DataFrame(rng.uniform(1, 200000, size=(rows, len(columns))), columns=columns)
+    return StandardScaler().fit(data)
+
+
+def dummy_frame_inverse(scaler, values):
+    """predict.py's former approach: an all-zeros frame of every scaled column, fully inverted."""
+    columns = scaling.NUMERICAL_COLUMNS
+    dummy_df = pd.DataFrame(np.zeros((len(values), len(columns))), columns=columns)
+    dummy_df[scaling.TARGET_COLUMN] = values
+    return scaler.inverse_transform(dummy_df)[:, columns.index(scaling.TARGET_COLUMN)]
+
+
+def best_time(function, repeats):
+    """Best wall time of `repeats` calls, and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark target-only inverse scaling against the dummy-DataFrame approach.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10000, 100000, 1000000], help='Batch sizes to benchmark')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed repetitions per batch size (the best is reported)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scaler = fit_scaler(rng)
+    print(f"{'rows':>9} {'dummy frame':>12} {'target only':>12} {'in place':>12} {'speedup':>8}  match")
+    for size in args.sizes:
+        values = rng.standard_normal(size)
+        legacy_seconds, legacy = best_time(lambda: dummy_frame_inverse(scaler, values), args.repeats)
+        copy_seconds, result = best_time(lambda: scaling.inverse_transform_target(scaler, values), args.repeats)
+        buffers = [values.copy() for _ in range(args.repeats)]
+        inplace_seconds, _ = best_time(lambda: scaling.inverse_transform_target(scaler, buffers.pop(), copy=False), args.repeats)
+        match = "yes" if np.allclose(legacy, result) else "NO"
+        print(f"{size:>9} {legacy_seconds * 1e3:>10.3f}ms {copy_seconds * 1e3:>10.3f}ms {inplace_seconds * 1e3:>10.3f}ms "
+              f"{legacy_seconds / inplace_seconds:>7.0f}x  {match}")
+
+
+if __name__ == "__main__":
+    main()
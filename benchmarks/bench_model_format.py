@@ -0,0 +1,100 @@
+"""Benchmarks the flattened forest (josaa_model.forest/) against the pickled josaa_model.pkl.
+
+Each format is loaded in a fresh process, which reports its load time, the RSS the load added,
+and batch and single-row prediction latency on the feature_engineered_data rows. Run from the
+repository root after train_model.py:
+    python -m benchmarks.bench_model_format --rows 10000
+"""
+import argparse
+import multiprocessing
+import os
+import pickle
+import time
+
+import numpy as np
+
+import encoding
+import flat_forest
+import predict
+
+
+def current_rss_mib():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def load_rows(model, rows):
+    """The first `rows` feature rows of feature_engineered_data, laid out the way `model` expects."""
+    data = predict.load_prediction_data(model)
+    data = data.assign(year=data['year'].astype(int)).iloc[:rows]
+    feature_columns = getattr(model, 'feature_names_in_', None)
+    if feature_columns is not None:
+        return data[list(feature_columns)]
+    feature_columns = [col for col in data.columns if col != 'closing_rank']
+    return encoding.design_matrix(data, feature_columns, encoding.load_sparse_block()[:rows])
+
+
+def measure(fmt, model_filename, rows, queue):
+    """Runs in a fresh process: loads the model in format `fmt` and times it."""
+    rss_before = current_rss_mib()
+    start = time.perf_counter()
+    if fmt == 'pickle':
+        model = pickle.load(open(model_filename, 'rb'))
+        model.set_params(n_jobs=1)
+    else:
+        model = flat_forest.load_forest(flat_forest.forest_path(model_filename))
+    load_seconds = time.perf_counter() - start
+    rss_loaded = current_rss_mib()
+
+    X = load_rows(model, rows)
+    start = time.perf_counter()
+    predictions = model.predict(X)
+    batch_seconds = time.perf_counter() - start
+
+    single_row_times = []
+    for i in range(min(200, X.shape[0])):
+        row = X[i:i + 1]
+        start = time.perf_counter()
+        model.predict(row)
+        single_row_times.append(time.perf_counter() - start)
+
+    queue.put({
+        'load_seconds': load_seconds,
+        'rss_mib': rss_loaded - rss_before,
+        'us_per_row': batch_seconds / X.shape[0] * 1e6,
+        'single_row_ms': float(np.median(single_row_times)) * 1e3,
+        'predictions': predictions,
+    })
+
+
+def run_isolated(fmt, model_filename, rows):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(fmt, model_filename, rows, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the flattened forest against the pickled model.')
+    parser.add_argument('--model', default='josaa_model.pkl', help='Pickled model; its .forest export must exist')
+    parser.add_argument('--rows', type=int, default=10000, help='Rows of feature_engineered_data to predict')
+    args = parser.parse_args()
+
+    forest_path = flat_forest.forest_path(args.model)
+    if not forest_path.exists():
+        flat_forest.export_forest(pickle.load(open(args.model, 'rb')), forest_path)
+
+    results = {fmt: run_isolated(fmt, args.model, args.rows) for fmt in ['pickle', 'flat']}
+    print(f"{'format':>8} {'load':>10} {'rss':>10} {'batch':>12} {'single row':>11}")
+    for fmt, result in results.items():
+        print(f"{fmt:>8} {result['load_seconds'] * 1e3:>8.1f}ms {result['rss_mib']:>6.1f} MiB "
+              f"{result['us_per_row']:>8.2f}us/row {result['single_row_ms']:>9.3f}ms")
+    difference = np.abs(results['pickle']['predictions'] - results['flat']['predictions']).max()
+    print(f"Max absolute prediction difference: {difference:.3g}")
+
+
+if __name__ == "__main__":
+    main()
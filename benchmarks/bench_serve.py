@@ -0,0 +1,107 @@
+"""Load test for serve.py: concurrent clients issuing point and rank-window queries.
+
+Starts a server in-process from the saved artifacts (or targets a running one with --port) and
+reports p50/p99 latency and requests/sec per concurrency level. Run from the repository root:
+    python -m benchmarks.bench_serve --clients 1 8 32 --requests 2000
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import numpy as np
+
+import serve
+
+
+def fetch_programs(host, port):
+    """Returns every (college, program, predicted_closing_rank) the server knows about."""
+    conn = http.client.HTTPConnection(host, port)
+    programs = json.loads(_get(conn, '/health'))['programs']
+    results = json.loads(_get(conn, '/window?' + urlencode({'min_rank': -2**62, 'max_rank': 2**62, 'limit': programs})))['results']
+    conn.close()
+    return [(r['college_name'], r['academic_program_name'], r['predicted_closing_rank']) for r in results]
+
+
+def _get(conn, path):
+    conn.request('GET', path)
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"GET {path} returned {response.status}: {body!r}")
+    return body
+
+
+def build_queries(programs, count, window_fraction, window_width, seed=0):
+    """Builds `count` query paths, a `window_fraction` share of them rank-window queries."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        college, program, rank = rng.choice(programs)
+        if rng.random() < window_fraction:
+            queries.append('/window?' + urlencode({'min_rank': rank, 'max_rank': rank + window_width}))
+        else:
+            queries.append('/predict?' + urlencode({'college': college, 'program': program}))
+    return queries
+
+
+def run_client(host, port, queries):
+    """Issues the queries over one keep-alive connection and returns their latencies in seconds."""
+    conn = http.client.HTTPConnection(host, port)
+    latencies = np.empty(len(queries))
+    for i, path in enumerate(queries):
+        start = time.perf_counter()
+        _get(conn, path)
+        latencies[i] = time.perf_counter() - start
+    conn.close()
+    return latencies
+
+
+def load_test(host, port, queries, clients):
+    """Splits the queries across `clients` concurrent connections. Returns (latencies, wall seconds)."""
+    shares = [queries[i::clients] for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = list(pool.map(lambda share: run_client(host, port, share), shares))
+    return np.concatenate(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the prediction server.')
+    parser.add_argument('--host', default=serve.DEFAULT_HOST, help='Server address')
+    parser.add_argument('--port', type=int, default=None, help='Port of a running server (default: start one in-process)')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32], help='Concurrency levels to test')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per concurrency level')
+    parser.add_argument('--window_fraction', type=float, default=0.2, help='Share of rank-window queries')
+    parser.add_argument('--window_width', type=int, default=1000, help='Width of the rank windows queried')
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        start = time.perf_counter()
+        server = serve.PredictionServer((args.host, 0), serve.PredictionIndex.load())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+        print(f"Started server with {len(server.index)} programs in {time.perf_counter() - start:.2f}s")
+
+    queries = build_queries(fetch_programs(args.host, port), args.requests, args.window_fraction, args.window_width)
+    run_client(args.host, port, queries[:100])  # Warm up
+
+    print(f"{'clients':>8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for clients in args.clients:
+        latencies, seconds = load_test(args.host, port, queries, clients)
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(f"{clients:>8} {len(latencies):>9} {len(latencies) / seconds:>9.0f} {p50:>8.2f} {p99:>8.2f} {latencies.max() * 1000:>8.2f}")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measures the startup of the command-line entry points with python -X importtime.
+
+Runs each command in a fresh interpreter, several times, and reports the median wall time, the
+total import time and the heaviest top-level imports parsed from -X importtime's stderr. With
+--repo the same commands are also run from another checkout, for a before/after comparison:
+    git worktree add /tmp/josaa_before HEAD~1
+    python -m benchmarks.bench_startup --repo /tmp/josaa_before
+The scripts of both checkouts run in the current directory, on the same artifacts. Run from the
+repository root after features.py (--list_branches needs historical_data).
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+COMMANDS = [
+    ['trend_analysis.py', '--list_branches'],
+    ['trend_analysis.py', '--help'],
+    ['predict.py', '--help'],
+    ['train_model.py', '--help'],
+    ['preprocess.py', '--help'],
+    ['features.py', '--help'],
+    ['eligibility.py', '--help'],
+    ['serve.py', '--help'],
+    ['build_db.py', '--help'],
+]
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    """Returns (total import microseconds, {top-level module: cumulative microseconds})."""
+    top_level = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and len(match.group(3)) == 1:  # One space of indentation: imported by the script itself
+            top_level[match.group(4)] = top_level.get(match.group(4), 0) + int(match.group(2))
+    return sum(top_level.values()), top_level
+
+
+def run_command(command, repo, repeats):
+    """Runs command with repo's copy of the script `repeats` times in the current directory.
+
+    Returns (median seconds, import microseconds, top-level imports).
+    """
+    env = dict(os.environ, JOSAA_METRICS='off')
+    script, *arguments = command
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', str(Path(repo) / script), *arguments], env=env,
+                                capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed in {repo}:\n{result.stderr[-2000:]}")
+    total, top_level = parse_importtime(result.stderr)
+    return statistics.median(times), total, top_level
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the startup time and imports of the CLI entry points.')
+    parser.add_argument('--repo', default=None, help='Another checkout to compare against (e.g. a git worktree of the previous commit)')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per command; the median wall time is reported')
+    parser.add_argument('--top', type=int, default=5, help='Heaviest top-level imports shown per command')
+    args = parser.parse_args()
+
+    repos = [('current', REPO_DIR)] + ([('other', Path(args.repo).resolve())] if args.repo else [])
+    print(f"{'command':<34} {'checkout':>8} {'wall':>9} {'imports':>9}  heaviest imports")
+    for command in COMMANDS:
+        results = {}
+        for label, repo in repos:
+            seconds, total, top_level = run_command(command, repo, args.repeats)
+            results[label] = seconds
+            heaviest = sorted(top_level.items(), key=lambda item: -item[1])[:args.top]
+            print(f"{' '.join(command):<34} {label:>8} {seconds * 1000:>7.0f}ms {total / 1000:>7.0f}ms  "
+                  + ', '.join(f"{module} {micros / 1000:.0f}ms" for module, micros in heaviest))
+        if 'other' in results:
+            print(f"{'':<34} {'speedup':>8} {results['other'] / results['current']:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Measures build_db.py --stream throughput and peak memory on a synthetic multi-GB round file.
+
+The file mimics the scraped PSV layout (many institutes x programs x quota/seat type/gender rows)
+with a configurable share of malformed rows. Run from the repository root:
+    python -m benchmarks.bench_stream_ingest --size_gb 2
+"""
+import argparse
+import random
+import resource
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import build_db
+
+QUOTAS = ['AI', 'HS', 'OS', 'GO', 'JK', 'LA']
+SEAT_TYPES = ['OPEN', 'OPEN (PwD)', 'EWS', 'EWS (PwD)', 'OBC-NCL', 'OBC-NCL (PwD)', 'SC', 'SC (PwD)', 'ST', 'ST (PwD)']
+GENDERS = ['Gender-Neutral', 'Female-only (including Supernumerary)']
+MALFORMED_ROWS = ['truncated#row', 'Institute#Program#AI#OPEN#Gender-Neutral#not-a-rank#12', '#######']
+
+
+def write_synthetic_psv(path, target_bytes, malformed_fraction=0.001, seed=0):
+    """Writes a round file of roughly target_bytes bytes. Returns the number of data lines written."""
+    rng = random.Random(seed)
+    institutes = [f"National Institute of Technology Synthetic {i}" for i in range(400)]
+    programs = [f"Synthetic Engineering {i} (4 Years, Bachelor of Technology)" for i in range(150)]
+    lines = 0
+    written = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('#'.join(build_db.CSV_HEADERS_FROM_FILE) + '\n')
+        while written < target_bytes:
+            block = []
+            for _ in range(10000):
+                if rng.random() < malformed_fraction:
+                    block.append(rng.choice(MALFORMED_ROWS))
+                    continue
+                opening = rng.randint(1, 900000)
+                block.append('#'.join([rng.choice(institutes), rng.choice(programs), rng.choice(QUOTAS),
+                                       rng.choice(SEAT_TYPES), rng.choice(GENDERS),
+                                       str(opening), str(opening + rng.randint(0, 50000))]))
+            text = '\n'.join(block) + '\n'
+            file.write(text)
+            written += len(text)
+            lines += len(block)
+    return lines
+
+
+def peak_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming ingestion on synthetic data.')
+    parser.add_argument('--size_gb', type=float, default=2.0, help='Size of the synthetic round file')
+    parser.add_argument('--chunk_size', type=int, default=build_db.STREAM_CHUNK_SIZE, help='Rows per streamed chunk')
+    parser.add_argument('--malformed_fraction', type=float, default=0.001, help='Share of malformed rows')
+    parser.add_argument('--work_dir', default=None, help='Directory for the synthetic data (default: a temporary directory)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as tmp_dir:
+        base_dir = Path(tmp_dir)
+        (base_dir / '2030').mkdir()
+        round_file = base_dir / '2030' / 'round1.psv'
+
+        start = time.perf_counter()
+        lines = write_synthetic_psv(round_file, int(args.size_gb * 2**30), args.malformed_fraction)
+        size_mib = round_file.stat().st_size / 2**20
+        print(f"Generated {lines} lines ({size_mib:.0f} MiB) in {time.perf_counter() - start:.1f}s")
+
+        db_path = base_dir / build_db.DB_FILENAME
+        build_db.create_db_and_table(db_path)
+        conn = sqlite3.connect(db_path)
+        rss_before = peak_rss_mib()
+        start = time.perf_counter()
+        counts = build_db.stream_load_file(conn, round_file, 2030, 1, '2030/round1.psv', build_db.NameInterner(conn), args.chunk_size)
+        seconds = time.perf_counter() - start
+        rejected = sum(count for reason, count in counts.items() if reason not in ('inserted', 'bytes'))
+        conn.close()
+
+        print(f"Streamed {counts['inserted']} rows ({rejected} quarantined) in {seconds:.1f}s: "
+              f"{counts['inserted'] / seconds:,.0f} rows/sec, {size_mib / seconds:.1f} MiB/s")
+        print(f"Peak RSS {peak_rss_mib():.1f} MiB (before the load: {rss_before:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
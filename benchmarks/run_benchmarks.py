@@ -0,0 +1,211 @@
+"""End-to-end benchmark of the pipeline scripts on synthetic data, with results kept as JSON.
+
+Generates a synthetic dataset (benchmarks/synthetic_data.py) in a work directory and runs each
+stage there in a fresh process, the way the scripts are run by hand:
+    build_db -> query_sql -> features -> preprocess -> feature_engineering -> train_model -> predict
+(query_sql only times query.sql; features.py computes the same feature set.) Every stage reports
+its wall time, the time spent importing its modules, the peak RSS of its process and the records
+of the instrumented hot paths inside it (see instrumentation.py). The results,
+with the commit, dataset size and parameters, are written to
+benchmarks/results/<timestamp>-<commit>.json and compared with the newest earlier result for the
+same parameters; the run exits with status 1 if a stage regressed, so CI can gate on it. Run from
+the repository root:
+    python -m benchmarks.run_benchmarks --scale 2 --years 2016 2024
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import synthetic_data
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+REPO_DIR = Path(__file__).resolve().parent.parent
+STAGE_MODULES = ['build_db', 'features', 'preprocess', 'feature_engineering', 'train_model', 'predict']
+STAGES = ['build_db', 'query_sql', 'features', 'preprocess', 'feature_engineering', 'train_model', 'predict']
+REGRESSION_THRESHOLD = 0.2  # Slowdown (or peak RSS growth) flagged against the previous result
+
+
+def run_stage(name, params):
+    """Runs one stage in the current directory. Returns (seconds, row count or None)."""
+    import build_db
+    import feature_engineering
+    import features
+    import predict
+    import preprocess
+    import train_model
+
+    start = time.perf_counter()
+    rows = None
+    if name == 'build_db':
+        build_db.main('.', bulk=params['bulk'])
+    elif name == 'query_sql':
+        conn = sqlite3.connect(build_db.DB_FILENAME)
+        rows = len(features.run_legacy_query(conn))
+        conn.close()
+    elif name == 'features':
+        features.main(build_db.DB_FILENAME)
+    elif name == 'preprocess':
+        preprocess.main(params['encoding'])
+    elif name == 'feature_engineering':
+        feature_engineering.main()
+    elif name == 'train_model':
+        train_model.main(n_jobs=params['n_jobs'], test_year=params['years'][1])
+    elif name == 'predict':
+        rows = len(predict.main())
+    return time.perf_counter() - start, rows
+
+
+def measure(name, params, work_dir, queue):
+    """Runs in a fresh process: times the imports and the stage, then reports the peak RSS and the
+    instrumented sub-stages the scripts recorded."""
+    os.chdir(work_dir)
+    sys.stdout = open(os.devnull, 'w')  # The scripts' own progress output
+    metrics_path = Path(f"metrics-{name}.jsonl")
+    metrics_path.unlink(missing_ok=True)
+    os.environ['JOSAA_METRICS'] = str(metrics_path)
+    start = time.perf_counter()
+    for module in STAGE_MODULES:
+        importlib.import_module(module)
+    import_seconds = time.perf_counter() - start
+    seconds, rows = run_stage(name, params)
+    queue.put({
+        'stage': name,
+        'seconds': seconds,
+        'import_seconds': import_seconds,
+        'peak_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KiB on Linux
+        'rows': rows,
+        'substages': [json.loads(line) for line in metrics_path.read_text().splitlines()] if metrics_path.exists() else [],
+    })
+
+
+def run_isolated(name, params, work_dir):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(name, params, work_dir, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Stage {name} failed with exit code {process.exitcode}")
+    return queue.get()
+
+
+def git_commit():
+    """Returns (commit hash, whether the working tree has uncommitted changes), or (None, None)."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def previous_result(results_dir, params, exclude):
+    """The newest earlier result in results_dir recorded with the same parameters, or None."""
+    for path in sorted(Path(results_dir).glob('*.json'), reverse=True):
+        if path == exclude:
+            continue
+        result = json.loads(path.read_text())
+        if result.get('params') == params:
+            return path, result
+    return None
+
+
+def compare(result, previous, threshold=REGRESSION_THRESHOLD):
+    """Prints every stage's time and peak RSS next to the previous result's; returns the regressed stages."""
+    before = {stage['stage']: stage for stage in previous['stages']} if previous else {}
+    regressed = []
+    print(f"{'stage':>20} {'time':>9} {'imports':>9} {'peak rss':>12} {'vs previous':>24}")
+    for stage in result['stages']:
+        line = (f"{stage['stage']:>20} {stage['seconds']:>8.2f}s {stage['import_seconds']:>8.2f}s "
+                f"{stage['peak_rss_mib']:>8.1f} MiB")
+        old = before.get(stage['stage'])
+        if old:
+            time_ratio = stage['seconds'] / old['seconds'] if old['seconds'] else 1.0
+            rss_ratio = stage['peak_rss_mib'] / old['peak_rss_mib'] if old['peak_rss_mib'] else 1.0
+            line += f" {time_ratio:>10.2f}x time {rss_ratio:>5.2f}x rss"
+            if time_ratio > 1 + threshold or rss_ratio > 1 + threshold:
+                line += "  REGRESSION"
+                regressed.append(stage['stage'])
+        print(line)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every pipeline stage on synthetic data and record the results.')
+    parser.add_argument('--scale', type=float, default=1.0, help='Synthetic institutes and programs, as a multiple of a real year')
+    parser.add_argument('--years', type=int, nargs=2, default=[2016, 2024], metavar=('FIRST', 'LAST'), help='Synthetic years; the last is the test year')
+    parser.add_argument('--rounds', type=int, default=6, help='Rounds per synthetic year')
+    parser.add_argument('--all_seat_types', action='store_true', help='Generate every seat type, not only OPEN')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='Stages to run (each needs the ones before it to have run)')
+    parser.add_argument('--bulk', action='store_true', help='Use the parallel bulk loader in build_db')
+    parser.add_argument('--encoding', default='onehot', help='Encoding used by preprocess')
+    parser.add_argument('--n_jobs', type=int, default=-1, help='Cores used to fit the forest')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic data')
+    parser.add_argument('--work_dir', default=None, help='Keep the synthetic data and outputs here (default: a temporary directory)')
+    parser.add_argument('--results_dir', default=str(RESULTS_DIR), help='Directory the JSON results are written to')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='Relative slowdown flagged as a regression')
+    args = parser.parse_args()
+
+    params = {
+        'scale': args.scale, 'years': args.years, 'rounds': args.rounds, 'all_seat_types': args.all_seat_types,
+        'seed': args.seed, 'bulk': args.bulk, 'encoding': args.encoding, 'n_jobs': args.n_jobs,
+        'artifact_format': os.environ.get('JOSAA_ARTIFACT_FORMAT', 'csv'),
+    }
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix='josaa_bench_'))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        start = time.perf_counter()
+        files, rows, size = synthetic_data.generate(work_dir, args.years[0], args.years[1], args.rounds,
+                                                    args.scale, args.all_seat_types, args.seed)
+        print(f"Generated {rows} rows in {files} round files ({size / 2**20:.1f} MiB) in {time.perf_counter() - start:.1f}s")
+
+        stages = []
+        for name in args.stages:
+            stages.append(run_isolated(name, params, str(work_dir)))
+            print(f"  {name:<20} {stages[-1]['seconds']:8.2f}s")
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    commit, dirty = git_commit()
+    now = datetime.now(timezone.utc)
+    result = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': now.isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': params,
+        'data': {'files': files, 'rows': rows, 'bytes': size},
+        'stages': stages,
+    }
+    results_dir = Path(args.results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    output_path = results_dir / f"{now.strftime('%Y%m%dT%H%M%S')}-{(commit or 'nocommit')[:10]}.json"
+    output_path.write_text(json.dumps(result, indent=1))
+
+    previous = previous_result(results_dir, params, exclude=output_path)
+    if previous:
+        print(f"\nCompared with {previous[0].name} (commit {(previous[1]['commit'] or '?')[:10]}):")
+    regressed = compare(result, previous[1] if previous else None, args.threshold)
+    print(f"\nResults saved to {output_path}")
+    if regressed:
+        print(f"Regressed stages: {', '.join(regressed)}")
+        sys.exit(1)  # So that CI fails on a regression
+
+
+if __name__ == "__main__":
+    main()
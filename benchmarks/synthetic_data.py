@@ -0,0 +1,171 @@
+"""Generates synthetic JoSAA round files shaped like the scraped ones, at a configurable scale.
+
+Writes <out_dir>/<year>/round<N>.psv with the scraped '#'-delimited header and columns. At scale 1
+the cardinality matches a real year: ~120 institutes (IITs, NITs, IIITs and GFTIs, named so
+trend_analysis.py classifies them), ~200 of 230 programs offered, ~7 programs per institute with common branches
+offered widely, and the real quota mix (AI for IITs/IIITs/GFTIs, HS and OS for NITs, a few GO/JK/LA
+rows). Closing ranks are log-normal around a per-institute-type median, scaled per program and
+seat type, drift from year to year, rise from round to round and are never below the opening
+rank. --scale multiplies the institutes and programs; --all_seat_types adds every category
+(the scraped data only has OPEN). Run from the repository root:
+    python -m benchmarks.synthetic_data --out_dir /tmp/josaa_synthetic --years 2016 2024 --scale 4
+"""
+import argparse
+import math
+import random
+from pathlib import Path
+
+import build_db
+
+# Institutes per type at scale 1, the median round-1 OPEN closing rank of its programs, and its quotas
+INSTITUTE_TYPES = {
+    'Indian Institute of Technology': (23, 3000, ['AI']),
+    'National Institute of Technology': (31, 14000, ['HS', 'OS']),
+    'Indian Institute of Information Technology': (26, 20000, ['AI']),
+    'Government Funded Technical Institute': (40, 30000, ['AI']),
+}
+# Small quotas some NITs have (Goa, Jammu & Kashmir, Ladakh)
+RARE_QUOTAS = ['GO', 'JK', 'LA']
+
+BRANCHES = [
+    'Computer Science and Engineering', 'Electronics and Communication Engineering', 'Electrical Engineering',
+    'Mechanical Engineering', 'Civil Engineering', 'Chemical Engineering', 'Information Technology',
+    'Metallurgical and Materials Engineering', 'Electronics and Instrumentation Engineering',
+    'Biotechnology', 'Production and Industrial Engineering', 'Engineering Physics', 'Mathematics and Computing',
+    'Architecture', 'Mining Engineering', 'Aerospace Engineering', 'Artificial Intelligence and Data Science',
+    'Chemistry', 'Physics', 'Textile Technology', 'Ceramic Engineering', 'Agricultural Engineering',
+    'Food Process Engineering', 'Biomedical Engineering', 'Naval Architecture',
+]
+DEGREES = [
+    '4 Years, Bachelor of Technology', '5 Years, Bachelor and Master of Technology (Dual Degree)',
+    '5 Years, Bachelor of Architecture', '5 Years, Integrated Master of Science',
+    '4 Years, Bachelor of Science', '5 Years, Integrated Master of Technology',
+    '4 Years, Bachelor of Technology with Minor', '4 Years, Bachelor of Design', '5 Years, Integrated B. Tech. and M. Tech.',
+]
+
+GENDERS = ['Gender-Neutral', 'Female-only (including Supernumerary)']
+# Category rank relative to the OPEN closing rank of the same seat
+SEAT_TYPE_FACTORS = {
+    'OPEN': 1.0, 'OPEN (PwD)': 0.03, 'EWS': 0.16, 'EWS (PwD)': 0.004, 'OBC-NCL': 0.32, 'OBC-NCL (PwD)': 0.01,
+    'SC': 0.16, 'SC (PwD)': 0.004, 'ST': 0.08, 'ST (PwD)': 0.002,
+}
+QUOTA_FACTORS = {'AI': 1.0, 'OS': 0.85, 'HS': 1.35, 'GO': 2.5, 'JK': 3.0, 'LA': 4.0}
+FEMALE_FACTOR = 1.7
+PROGRAMS_PER_INSTITUTE = 6.5
+ROUND_GROWTH = 0.07  # Mean closing-rank increase per round, relative to round 1
+YEAR_DRIFT_SIGMA = 0.08  # Log-scale random walk of every program's closing rank between years
+NEW_PROGRAM_SHARE = 0.15  # Programs introduced after the first year
+
+
+def make_catalog(scale=1.0, rng=None):
+    """Returns (institutes, programs, offerings).
+
+    institutes is a list of (name, type), programs a list of names ordered from most to least
+    commonly offered, and offerings a list of (institute index, program index, program popularity).
+    """
+    rng = rng or random.Random(0)
+    institutes = []
+    for institute_type, (count, _, _) in INSTITUTE_TYPES.items():
+        for i in range(max(1, round(count * scale))):
+            institutes.append((f"{institute_type} Synthetic {i + 1}", institute_type))
+
+    n_programs = max(len(BRANCHES), round(230 * scale))
+    programs = []
+    for i in range(n_programs):
+        branch = BRANCHES[i % len(BRANCHES)]
+        degree = DEGREES[(i // len(BRANCHES)) % len(DEGREES)]
+        variant = i // (len(BRANCHES) * len(DEGREES))
+        programs.append(f"{branch}{f' {variant + 1}' if variant else ''} ({degree})")
+
+    # Zipf-like weights: the common B.Tech branches are offered almost everywhere, the long tail rarely
+    weights = [1.0 / (rank + 1) ** 0.9 for rank in range(n_programs)]
+    offerings = []
+    for institute_index in range(len(institutes)):
+        n_offered = max(1, min(n_programs, int(rng.expovariate(1.0 / PROGRAMS_PER_INSTITUTE)) + 1))
+        chosen = set()
+        while len(chosen) < n_offered:
+            chosen.add(rng.choices(range(n_programs), weights)[0])
+        for program_index in sorted(chosen):
+            # Popular branches close earlier: a lower multiplier on the institute's median rank
+            popularity = math.exp(0.35 * math.log1p(program_index) - 1.0 + rng.gauss(0, 0.35))
+            offerings.append((institute_index, program_index, popularity))
+    return institutes, programs, offerings
+
+
+def _quotas(institute_type, rng):
+    quotas = list(INSTITUTE_TYPES[institute_type][2])
+    if institute_type == 'National Institute of Technology' and rng.random() < 0.1:
+        quotas.append(rng.choice(RARE_QUOTAS))
+    return quotas
+
+
+def generate(out_dir, first_year=2016, last_year=2024, rounds=6, scale=1.0, all_seat_types=False, seed=0):
+    """Writes round1..round<rounds>.psv for every year in [first_year, last_year] into out_dir.
+
+    Returns (files written, data rows written, bytes written).
+    """
+    rng = random.Random(seed)
+    institutes, programs, offerings = make_catalog(scale, rng)
+    seat_types = list(SEAT_TYPE_FACTORS) if all_seat_types else ['OPEN']
+    n_years = last_year - first_year + 1
+
+    # One series of seats per offering: every quota x seat type x gender, with its first year and
+    # round-1 closing rank per year
+    seats = []
+    for institute_index, program_index, popularity in offerings:
+        institute, institute_type = institutes[institute_index]
+        median_rank = INSTITUTE_TYPES[institute_type][1]
+        start = rng.randrange(1, n_years) if n_years > 1 and rng.random() < NEW_PROGRAM_SHARE else 0
+        log_rank = math.log(median_rank * popularity) + rng.gauss(0, 0.6)
+        yearly = []
+        for _ in range(n_years):
+            yearly.append(log_rank)
+            log_rank += rng.gauss(0, YEAR_DRIFT_SIGMA)
+        for quota in _quotas(institute_type, rng):
+            for seat_type in seat_types:
+                for gender in GENDERS:
+                    factor = QUOTA_FACTORS[quota] * SEAT_TYPE_FACTORS[seat_type] * (FEMALE_FACTOR if gender != GENDERS[0] else 1.0)
+                    prefix = '#'.join([institute, programs[program_index], quota, seat_type, gender])
+                    seats.append((prefix, start, [math.exp(value) * factor for value in yearly]))
+
+    files = rows = written = 0
+    header = '#'.join(build_db.CSV_HEADERS_FROM_FILE) + '\n'
+    for year_offset in range(n_years):
+        year_dir = Path(out_dir) / str(first_year + year_offset)
+        year_dir.mkdir(parents=True, exist_ok=True)
+        closing = {}
+        for round_num in range(1, rounds + 1):
+            lines = []
+            for seat_index, (prefix, start, yearly) in enumerate(seats):
+                if year_offset < start:
+                    continue
+                # Closing ranks only move up between rounds
+                target = yearly[year_offset] * (1 + ROUND_GROWTH * (round_num - 1)) * math.exp(rng.gauss(0, 0.03))
+                closing_rank = max(1, round(target), closing.get(seat_index, 1))
+                closing[seat_index] = closing_rank
+                opening_rank = max(1, round(closing_rank * rng.uniform(0.35, 0.9)))
+                lines.append(f"{prefix}#{opening_rank}#{closing_rank}\n")
+            text = header + ''.join(lines)
+            (year_dir / f"round{round_num}.psv").write_text(text, encoding='utf-8')
+            files += 1
+            rows += len(lines)
+            written += len(text.encode('utf-8'))
+    return files, rows, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write synthetic JoSAA round files for benchmarking.')
+    parser.add_argument('--out_dir', required=True, help='Directory the year folders are written into')
+    parser.add_argument('--years', type=int, nargs=2, default=[2016, 2024], metavar=('FIRST', 'LAST'), help='Range of years to generate')
+    parser.add_argument('--rounds', type=int, default=6, help='Rounds per year')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier on the number of institutes and programs')
+    parser.add_argument('--all_seat_types', action='store_true', help='Generate every seat type, not only OPEN')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    files, rows, written = generate(args.out_dir, args.years[0], args.years[1], args.rounds, args.scale, args.all_seat_types, args.seed)
+    print(f"Wrote {rows} rows in {files} round files ({written / 2**20:.1f} MiB) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
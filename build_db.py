@@ -1,12 +1,26 @@
 import sqlite3
 import csv
 import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import re # For parsing round number from filename
+import hashlib
+import collections
+import itertools
+
+import instrumentation
 
 # --- Configuration ---
 DB_FILENAME = "josaa.db"
-TABLE_NAME = "josaa_rankings"
+TABLE_NAME = "rankings"
+COLLEGES_TABLE_NAME = "colleges"
+PROGRAMS_TABLE_NAME = "academic_program_name"
+LEGACY_VIEW_NAME = "josaa_rankings"
+MANIFEST_TABLE_NAME = "ingested_files"
+QUARANTINE_TABLE_NAME = "ingest_rejects"
+SCHEMA_PATH = Path(__file__).with_name("schema.sql")
 
 # Original CSV headers (order matters for direct mapping)
 CSV_HEADERS_FROM_FILE = [
@@ -14,65 +28,138 @@ CSV_HEADERS_FROM_FILE = [
     "Gender", "Opening Rank", "Closing Rank"
 ]
 
-# Corresponding SQLite column names for CSV data
+# Corresponding SQLite column names for CSV data in the rankings table
+# (institute and program names are stored as ids into the dimension tables)
 SQLITE_COLUMNS_FOR_CSV_DATA = [
-    "institute", "academic_program_name", "quota", "seat_type",
+    "college_id", "academic_program_name_id", "quota", "seat_type",
     "gender", "opening_rank", "closing_rank"
 ]
 
+# Bulk-load settings: rows are pushed with executemany in batches of this size,
+# and the pragmas below trade crash-safety for speed while the load is running.
+BULK_BATCH_SIZE = 50000
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",  # 64 MiB page cache
+]
+
+# Streaming-load settings: rows are parsed, validated and inserted this many at a time, so memory
+# stays bounded however large the file is.
+STREAM_CHUNK_SIZE = 20000
+READ_BLOCK_SIZE = 1 << 20
+
 def sanitize_header_for_sqlite(header_name):
     """Converts CSV header to a SQLite-friendly column name."""
     return header_name.lower().replace(' ', '_').replace('-', '_').replace('.', '')
 
 def create_db_and_table(db_path):
-    """Creates the SQLite database and the table if they don't exist."""
+    """Creates the SQLite database and its tables, indexes and views (see schema.sql) if they don't exist."""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
-    # Build column definitions dynamically from CSV_HEADERS_FROM_FILE
-    column_definitions_from_csv = []
-    for header in CSV_HEADERS_FROM_FILE:
-        col_name = sanitize_header_for_sqlite(header)
-        if "rank" in col_name: # A bit simplistic, but works for "Opening Rank", "Closing Rank"
-            col_type = "REAL"
-        else:
-            col_type = "TEXT"
-        column_definitions_from_csv.append(f"{col_name} {col_type}")
-
-    # Add year and round columns with correct types
-    dynamic_column_definitions = column_definitions_from_csv + [
-        "year INTEGER",
-        "round INTEGER" # Changed to INTEGER
-    ]
-
-    create_table_sql = f"""
-    CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        {', '.join(dynamic_column_definitions)}
-    );
-    """
+    # Databases built before the normalized schema have josaa_rankings as a flat table.
+    # Drop it (and the manifest, so every file is re-ingested) to make room for the view.
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (LEGACY_VIEW_NAME,))
+    if cursor.fetchone():
+        print(f"Migrating flat table '{LEGACY_VIEW_NAME}' to the normalized schema; all files will be re-ingested.")
+        cursor.execute(f"DROP TABLE {LEGACY_VIEW_NAME}")
+        cursor.execute(f"DROP TABLE IF EXISTS {MANIFEST_TABLE_NAME}")
+        conn.commit()
+        cursor.execute("VACUUM")  # Reclaim the pages of the dropped table
 
-    print(f"Creating database table with SQL: {create_table_sql}")
-    cursor.execute(create_table_sql)
+    print(f"Creating database schema from {SCHEMA_PATH.name}")
+    cursor.executescript(SCHEMA_PATH.read_text())
     conn.commit()
     conn.close()
-    print(f"Database '{db_path}' checked/created with table '{TABLE_NAME}'.")
+    print(f"Database '{db_path}' checked/created with table '{TABLE_NAME}' and view '{LEGACY_VIEW_NAME}'.")
 
-def process_csv_file(db_conn, csv_filepath, year, round_number_int): # round_number_int is now an integer
-    """Reads a CSV file and inserts its data into the database."""
-    cursor = db_conn.cursor()
-    
-    # Construct the INSERT SQL statement dynamically
+class NameInterner:
+    """Maps institute and program names to the integer ids of their dimension tables.
+
+    Existing ids are loaded once; unseen names are inserted on first use on the same connection,
+    so they commit (or roll back) together with the ranking rows that reference them.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.ids = {}
+        for table in (COLLEGES_TABLE_NAME, PROGRAMS_TABLE_NAME):
+            self.ids[table] = {name: row_id for row_id, name in conn.execute(f"SELECT id, name FROM {table}")}
+
+    def intern(self, table, name):
+        ids = self.ids[table]
+        row_id = ids.get(name)
+        if row_id is None:
+            row_id = self.conn.execute(f"INSERT INTO {table} (name) VALUES (?)", (name,)).lastrowid
+            ids[name] = row_id
+        return row_id
+
+    def intern_row(self, values):
+        """Replaces the institute and program names of a convert_row() tuple with their ids."""
+        return (self.intern(COLLEGES_TABLE_NAME, values[0]), self.intern(PROGRAMS_TABLE_NAME, values[1])) + values[2:]
+
+def build_insert_sql():
+    """Builds the INSERT statement for one interned row of CSV data plus year and round."""
     # Ensure the order matches SQLITE_COLUMNS_FOR_CSV_DATA + year + round
     db_columns_for_insert = SQLITE_COLUMNS_FOR_CSV_DATA + ["year", "round"]
     placeholders = ', '.join(['?'] * len(db_columns_for_insert))
-    
-    insert_sql = f"""
+
+    return f"""
     INSERT INTO {TABLE_NAME} (
         {', '.join(db_columns_for_insert)}
     ) VALUES ({placeholders});
     """
 
+def convert_row(row, year, round_number_int):
+    """Converts one parsed CSV row into the value tuple expected by build_insert_sql().
+
+    Raises ValueError for unparseable ranks and IndexError for missing columns.
+    """
+    data_to_insert = []
+    for idx, header_name in enumerate(CSV_HEADERS_FROM_FILE):
+        value = row[idx].strip()
+        if header_name in ["Opening Rank", "Closing Rank"]:
+            if value == "Gender-Neutral":
+                data_to_insert.append(-1)
+            else:
+                data_to_insert.append(float(value) if value else None)
+        else:
+            data_to_insert.append(value)
+    data_to_insert.extend([year, round_number_int])
+    return tuple(data_to_insert)
+
+def parse_csv_file(csv_filepath, year, round_number_int):
+    """Parses a CSV file into a list of insertable row tuples without touching the database.
+
+    This is the bulk-load counterpart of process_csv_file(); it runs in a worker process,
+    so bad rows are only counted, not printed. Returns (rows, rows_skipped, parse_seconds).
+    """
+    start = time.perf_counter()
+    rows = []
+    rows_skipped = 0
+    with open(csv_filepath, 'r', encoding='utf-8', errors='replace') as file:
+        reader = csv.reader(file, delimiter='#')
+        if next(reader, None) is None:  # Header row
+            return rows, rows_skipped, time.perf_counter() - start
+        for row in reader:
+            if len(row) < len(CSV_HEADERS_FROM_FILE) or not any(field.strip() for field in row[:len(CSV_HEADERS_FROM_FILE)]):
+                rows_skipped += 1
+                continue
+            try:
+                rows.append(convert_row(row, year, round_number_int))
+            except (ValueError, IndexError):
+                rows_skipped += 1
+    return rows, rows_skipped, time.perf_counter() - start
+
+def process_csv_file(db_conn, csv_filepath, year, round_number_int, interner=None): # round_number_int is now an integer
+    """Reads a CSV file and inserts its data into the database. Returns (rows inserted, rows skipped)."""
+    cursor = db_conn.cursor()
+    insert_sql = build_insert_sql()
+    if interner is None:
+        interner = NameInterner(db_conn)
+
     rows_processed = 0
     rows_skipped = 0
 
@@ -84,7 +171,7 @@ def process_csv_file(db_conn, csv_filepath, year, round_number_int): # round_num
                 header_row_from_file = next(reader)  # Read header row
             except StopIteration:
                 print(f"Skipping empty CSV file: {csv_filepath}")
-                return
+                return rows_processed, rows_skipped
 
             # Optional: Validate header (compare sanitized version with SQLITE_COLUMNS_FOR_CSV_DATA)
             sanitized_header_from_file = [sanitize_header_for_sqlite(h) for h in header_row_from_file]
@@ -128,7 +215,7 @@ def process_csv_file(db_conn, csv_filepath, year, round_number_int): # round_num
                         rows_skipped += 1
                         continue
 
-                    cursor.execute(insert_sql, tuple(data_to_insert))
+                    cursor.execute(insert_sql, interner.intern_row(tuple(data_to_insert)))
                     rows_processed += 1
                 except ValueError as ve:
                     print(f"ValueError processing row {i+2} (0-indexed data) in {csv_filepath}: {row} - {ve}. Skipping.")
@@ -145,44 +232,349 @@ def process_csv_file(db_conn, csv_filepath, year, round_number_int): # round_num
         print(f"Error: File not found {csv_filepath}")
     except Exception as e:
         print(f"An error occurred while processing {csv_filepath}: {e}")
+    return rows_processed, rows_skipped
 
 
-def main(base_directory_str):
-    """Main function to orchestrate database creation and data population."""
-    base_dir = Path(base_directory_str)
-    db_path = base_dir / DB_FILENAME # Place DB in the base directory itself
+def complete_lines_end(csv_filepath):
+    """Byte offset just past the file's last newline; a trailing partial line (still being written) is excluded."""
+    position = csv_filepath.stat().st_size
+    with open(csv_filepath, 'rb') as file:
+        while position > 0:
+            step = min(READ_BLOCK_SIZE, position)
+            position -= step
+            file.seek(position)
+            newline = file.read(step).rfind(b'\n')
+            if newline >= 0:
+                return position + newline + 1
+    return 0
 
-    create_db_and_table(db_path)
+def prefix_digest(csv_filepath, length):
+    """Returns a sha256 object fed with the first `length` bytes of the file."""
+    digest = hashlib.sha256()
+    with open(csv_filepath, 'rb') as file:
+        remaining = length
+        while remaining > 0:
+            block = file.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
 
-    conn = sqlite3.connect(db_path)
+def stream_rows(csv_filepath, start, end, digest):
+    """Yields (byte_offset, fields) for the rows in bytes [start, end) of a file, one line at a time.
+
+    Every line read is also fed to `digest`. The header is skipped when starting at offset 0.
+    """
+    line_offset = [start]
+
+    def lines(file):
+        position = start
+        while position < end:
+            line = file.readline(end - position)
+            if not line:
+                break
+            digest.update(line)
+            line_offset[0] = position
+            position += len(line)
+            yield line.decode('utf-8', errors='replace')
+
+    with open(csv_filepath, 'rb') as file:
+        file.seek(start)
+        reader = csv.reader(lines(file), delimiter='#')
+        if start == 0 and next(reader, None) is None:  # Header row
+            return
+        for row in reader:
+            yield line_offset[0], row
+
+def classify_rows(rows, year, round_number_int):
+    """Validates and converts (byte_offset, fields) pairs.
+
+    Yields (row_tuple, None) for insertable rows and (None, (byte_offset, reason, raw_line)) for rejects.
+    """
+    column_count = len(CSV_HEADERS_FROM_FILE)
+    for offset, row in rows:
+        if not row:  # Empty line
+            continue
+        if len(row) < column_count:
+            yield None, (offset, 'too_few_columns', '#'.join(row))
+            continue
+        fields = [field.strip() for field in row[:column_count]]
+        if not any(fields):
+            yield None, (offset, 'blank_row', '#'.join(row))
+            continue
+        try:
+            ranks = [-1 if value == "Gender-Neutral" else (float(value) if value else None) for value in fields[5:7]]
+        except ValueError:
+            yield None, (offset, 'bad_rank', '#'.join(row))
+            continue
+        yield tuple(fields[:5]) + (ranks[0], ranks[1], year, round_number_int), None
+
+def chunked(iterable, size):
+    """Yields lists of up to `size` consecutive items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def stream_load_file(conn, csv_filepath, year, round_number_int, manifest_key, interner, chunk_size=STREAM_CHUNK_SIZE):
+    """Streams one file into the database in chunks, in a single transaction.
+
+    If the manifest shows that an earlier version of the file is an exact prefix of it (the file
+    was appended to), only the new complete lines are loaded; otherwise the (year, round) slice is
+    replaced. Rejected rows go to the quarantine table. Returns a Counter of rows inserted and
+    rejected per reason.
+    """
+    end = complete_lines_end(csv_filepath)
+    previous = conn.execute(f"SELECT year, round, size, sha256 FROM {MANIFEST_TABLE_NAME} WHERE path = ?",
+                            (manifest_key,)).fetchone()
+    start = 0
+    digest = None
+    if previous and previous[:2] == (year, round_number_int) and previous[2] <= end:
+        candidate = prefix_digest(csv_filepath, previous[2])
+        if candidate.hexdigest() == previous[3]:
+            start, digest = previous[2], candidate
+    counts = collections.Counter()
+    if start == end and digest is not None:
+        return counts
+
+    insert_sql = build_insert_sql()
+    reject_sql = f"INSERT INTO {QUARANTINE_TABLE_NAME} (path, byte_offset, reason, raw) VALUES (?, ?, ?, ?)"
+    with conn:  # One transaction per file; rolled back on error.
+        if digest is None:
+            digest = hashlib.sha256()
+            delete_round_slice(conn, year, round_number_int)
+            conn.execute(f"DELETE FROM {QUARANTINE_TABLE_NAME} WHERE path = ?", (manifest_key,))
+        classified = classify_rows(stream_rows(csv_filepath, start, end, digest), year, round_number_int)
+        for chunk in chunked(classified, chunk_size):
+            rows = [interner.intern_row(row) for row, _ in chunk if row is not None]
+            rejects = [(manifest_key,) + reject for _, reject in chunk if reject is not None]
+            conn.executemany(insert_sql, rows)
+            conn.executemany(reject_sql, rejects)
+            counts['inserted'] += len(rows)
+            counts.update(reject[2] for reject in rejects)
+        record_manifest_entry(conn, manifest_key, year, round_number_int, end, digest.hexdigest())
+    counts['bytes'] = end - start
+    return counts
+
+def stream_load(conn, round_files, chunk_size=STREAM_CHUNK_SIZE):
+    """Streams every changed file (see stream_load_file()) and prints one summary line per file."""
+    interner = NameInterner(conn)
+    for csv_file_path, year, round_num, manifest_key, _, _ in round_files:
+        start = time.perf_counter()
+        try:
+            with instrumentation.stage('build_db.stream_load_file', file=manifest_key) as metrics:
+                counts = stream_load_file(conn, csv_file_path, year, round_num, manifest_key, interner, chunk_size)
+                metrics.counters.update(counts)
+        except (OSError, sqlite3.Error) as e:
+            print(f"An error occurred while streaming {csv_file_path}: {e}")
+            interner = NameInterner(conn)  # Names interned in the rolled-back transaction are gone
+            continue
+        seconds = time.perf_counter() - start
+        rejected = {reason: count for reason, count in counts.items() if reason not in ('inserted', 'bytes')}
+        rate = counts['inserted'] / seconds if seconds > 0 else float('inf')
+        print(f"  Streamed {manifest_key}: {counts['inserted']} rows, {sum(rejected.values())} quarantined {rejected or ''} "
+              f"({counts['bytes'] / 2**20:.1f} MiB in {seconds:.3f}s, {rate:,.0f} rows/sec)")
 
+def find_round_files(base_dir):
+    """Yields (csv_file_path, year, round_number) for every <year>/round<N>.psv under base_dir.
+
+    Files are yielded in (year, round) order so that row ids are assigned deterministically.
+    """
+    found = []
     for item_in_base in base_dir.iterdir():
         if item_in_base.is_dir() and item_in_base.name.isdigit() and len(item_in_base.name) == 4:
-            try:
-                year = int(item_in_base.name)
-            except ValueError:
-                # This case should ideally not be hit due to the isdigit() check, but defensive.
-                print(f"Skipping directory '{item_in_base.name}' as it's not a valid year format.")
-                continue
-            
-            print(f"\nProcessing year directory: {year}")
+            year = int(item_in_base.name)
             for csv_file_path in item_in_base.glob('*.psv'):
-                filename_stem = csv_file_path.stem  # e.g., "round1"
-                
-                # Extract round number from filename using regex
-                match = re.match(r"round(\d+)", filename_stem, re.IGNORECASE)
+                # Extract round number from filename using regex, e.g. "round1"
+                match = re.match(r"round(\d+)", csv_file_path.stem, re.IGNORECASE)
                 if match:
-                    try:
-                        round_num_int = int(match.group(1))
-                        # print(f"  Found CSV: {csv_file_path.name}, Year: {year}, Round: {round_num_int}")
-                        process_csv_file(conn, csv_file_path, year, round_num_int)
-                    except ValueError:
-                        print(f"  Could not parse round number as integer from '{match.group(1)}' in {csv_file_path.name}. Skipping.")
+                    found.append((csv_file_path, year, int(match.group(1))))
                 else:
                     print(f"  Filename '{csv_file_path.name}' does not match 'round<number>.csv' pattern. Skipping.")
-    
+    yield from sorted(found, key=lambda item: (item[1], item[2], item[0].name))
+
+def file_fingerprint(csv_filepath):
+    """Returns (size, sha256 hex digest) of a file's contents."""
+    digest = hashlib.sha256()
+    with open(csv_filepath, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return csv_filepath.stat().st_size, digest.hexdigest()
+
+def plan_incremental_load(conn, base_dir, round_files):
+    """Compares the round files on disk against the manifest table.
+
+    Returns (changed, removed): changed is a list of (csv_file_path, year, round, manifest_key, size, sha256)
+    for new or modified files; removed is a list of manifest rows (path, year, round) whose file is gone.
+    """
+    manifest = {
+        path: (year, round_num, size, sha256)
+        for path, year, round_num, size, sha256 in conn.execute(
+            f"SELECT path, year, round, size, sha256 FROM {MANIFEST_TABLE_NAME}")
+    }
+
+    changed = []
+    seen = set()
+    for csv_file_path, year, round_num in round_files:
+        manifest_key = csv_file_path.relative_to(base_dir).as_posix()
+        seen.add(manifest_key)
+        size, sha256 = file_fingerprint(csv_file_path)
+        if manifest.get(manifest_key) == (year, round_num, size, sha256):
+            continue
+        changed.append((csv_file_path, year, round_num, manifest_key, size, sha256))
+
+    removed = [(path, year, round_num) for path, (year, round_num, _, _) in manifest.items() if path not in seen]
+    return changed, removed
+
+def delete_round_slice(conn, year, round_number_int):
+    """Deletes every ranking row of one (year, round) slice."""
+    conn.execute(f"DELETE FROM {TABLE_NAME} WHERE year = ? AND round = ?", (year, round_number_int))
+
+def record_manifest_entry(conn, manifest_key, year, round_number_int, size, sha256):
+    """Inserts or refreshes the manifest row for one source file."""
+    conn.execute(f"""
+    INSERT INTO {MANIFEST_TABLE_NAME} (path, year, round, size, sha256, ingested_at)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(path) DO UPDATE SET
+        year = excluded.year, round = excluded.round, size = excluded.size,
+        sha256 = excluded.sha256, ingested_at = excluded.ingested_at;
+    """, (manifest_key, year, round_number_int, size, sha256))
+
+def remove_stale_slices(conn, removed):
+    """Drops the slices and manifest rows of source files that no longer exist."""
+    with conn:
+        for manifest_key, year, round_num in removed:
+            print(f"  Source file {manifest_key} is gone; removing year {year} round {round_num}.")
+            delete_round_slice(conn, year, round_num)
+            conn.execute(f"DELETE FROM {MANIFEST_TABLE_NAME} WHERE path = ?", (manifest_key,))
+            conn.execute(f"DELETE FROM {QUARANTINE_TABLE_NAME} WHERE path = ?", (manifest_key,))
+
+def bulk_load(conn, round_files, workers=None, batch_size=BULK_BATCH_SIZE):
+    """Parses files in a process pool and inserts all rows with executemany in a single transaction.
+
+    round_files is the `changed` list from plan_incremental_load(); each file's (year, round) slice is
+    replaced and its manifest row refreshed inside the same transaction.
+    """
+    for pragma in BULK_LOAD_PRAGMAS:
+        conn.execute(pragma)
+
+    insert_sql = build_insert_sql()
+    interner = NameInterner(conn)
+    total_rows = 0
+    load_start = time.perf_counter()
+
+    with instrumentation.stage('build_db.bulk_load') as metrics, ProcessPoolExecutor(max_workers=workers) as executor:
+        # executor.map keeps results in submission order, so inserts stay in (year, round) order.
+        paths = [item[0] for item in round_files]
+        years = [item[1] for item in round_files]
+        rounds = [item[2] for item in round_files]
+        results = executor.map(parse_csv_file, paths, years, rounds)
+
+        with conn:  # One transaction for the whole load; rolled back on error.
+            for (csv_file_path, year, round_num, manifest_key, size, sha256), (rows, rows_skipped, parse_seconds) in zip(round_files, results):
+                insert_start = time.perf_counter()
+                delete_round_slice(conn, year, round_num)
+                for offset in range(0, len(rows), batch_size):
+                    conn.executemany(insert_sql, [interner.intern_row(row) for row in rows[offset:offset + batch_size]])
+                record_manifest_entry(conn, manifest_key, year, round_num, size, sha256)
+                insert_seconds = time.perf_counter() - insert_start
+
+                total_rows += len(rows)
+                metrics.count('files')
+                metrics.count('rows', len(rows))
+                metrics.count('rows_skipped', rows_skipped)
+                metrics.count('parse_seconds', parse_seconds)
+                metrics.count('insert_seconds', insert_seconds)
+                elapsed = parse_seconds + insert_seconds
+                rate = len(rows) / elapsed if elapsed > 0 else float('inf')
+                print(f"  Loaded {csv_file_path.parent.name}/{csv_file_path.name}: {len(rows)} rows, skipped {rows_skipped} "
+                      f"(parse {parse_seconds:.3f}s, insert {insert_seconds:.3f}s, {rate:,.0f} rows/sec)")
+
+    total_seconds = time.perf_counter() - load_start
+    total_rate = total_rows / total_seconds if total_seconds > 0 else float('inf')
+    print(f"\nBulk load: {total_rows} rows from {len(round_files)} files in {total_seconds:.3f}s ({total_rate:,.0f} rows/sec).")
+
+
+def main(base_directory_str, bulk=False, workers=None, batch_size=BULK_BATCH_SIZE, stream=False, chunk_size=STREAM_CHUNK_SIZE, follow=None):
+    """Main function to orchestrate database creation and data population.
+
+    With follow set (and stream), the directory is re-scanned every `follow` seconds and new or
+    appended data is streamed in until interrupted.
+    """
+    base_dir = Path(base_directory_str)
+    db_path = base_dir / DB_FILENAME # Place DB in the base directory itself
+
+    create_db_and_table(db_path)
+
+    while True:
+        with instrumentation.stage('build_db.ingest', mode='stream' if stream else 'bulk' if bulk else 'rows'):
+            ingest(base_dir, db_path, bulk=bulk, workers=workers, batch_size=batch_size, stream=stream, chunk_size=chunk_size)
+        if not follow:
+            break
+        try:
+            time.sleep(follow)
+        except KeyboardInterrupt:
+            break
+
+def ingest(base_dir, db_path, bulk=False, workers=None, batch_size=BULK_BATCH_SIZE, stream=False, chunk_size=STREAM_CHUNK_SIZE):
+    """Loads the new, changed and removed round files under base_dir into the database."""
+    conn = sqlite3.connect(db_path)
+    round_files = list(find_round_files(base_dir))
+    changed, removed = plan_incremental_load(conn, base_dir, round_files)
+    print(f"\n{len(round_files) - len(changed)} of {len(round_files)} round files unchanged since last ingest; "
+          f"{len(changed)} to load, {len(removed)} removed.")
+    remove_stale_slices(conn, removed)
+
+    if stream:
+        stream_load(conn, changed, chunk_size=chunk_size)
+    elif bulk:
+        bulk_load(conn, changed, workers=workers, batch_size=batch_size)
+    else:
+        current_year = None
+        interner = NameInterner(conn)
+        for csv_file_path, year, round_num_int, manifest_key, size, sha256 in changed:
+            if year != current_year:
+                print(f"\nProcessing year directory: {year}")
+                current_year = year
+            # The slice delete, the inserts and the manifest row are all committed together by
+            # process_csv_file(); if it bails out without committing, roll the partial slice back.
+            delete_round_slice(conn, year, round_num_int)
+            record_manifest_entry(conn, manifest_key, year, round_num_int, size, sha256)
+            with instrumentation.stage('build_db.process_csv_file', file=manifest_key) as file_metrics:
+                rows_inserted, rows_skipped = process_csv_file(conn, csv_file_path, year, round_num_int, interner)
+                file_metrics.count('rows', rows_inserted)
+                file_metrics.count('rows_skipped', rows_skipped)
+            if conn.in_transaction:
+                conn.rollback()
+                interner = NameInterner(conn)  # Names interned in the rolled-back transaction are gone
+
+    if changed or removed:
+        # Refresh planner statistics so query.sql's correlated lookups pick the composite index.
+        with instrumentation.stage('build_db.analyze'):
+            conn.execute("ANALYZE")
+            conn.commit()
+
     conn.close()
     print(f"\nFinished processing. Database '{db_path}' is populated.")
 
 if __name__ == "__main__":
-    main(".")
+    parser = argparse.ArgumentParser(description='Build the JoSAA SQLite database from <year>/round<N>.psv files.')
+    parser.add_argument('base_dir', nargs='?', default='.', help='Directory containing the year folders (default: current directory)')
+    parser.add_argument('--bulk', action='store_true', help='Parse files in parallel and load them with executemany in one transaction')
+    parser.add_argument('--workers', type=int, default=None, help='Number of parser processes for --bulk (default: CPU count)')
+    parser.add_argument('--batch_size', type=int, default=BULK_BATCH_SIZE, help='Rows per executemany call for --bulk')
+    parser.add_argument('--stream', action='store_true', help='Stream files in bounded-memory chunks, quarantining bad rows and loading only appended data')
+    parser.add_argument('--chunk_size', type=int, default=STREAM_CHUNK_SIZE, help='Rows per chunk for --stream')
+    parser.add_argument('--follow', type=float, default=None, metavar='SECONDS', help='With --stream, re-scan every SECONDS for new or appended data')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    if args.follow and not args.stream:
+        parser.error("--follow requires --stream")
+    instrumentation.configure_from_args(args)
+
+    with instrumentation.stage('build_db'):
+        main(args.base_dir, bulk=args.bulk, workers=args.workers, batch_size=args.batch_size,
+             stream=args.stream, chunk_size=args.chunk_size, follow=args.follow)
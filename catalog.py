@@ -0,0 +1,54 @@
+"""Small JSON sidecar with the metadata of the historical_data artifact.
+
+features.py writes historical_data.catalog.json next to the artifact it saves. It holds the program
+names in order of first appearance (trend_analysis.py's branch numbers), the college names, the
+years and rounds, and the size and modification time of the artifact it describes. Listing them
+then needs neither pandas nor a read of the full artifact. A catalog whose artifact has changed
+since is rebuilt from the artifact on first use.
+"""
+import json
+import os
+from pathlib import Path
+
+CATALOG_SUFFIX = '.catalog.json'
+
+def catalog_path(name):
+    return Path(f"{name}{CATALOG_SUFFIX}")
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {'path': str(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def build_catalog(frame):
+    """The catalog entries of a historical_data frame."""
+    return {
+        'branches': [str(name) for name in frame['academic_program_name'].unique()],
+        'colleges': sorted(str(name) for name in frame['college_name'].unique()),
+        'years': sorted(int(year) for year in frame['year'].dropna().unique()),
+        'rounds': sorted(int(round_num) for round_num in frame['round'].dropna().unique()),
+    }
+
+def save_catalog(name, frame, artifact_path):
+    """Writes the catalog of `frame`, which was just saved as artifact `name` at artifact_path."""
+    entries = {'source': _source_stamp(artifact_path), **build_catalog(frame)}
+    path = catalog_path(name)
+    path.write_text(json.dumps(entries, indent=1))
+    return path
+
+def load_catalog(name='historical_data'):
+    """Returns the catalog of artifact `name`, rebuilding it if it is missing or out of date."""
+    path = catalog_path(name)
+    if path.exists():
+        entries = json.loads(path.read_text())
+        source = entries.get('source', {})
+        try:
+            if _source_stamp(source['path']) == source:
+                return entries
+        except (KeyError, OSError):
+            pass
+
+    import artifacts  # Only a stale or missing catalog needs pandas
+    _, artifact_path = artifacts.find_artifact(name)
+    frame = artifacts.load_frame(name, columns=['year', 'round', 'college_name', 'academic_program_name'])
+    save_catalog(name, frame, artifact_path)
+    return json.loads(path.read_text())
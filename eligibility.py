@@ -0,0 +1,192 @@
+"""Rank-window eligibility queries: which college/programs are likely open at a given rank.
+
+A program is reachable at rank R if its closing rank is at least R. EligibilityIndex keeps, for
+every (source, partition, round), the closing ranks sorted in a NumPy array next to the matching
+college/program rows, so a query is a binary search plus a slice:
+  reachable(rank, k)        - the k most competitive programs still open at `rank`, O(log n + k)
+  in_range(min_rank, max_rank) - programs closing within [min_rank, max_rank], O(log n + k)
+Sources are
+  predicted  - predicted closing ranks (partition_prediction_report.csv, else prediction_report.csv)
+  historical - the latest year's closing rank of every program per round (the partitioned
+               historical_data artifact, else historical_data)
+Partitions are (seat_type, quota, gender); queries may leave any of them unset to search all.
+
+    python eligibility.py --rank 12000 --seat_type OBC-NCL --gender Gender-Neutral --top 20
+"""
+import argparse
+import heapq
+import os
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+import features
+import instrumentation
+
+SOURCES = ['predicted', 'historical']
+PREDICTION_REPORT_FILENAME = 'prediction_report.csv'
+
+# Partition of the un-partitioned artifacts (the query.sql slice)
+DEFAULT_PARTITION = (features.SEAT_TYPE, '/'.join(features.QUOTAS), features.GENDER)
+
+class RankIndex:
+    """Programs of one partition and round, sorted by closing rank."""
+
+    def __init__(self, frame, rank_column):
+        frame = frame.sort_values(rank_column, kind='stable')
+        self.closing_ranks = frame[rank_column].to_numpy(dtype=np.float64)
+        self.colleges = frame['college_name'].to_numpy(dtype=object)
+        self.programs = frame['academic_program_name'].to_numpy(dtype=object)
+        self.opening_ranks = frame['opening_rank'].to_numpy(dtype=np.float64) if 'opening_rank' in frame else None
+
+    def __len__(self):
+        return len(self.closing_ranks)
+
+    def reachable_slice(self, rank, k):
+        start = np.searchsorted(self.closing_ranks, rank, side='left')
+        return start, min(start + k, len(self))
+
+    def range_slice(self, min_rank, max_rank):
+        return (np.searchsorted(self.closing_ranks, min_rank, side='left'),
+                np.searchsorted(self.closing_ranks, max_rank, side='right'))
+
+    def rows(self, start, stop, partition, round_num):
+        """Result rows [start, stop) as dicts, in closing-rank order."""
+        for i in range(start, stop):
+            row = {
+                'college_name': self.colleges[i],
+                'academic_program_name': self.programs[i],
+                'closing_rank': int(round(self.closing_ranks[i])),
+                'seat_type': partition[0], 'quota': partition[1], 'gender': partition[2],
+                'round': round_num,
+            }
+            if self.opening_ranks is not None:
+                row['opening_rank'] = None if np.isnan(self.opening_ranks[i]) else int(round(self.opening_ranks[i]))
+            yield row
+
+class EligibilityIndex:
+    """RankIndexes keyed by (source, partition, round)."""
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self._match_cache = {}  # Query filters -> matching indexes, so repeated filters skip the scan
+
+    @classmethod
+    def build(cls, sources=SOURCES):
+        """Builds the index from the prediction reports and historical artifacts on disk."""
+        indexes = {}
+        if 'predicted' in sources:
+            for key, frame in _predicted_frames():
+                indexes[('predicted',) + key] = RankIndex(frame, 'predicted_closing_rank')
+        if 'historical' in sources:
+            for key, frame in _historical_frames():
+                indexes[('historical',) + key] = RankIndex(frame, 'closing_rank')
+        if not indexes:
+            raise FileNotFoundError("Nothing to index; run predict.py / partitions.py predict or features.py first")
+        return cls(indexes)
+
+    def __len__(self):
+        return sum(len(index) for index in self.indexes.values())
+
+    def _matching(self, source, seat_type, quota, gender, round_num):
+        """(partition, round, RankIndex) of the indexes a query touches; round None means each
+        partition's last round."""
+        cache_key = (source, seat_type, quota, gender, round_num)
+        if cache_key not in self._match_cache:
+            self._match_cache[cache_key] = self._find_matching(source, seat_type, quota, gender, round_num)
+        return self._match_cache[cache_key]
+
+    def _find_matching(self, source, seat_type, quota, gender, round_num):
+        wanted = (seat_type, quota, gender)
+        matches = {}
+        for (key_source, *partition, key_round), index in self.indexes.items():
+            partition = tuple(partition)
+            if key_source != source or any(w is not None and w != p for w, p in zip(wanted, partition)):
+                continue
+            if round_num is not None:
+                if key_round == round_num:
+                    matches[partition] = (key_round, index)
+            elif partition not in matches or key_round > matches[partition][0]:
+                matches[partition] = (key_round, index)
+        return [(partition, key_round, index) for partition, (key_round, index) in matches.items()]
+
+    def reachable(self, rank, k=10, source='predicted', seat_type=None, quota=None, gender=None, round_num=None):
+        """The k programs with the lowest closing rank that is still >= rank, across the matching partitions."""
+        per_partition = []
+        for partition, key_round, index in self._matching(source, seat_type, quota, gender, round_num):
+            start, stop = index.reachable_slice(rank, k)
+            per_partition.append(index.rows(start, stop, partition, key_round))
+        merged = heapq.merge(*per_partition, key=lambda row: row['closing_rank'])
+        return list(islice(merged, k))
+
+    def in_range(self, min_rank, max_rank, source='predicted', seat_type=None, quota=None, gender=None, round_num=None, limit=None):
+        """Programs whose closing rank lies in [min_rank, max_rank], across the matching partitions."""
+        per_partition = []
+        for partition, key_round, index in self._matching(source, seat_type, quota, gender, round_num):
+            start, stop = index.range_slice(min_rank, max_rank)
+            if limit is not None:
+                stop = min(stop, start + limit)
+            per_partition.append(index.rows(start, stop, partition, key_round))
+        merged = heapq.merge(*per_partition, key=lambda row: row['closing_rank'])
+        return list(islice(merged, limit))
+
+def _predicted_frames():
+    """Yields ((seat_type, quota, gender, round), frame) for the prediction reports."""
+    if os.path.exists(artifacts.PARTITION_REPORT_FILENAME):
+        report = pd.read_csv(artifacts.PARTITION_REPORT_FILENAME)
+        for (seat_type, quota, gender, round_num), frame in report.groupby(features.PARTITION_COLUMNS + ['round'], sort=False):
+            yield (seat_type, quota, gender, int(round_num)), frame
+    elif os.path.exists(PREDICTION_REPORT_FILENAME):
+        report = pd.read_csv(PREDICTION_REPORT_FILENAME)
+        for round_num, frame in report.groupby('round', sort=False):
+            yield DEFAULT_PARTITION + (int(round_num),), frame
+
+def _historical_frames():
+    """Yields ((seat_type, quota, gender, round), frame) of the latest year's rows per program and round."""
+    columns = ['year', 'round', 'opening_rank', 'closing_rank', 'college_name', 'academic_program_name']
+    try:
+        slugs = list(artifacts.partition_index(features.OUTPUT_ARTIFACT))
+        data = artifacts.load_partitions(features.OUTPUT_ARTIFACT, slugs, columns=columns)
+        keys = features.PARTITION_COLUMNS
+    except FileNotFoundError:
+        try:
+            data = artifacts.load_frame(features.OUTPUT_ARTIFACT, columns=columns)
+        except FileNotFoundError:
+            return
+        data = data.assign(**dict(zip(features.PARTITION_COLUMNS, DEFAULT_PARTITION)))
+        keys = features.PARTITION_COLUMNS
+    data = data.dropna(subset=['closing_rank']).sort_values('year', kind='stable')
+    latest = data.drop_duplicates(keys + ['round', 'college_name', 'academic_program_name'], keep='last')
+    for (seat_type, quota, gender, round_num), frame in latest.groupby(keys + ['round'], sort=False, observed=True):
+        yield (seat_type, quota, gender, int(round_num)), frame
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='List the college/programs likely open at a given rank.')
+    parser.add_argument('--rank', type=int, required=True, help='Your rank (in your category)')
+    parser.add_argument('--max_rank', type=int, default=None, help='List every program closing in [rank, max_rank] instead of the top k')
+    parser.add_argument('--top', type=int, default=20, help='Number of best reachable programs to list')
+    parser.add_argument('--source', choices=SOURCES, default='predicted', help='Predicted or latest historical closing ranks')
+    parser.add_argument('--seat_type', help='Seat type, e.g. OPEN or OBC-NCL (default: all)')
+    parser.add_argument('--quota', help='Quota, e.g. AI, HS or OS (default: all)')
+    parser.add_argument('--gender', help='Gender, e.g. Gender-Neutral (default: all)')
+    parser.add_argument('--round', type=int, default=None, help='Round (default: the latest round indexed)')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    with instrumentation.stage('eligibility.build', source=args.source) as metrics:
+        index = EligibilityIndex.build([args.source])
+        metrics.count('rows', len(index))
+    filters = {'source': args.source, 'seat_type': args.seat_type, 'quota': args.quota, 'gender': args.gender, 'round_num': args.round}
+    with instrumentation.stage('eligibility.query', rank=args.rank) as metrics:
+        if args.max_rank is not None:
+            results = index.in_range(args.rank, args.max_rank, **filters)
+        else:
+            results = index.reachable(args.rank, args.top, **filters)
+        metrics.count('results', len(results))
+    if results:
+        print(pd.DataFrame(results).to_string(index=False))
+    else:
+        print("No matching programs.")
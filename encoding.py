@@ -0,0 +1,111 @@
+"""Encoding of the college/program name columns, shared by preprocess.py, train_model.py and predict.py.
+
+Three encodings are supported:
+  onehot - dense one-hot columns concatenated onto the frame (the original behaviour)
+  sparse - the one-hot block is kept as a scipy CSR matrix saved next to the CSV
+  codes  - one int32 category-code column per name column
+
+The encoding of a saved frame is recognised from its columns, so the later stages
+need no extra configuration.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_COLUMNS = ['college_name', 'academic_program_name']
+ENCODING_MODES = ['onehot', 'sparse', 'codes']
+SPARSE_MATRIX_FILENAME = 'encoded_categoricals.npz'
+CODE_SUFFIX = '_code'
+
+# scikit-learn's sparse tree splitter rejects NaN, so missing dense features (e.g. weighted_moving_avg
+# in a college's first year) are given this value, far below any standardized feature, instead.
+SPARSE_MISSING_VALUE = -1e6
+
+def code_columns():
+    """Names of the category-code columns used by the 'codes' encoding."""
+    return [name + CODE_SUFFIX for name in CATEGORICAL_COLUMNS]
+
+def onehot_columns(encoder):
+    """Names of the one-hot columns produced by the fitted encoder."""
+    return list(encoder.get_feature_names_out(CATEGORICAL_COLUMNS))
+
+def detect_encoding(columns):
+    """Returns the encoding ('onehot', 'sparse' or 'codes') of a frame with the given columns."""
+    columns = set(columns)
+    if set(code_columns()) <= columns:
+        return 'codes'
+    if any(column.startswith(f"{name}_") for column in columns for name in CATEGORICAL_COLUMNS):
+        return 'onehot'
+    return 'sparse'
+
+def encode(data, encoder, mode):
+    """Replaces the name columns of data with their encoding.
+
+    Returns (data, sparse_block); sparse_block is the CSR one-hot matrix for the 'sparse'
+    encoding and None otherwise.
+    """
+    sparse_block = None
+    if mode == 'onehot':
+        encoded_data = encoder.transform(data[CATEGORICAL_COLUMNS]).toarray()
+        encoded_df = pd.DataFrame(encoded_data, columns=onehot_columns(encoder), index=data.index)
+        data = pd.concat([data, encoded_df], axis=1)
+    elif mode == 'sparse':
+        sparse_block = encoder.transform(data[CATEGORICAL_COLUMNS]).tocsr()
+    elif mode == 'codes':
+        data = data.copy()
+        for name, categories in zip(CATEGORICAL_COLUMNS, encoder.categories_):
+            data[name + CODE_SUFFIX] = pd.Categorical(data[name], categories=categories).codes.astype(np.int32)
+    else:
+        raise ValueError(f"Unknown encoding '{mode}'; expected one of {ENCODING_MODES}")
+    return data.drop(CATEGORICAL_COLUMNS, axis=1), sparse_block
+
+def category_codes(data, encoder, sparse_block=None):
+    """Returns a frame with one int32 category-code column per name column for an encoded frame."""
+    mode = detect_encoding(data.columns)
+    if mode == 'codes':
+        return data[code_columns()]
+
+    if mode == 'onehot':
+        import scipy.sparse as sp
+        block = sp.csr_matrix(data[onehot_columns(encoder)].to_numpy())
+    else:
+        block = sparse_block
+    codes = {}
+    offset = 0
+    for name, categories in zip(CATEGORICAL_COLUMNS, encoder.categories_):
+        width = len(categories)
+        part = block[:, offset:offset + width]
+        column_codes = np.asarray(part.argmax(axis=1)).ravel().astype(np.int32)
+        column_codes[np.asarray(part.sum(axis=1)).ravel() == 0] = -1  # Unknown category
+        codes[name + CODE_SUFFIX] = column_codes
+        offset += width
+    return pd.DataFrame(codes, index=data.index)
+
+def decode_codes(codes, encoder):
+    """Maps a frame of category codes back to an (n, 2) array of college and program names."""
+    columns = []
+    for name, categories in zip(CATEGORICAL_COLUMNS, encoder.categories_):
+        names = np.append(np.asarray(categories, dtype=object), None)  # Code -1 maps to None
+        columns.append(names[codes[name + CODE_SUFFIX].to_numpy()])
+    return np.column_stack(columns)
+
+def design_matrix(data, feature_columns, sparse_block=None):
+    """Assembles the model input from an encoded frame.
+
+    For the 'sparse' encoding this is a CSR matrix of the dense feature columns (with missing
+    values replaced by SPARSE_MISSING_VALUE) followed by the one-hot block; otherwise it is
+    simply data[feature_columns].
+    """
+    if sparse_block is None:
+        return data[feature_columns]
+    import scipy.sparse as sp
+    dense_values = np.nan_to_num(data[feature_columns].to_numpy(dtype=np.float64), nan=SPARSE_MISSING_VALUE)
+    dense = sp.csr_matrix(dense_values)
+    return sp.hstack([dense, sparse_block], format='csr')
+
+def save_sparse_block(sparse_block, filename=SPARSE_MATRIX_FILENAME):
+    import scipy.sparse as sp
+    sp.save_npz(filename, sparse_block)
+
+def load_sparse_block(filename=SPARSE_MATRIX_FILENAME):
+    import scipy.sparse as sp
+    return sp.load_npz(filename).tocsr()
@@ -1,13 +1,31 @@
-import pandas as pd
+import argparse
 
-# Load the preprocessed data
-data = pd.read_csv('preprocessed_data.csv')
+import artifacts
+import instrumentation
 
-# Feature engineering
-# Rank difference between opening and closing rank for each round
-data['rank_diff'] = data['closing_rank'] - data['opening_rank']
+def engineer_features(data):
+    """Adds the derived features to a preprocessed frame and returns it."""
+    # Feature engineering
+    # Rank difference between opening and closing rank for each round
+    return data.assign(rank_diff=data['closing_rank'] - data['opening_rank'])
 
-# Save the feature engineered data
-data.to_csv('feature_engineered_data.csv', index=False)
+def main():
+    # Load the preprocessed data
+    data = artifacts.load_frame('preprocessed_data')
 
-print("Feature engineering complete. Feature engineered data saved to feature_engineered_data.csv")
+    with instrumentation.stage('feature_engineering.engineer_features') as metrics:
+        data = engineer_features(data)
+        metrics.count('rows', len(data))
+
+    # Save the feature engineered data
+    output_path = artifacts.save_frame('feature_engineered_data', data)
+
+    print(f"Feature engineering complete. Feature engineered data saved to {output_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Add the derived features to preprocessed_data.')
+    instrumentation.add_arguments(parser)
+    instrumentation.configure_from_args(parser.parse_args())
+
+    with instrumentation.stage('feature_engineering'):
+        main()
@@ -0,0 +1,282 @@
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import artifacts
+import catalog
+import instrumentation
+
+# --- Configuration ---
+DB_FILENAME = "josaa.db"
+OUTPUT_ARTIFACT = "historical_data"
+LEGACY_QUERY_PATH = Path(__file__).with_name("query.sql")
+
+# Category slice the features are computed for (mirrors the WHERE clauses in query.sql)
+GENDER = 'Gender-Neutral'
+SEAT_TYPE = 'OPEN'
+QUOTAS = ['AI', 'OS']
+EXCLUDED_COLLEGE_PATTERN = 'Indian Institute of Technology'
+
+GROUP_KEYS = ['college_id', 'academic_program_name_id']
+
+# Category columns that split the data into partitions for compute_partition_features()
+PARTITION_COLUMNS = ['seat_type', 'quota', 'gender']
+PARTITION_ID = 'partition_id'
+
+# Output columns, in the order query.sql produces them
+FEATURE_COLUMNS = [
+    'year', 'round', 'opening_rank', 'closing_rank', 'prev_year_closing_rank',
+    'delta_closing_rank_1yr', 'delta_closing_rank_2yr_avg', 'is_final_round',
+    'round_relative_rank_diff', 'closing_rank_percent_change_from_round1',
+    'mean_closing_rank_last_2yrs', 'weighted_moving_avg', 'college_name', 'academic_program_name'
+]
+
+LOAD_RANKINGS_SQL = """
+SELECT id, college_id, academic_program_name_id, quota, seat_type, gender,
+       opening_rank, closing_rank, year, round
+FROM rankings
+ORDER BY id
+"""
+LOAD_CHUNK_SIZE = 500000
+
+def _name_categorical(ids, conn, table):
+    """Maps dimension-table ids to a Categorical of names with lexicographically sorted categories."""
+    names = pd.read_sql_query(f"SELECT id, name FROM {table} ORDER BY name", conn)
+    codes = pd.Series(np.arange(len(names)), index=names['id']).reindex(ids).fillna(-1).to_numpy(dtype=np.int32)
+    return pd.Categorical.from_codes(codes, categories=names['name'])
+
+def load_rankings(conn):
+    """Reads every ranking row in one sequential scan, with college and program names attached.
+
+    Rows are read in chunks and the text columns are kept as categoricals, so memory stays
+    proportional to the numeric columns even at many times the current data size.
+    """
+    chunks = []
+    for chunk in pd.read_sql_query(LOAD_RANKINGS_SQL, conn, chunksize=LOAD_CHUNK_SIZE):
+        for column in ('quota', 'seat_type', 'gender'):
+            chunk[column] = chunk[column].astype('category')
+        chunks.append(chunk)
+    if not chunks:
+        chunks.append(pd.read_sql_query(LOAD_RANKINGS_SQL, conn))
+    for column in ('quota', 'seat_type', 'gender'):
+        combined = union_categoricals([chunk[column] for chunk in chunks])
+        for chunk in chunks:
+            chunk[column] = pd.Categorical(chunk[column], categories=combined.categories)
+    rankings = pd.concat(chunks, ignore_index=True)
+
+    rankings['college_name'] = _name_categorical(rankings['college_id'], conn, 'colleges')
+    rankings['academic_program_name'] = _name_categorical(rankings['academic_program_name_id'], conn, 'academic_program_name')
+    return rankings
+
+def run_legacy_query(conn):
+    """Runs query.sql and returns its result as a DataFrame (used for verification and benchmarks)."""
+    return pd.read_sql_query(LEGACY_QUERY_PATH.read_text(), conn)
+
+def _lookup(frame, table, keys):
+    """Looks up table (a Series indexed by keys) for every row of frame, returning a NumPy array."""
+    index = pd.MultiIndex.from_frame(frame[keys])
+    return table.reindex(index).to_numpy(dtype=float)
+
+def compute_features(rankings):
+    """Computes the query.sql feature set from the rows returned by load_rankings().
+
+    Every feature is derived from a handful of grouped aggregates over the whole table,
+    which are then joined back onto the output rows, instead of running correlated
+    subqueries per row. The result matches query.sql row for row, including its quirks:
+    is_final_round and the round-over-round features look at rows of every category,
+    taking the first row (by id) when a (college, program, year, round) has several.
+    """
+    rankings = rankings.sort_values('id', kind='stable')
+
+    # Rows of the category slice; the yearly aggregates only ever look at these.
+    in_slice = (
+        (rankings['gender'] == GENDER)
+        & (rankings['seat_type'] == SEAT_TYPE)
+        & rankings['quota'].isin(QUOTAS)
+    )
+    sliced = rankings[in_slice]
+
+    # Output rows: the slice minus IITs (LIKE is case-insensitive; a NULL name never matches).
+    is_excluded = sliced['college_name'].str.contains(EXCLUDED_COLLEGE_PATTERN, case=False, regex=False)
+    base = sliced[is_excluded.eq(False)]
+    # query.sql groups by these columns, which collapses exact duplicates.
+    base = base.drop_duplicates(['year', 'round', 'opening_rank', 'closing_rank', 'college_name', 'academic_program_name'])
+
+    features = _derive_features(rankings, sliced, base, GROUP_KEYS)
+    features = features.sort_values(['college_name', 'academic_program_name', 'year', 'round'], kind='stable')
+    return features.reset_index(drop=True)[FEATURE_COLUMNS]
+
+def compute_partition_features(rankings):
+    """Computes the feature set for every (seat type, quota, gender) partition in one pass.
+
+    Unlike compute_features() nothing is filtered out (IITs included), and every aggregate,
+    including the round-over-round lookups, stays within the row's own partition. The result
+    has the FEATURE_COLUMNS plus the PARTITION_COLUMNS; rows with a missing category are dropped.
+    """
+    rankings = rankings.sort_values('id', kind='stable')
+    partition_ids = rankings.groupby(PARTITION_COLUMNS, observed=True, sort=False).ngroup().to_numpy()
+    has_partition = partition_ids >= 0  # Rows with a missing category get no group
+    rankings = rankings[has_partition].assign(**{PARTITION_ID: partition_ids[has_partition].astype(np.int64)})
+
+    group_keys = [PARTITION_ID] + GROUP_KEYS
+    base = rankings.drop_duplicates([PARTITION_ID, 'year', 'round', 'opening_rank', 'closing_rank', 'college_name', 'academic_program_name'])
+
+    features = _derive_features(rankings, rankings, base, group_keys)
+    for column in PARTITION_COLUMNS:
+        features[column] = base[column].astype(object).to_numpy()
+    features = features.sort_values(PARTITION_COLUMNS + ['college_name', 'academic_program_name', 'year', 'round'], kind='stable')
+    return features.reset_index(drop=True)[FEATURE_COLUMNS + PARTITION_COLUMNS]
+
+def _derive_features(rankings, sliced, base, group_keys):
+    """Builds the feature columns for the rows of `base`.
+
+    The yearly aggregates are taken over `sliced` and the round-level lookups over `rankings`,
+    both grouped by `group_keys` (a college/program, optionally within a partition).
+    """
+    year_keys = group_keys + ['year']
+    round_keys = group_keys + ['year', 'round']
+    closing_rank = base['closing_rank'].to_numpy(dtype=float)
+    round_num = base['round'].to_numpy()
+
+    # Per-year aggregates of the slice, keyed by (college, program, year)
+    yearly = sliced.groupby(year_keys, sort=True)['closing_rank']
+    yearly_max = yearly.max()
+    yearly_avg = yearly.mean()
+
+    shifted = {}
+    for years_back in (1, 2):
+        keys = base[year_keys].copy()
+        keys['year'] = keys['year'] - years_back
+        shifted[years_back] = keys
+    prev_year_max = _lookup(shifted[1], yearly_max, year_keys)
+    two_years_back_max = _lookup(shifted[2], yearly_max, year_keys)
+    prev_year_avg = _lookup(shifted[1], yearly_avg, year_keys)
+    two_years_back_avg = _lookup(shifted[2], yearly_avg, year_keys)
+    current_year_avg = _lookup(base, yearly_avg, year_keys)
+
+    # Position of each year among the years a college/program has data for (ROW_NUMBER in query.sql)
+    year_rank = yearly_avg.groupby(level=group_keys, sort=False).cumcount() + 1
+    current_year_rank = _lookup(base, year_rank, year_keys)
+
+    # Round-level lookups over `rankings`: first row by id, and the last round of each year
+    first_in_round = rankings.drop_duplicates(round_keys, keep='first').set_index(round_keys)['closing_rank']
+    final_round = rankings.groupby(year_keys, sort=False)['round'].max()
+
+    prev_round_keys = base[round_keys].copy()
+    prev_round_keys['round'] = prev_round_keys['round'] - 1
+    prev_round_closing = _lookup(prev_round_keys, first_in_round, round_keys)
+
+    round1_keys = base[round_keys].copy()
+    round1_keys['round'] = 1
+    round1_closing = _lookup(round1_keys, first_in_round, round_keys)
+
+    features = pd.DataFrame({
+        'year': base['year'].to_numpy(),
+        'round': base['round'].to_numpy(),
+        'opening_rank': base['opening_rank'].to_numpy(dtype=float),
+        'closing_rank': closing_rank,
+    })
+    features['prev_year_closing_rank'] = prev_year_max
+    features['delta_closing_rank_1yr'] = closing_rank - prev_year_max
+    features['delta_closing_rank_2yr_avg'] = closing_rank - (
+        np.nan_to_num(prev_year_max) + np.nan_to_num(two_years_back_max)) / 2.0
+    features['is_final_round'] = (round_num == _lookup(base, final_round, year_keys)).astype(int)
+    features['round_relative_rank_diff'] = closing_rank - prev_round_closing
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent_change = (closing_rank - round1_closing) * 100.0 / round1_closing
+    percent_change[round1_closing == 0] = np.nan  # SQLite yields NULL on division by zero
+    features['closing_rank_percent_change_from_round1'] = np.where(round_num == 1, 0.0, percent_change)
+
+    # AVG over the (up to two) yearly averages that exist for this year and the previous one
+    features['mean_closing_rank_last_2yrs'] = np.where(
+        np.isnan(prev_year_avg), current_year_avg,
+        np.where(np.isnan(current_year_avg), prev_year_avg, (current_year_avg + prev_year_avg) / 2))
+
+    features['weighted_moving_avg'] = np.select(
+        [current_year_rank == 1, current_year_rank == 2],
+        [np.nan, prev_year_avg],
+        0.6 * prev_year_avg + 0.4 * two_years_back_avg)
+
+    features['college_name'] = base['college_name'].astype(object).to_numpy()
+    features['academic_program_name'] = base['academic_program_name'].astype(object).to_numpy()
+    return features
+
+def frames_match(left, right):
+    """Returns True if two feature frames hold the same rows, ignoring row order among ties."""
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    order = FEATURE_COLUMNS
+    left = left.sort_values(order, kind='stable').reset_index(drop=True)
+    right = right.sort_values(order, kind='stable').reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(left, right, check_dtype=False, rtol=1e-9)
+    except AssertionError:
+        return False
+    return True
+
+def _load_rankings_instrumented(conn):
+    with instrumentation.stage('features.load_rankings') as metrics:
+        rankings = load_rankings(conn)
+        metrics.count('rows', len(rankings))
+    return rankings
+
+def main(db_path, check=False, partitioned=False):
+    """Extracts features from the database and saves them as the historical_data artifact.
+
+    With partitioned=True the features of every (seat type, quota, gender) partition are saved
+    as a partitioned historical_data artifact instead.
+    """
+    conn = sqlite3.connect(db_path)
+
+    if partitioned:
+        start = time.perf_counter()
+        rankings = _load_rankings_instrumented(conn)
+        with instrumentation.stage('features.compute_partition_features') as metrics:
+            features = compute_partition_features(rankings)
+            metrics.count('rows', len(features))
+        elapsed = time.perf_counter() - start
+        conn.close()
+        index = artifacts.save_partitions(OUTPUT_ARTIFACT, features, PARTITION_COLUMNS)
+        print(f"Computed features for {len(features)} rows in {len(index)} partitions in {elapsed:.3f}s.")
+        print(f"Feature extraction complete. Partitioned historical data saved to {OUTPUT_ARTIFACT}{artifacts.PARTITIONS_SUFFIX}/")
+        return
+
+    start = time.perf_counter()
+    rankings = _load_rankings_instrumented(conn)
+    with instrumentation.stage('features.compute_features') as metrics:
+        features = compute_features(rankings)
+        metrics.count('rows', len(features))
+    elapsed = time.perf_counter() - start
+    print(f"Computed features for {len(features)} rows in {elapsed:.3f}s.")
+
+    if check:
+        start = time.perf_counter()
+        with instrumentation.stage('features.query_sql') as metrics:
+            legacy = run_legacy_query(conn)
+            metrics.count('rows', len(legacy))
+        legacy_elapsed = time.perf_counter() - start
+        status = "identical to" if frames_match(features, legacy) else "DIFFERENT from"
+        print(f"Output is {status} query.sql ({legacy_elapsed:.3f}s).")
+
+    conn.close()
+    output_path = artifacts.save_frame(OUTPUT_ARTIFACT, features)
+    catalog.save_catalog(OUTPUT_ARTIFACT, features, output_path)
+    print(f"Feature extraction complete. Historical data saved to {output_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Extract the historical feature set (query.sql) in a single pass.')
+    parser.add_argument('--db', default=DB_FILENAME, help='SQLite database built by build_db.py')
+    parser.add_argument('--check', action='store_true', help='Also run query.sql and verify the outputs are identical')
+    parser.add_argument('--partitioned', action='store_true', help='Compute features for every seat type/quota/gender partition, IITs included')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    with instrumentation.stage('features'):
+        main(args.db, check=args.check, partitioned=args.partitioned)
@@ -0,0 +1,165 @@
+"""Per-stage timers, row counters and memory snapshots, written as JSON lines.
+
+Wrap a hot path in a stage and one record is appended to the metrics file when it ends:
+    with instrumentation.stage('build_db.insert', file=name) as metrics:
+        ...
+        metrics.count('rows', len(rows))
+A record holds the stage name, the script that ran it, a run id shared by every stage of one
+process, wall and CPU seconds, RSS before/after and the process peak, the counters and any extra
+fields. Stages may nest; each one is recorded on its own. Records go to metrics.jsonl in the
+current directory, or to JOSAA_METRICS (or --metrics): a path, '-' for stderr or 'off'.
+
+Profiling is off unless JOSAA_PROFILE (or --profile) lists some of:
+  cprofile    - profile every outermost stage into profiles/<stage>-<run id>.prof
+                (python -m pstats profiles/<file> to browse it)
+  tracemalloc - add the stage's peak traced Python allocation (tracemalloc_peak_mib)
+The settings are environment variables so that worker processes inherit them.
+"""
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+METRICS_ENV = 'JOSAA_METRICS'
+PROFILE_ENV = 'JOSAA_PROFILE'
+DEFAULT_METRICS_PATH = 'metrics.jsonl'
+PROFILE_DIR = Path('profiles')
+PROFILERS = ['cprofile', 'tracemalloc']
+
+RUN_ID = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+_active = []  # Open stages, outermost first
+
+def configure(metrics=None, profile=None):
+    """Overrides JOSAA_METRICS and/or JOSAA_PROFILE for this process and the processes it starts."""
+    if metrics is not None:
+        os.environ[METRICS_ENV] = metrics
+    if profile is not None:
+        os.environ[PROFILE_ENV] = ','.join(profile)
+    profilers()  # Fail early on unknown names
+
+def add_arguments(parser):
+    """Adds the --metrics and --profile flags to a script's argument parser."""
+    parser.add_argument('--metrics', default=None, metavar='PATH',
+                        help=f"JSON-lines file the stage metrics are appended to (default: ${METRICS_ENV} or "
+                             f"{DEFAULT_METRICS_PATH}; '-' for stderr, 'off' to disable)")
+    parser.add_argument('--profile', default=None, type=lambda value: [name for name in value.split(',') if name],
+                        metavar='|'.join(PROFILERS), help=f"Comma-separated profilers to enable (default: ${PROFILE_ENV})")
+
+def configure_from_args(args):
+    configure(args.metrics, args.profile)
+
+def profilers():
+    """The profilers enabled through JOSAA_PROFILE."""
+    names = {name.strip().lower() for name in os.environ.get(PROFILE_ENV, '').split(',') if name.strip()}
+    unknown = names - set(PROFILERS)
+    if unknown:
+        raise ValueError(f"Unknown profiler(s) {', '.join(sorted(unknown))} in {PROFILE_ENV}; expected some of {', '.join(PROFILERS)}")
+    return names
+
+def memory_mib():
+    """Returns (current RSS, peak RSS) of this process in MiB; current RSS is None where unavailable."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    try:
+        with open('/proc/self/statm') as statm:
+            current = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        current = None
+    return current, peak
+
+def emit(record):
+    """Appends one JSON record to the metrics destination."""
+    destination = os.environ.get(METRICS_ENV, DEFAULT_METRICS_PATH)
+    if destination.lower() == 'off':
+        return
+    line = json.dumps(record, default=str) + '\n'
+    if destination == '-':
+        sys.stderr.write(line)
+    else:
+        with open(destination, 'a', encoding='utf-8') as file:
+            file.write(line)  # One write per record, so concurrent worker processes do not interleave
+
+class Stage:
+    """Context manager measuring one stage; see stage()."""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.counters = Counter()
+        self.tracemalloc_peak = None  # Bytes, set on exit when tracemalloc profiling is on
+        self._profiler = None
+        self._tracemalloc_peak = 0
+
+    def count(self, counter, amount=1):
+        """Adds amount to one of the stage's counters (rows, files, ...)."""
+        self.counters[counter] += amount
+
+    def set(self, **fields):
+        """Adds extra fields to the stage's record."""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        enabled = profilers()
+        if 'tracemalloc' in enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # The peak is global: hand what the enclosing stages have seen so far to them before resetting it
+            peak = tracemalloc.get_traced_memory()[1]
+            for outer in _active:
+                outer._tracemalloc_peak = max(outer._tracemalloc_peak, peak)
+            tracemalloc.reset_peak()
+        if 'cprofile' in enabled and not _active:
+            self._profiler = cProfile.Profile()
+        _active.append(self)
+        self._rss_before = memory_mib()[0]
+        self._cpu_start = time.process_time()
+        self._start = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self._profiler is not None:
+            self._profiler.disable()
+        seconds = time.perf_counter() - self._start
+        cpu_seconds = time.process_time() - self._cpu_start
+        rss, peak_rss = memory_mib()
+        _active.remove(self)
+
+        record = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'run': RUN_ID,
+            'script': Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else None,
+            'stage': self.name,
+            'status': 'ok' if exc_type is None else f"error: {exc_type.__name__}",
+            'seconds': round(seconds, 6),
+            'cpu_seconds': round(cpu_seconds, 6),
+            'rss_mib': rss,
+            'rss_delta_mib': rss - self._rss_before if rss is not None and self._rss_before is not None else None,
+            'peak_rss_mib': peak_rss,
+            'counters': dict(self.counters),
+        }
+        if tracemalloc.is_tracing() and 'tracemalloc' in profilers():
+            peak = max(self._tracemalloc_peak, tracemalloc.get_traced_memory()[1])
+            for outer in _active:
+                outer._tracemalloc_peak = max(outer._tracemalloc_peak, peak)
+            self.tracemalloc_peak = peak
+            record['tracemalloc_peak_mib'] = peak / 2**20
+        if self._profiler is not None:
+            PROFILE_DIR.mkdir(exist_ok=True)
+            profile_path = PROFILE_DIR / f"{self.name}-{RUN_ID}.prof"
+            self._profiler.dump_stats(profile_path)
+            record['profile'] = str(profile_path)
+        record.update(self.fields)
+        emit(record)
+        return False
+
+def stage(name, **fields):
+    """Returns a context manager that records one stage; fields are added to its record."""
+    return Stage(name, dict(fields))
@@ -0,0 +1,111 @@
+"""Per-partition models for every (seat type, quota, gender) category.
+
+`python features.py --partitioned` computes the features of all partitions in one scan and saves
+them as the partitioned historical_data artifact (historical_data.partitions/). This script then
+  train   - preprocesses, engineers and trains every partition in a process pool; partition
+            <slug> gets its encoder, scaler and model in partition_models/<slug>/ and its
+            feature engineered rows in feature_engineered_data.partitions/<slug>
+  predict - loads only the partitions matching --seat_type/--quota/--gender and writes their
+            combined prediction report
+"""
+import argparse
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import artifacts
+import feature_engineering
+import features
+import flat_forest
+import instrumentation
+import predict
+import preprocess
+import train_model
+
+PARTITION_MODEL_DIR = Path('partition_models')
+METRICS_FILENAME = 'metrics.json'
+REPORT_FILENAME = artifacts.PARTITION_REPORT_FILENAME
+
+# The one-hot and codes encodings keep everything a partition needs in its frames; the sparse
+# encoding's separate matrix is not partitioned.
+PARTITION_ENCODINGS = ['onehot', 'codes']
+
+def train_partition(slug, encoding_mode='onehot', test_year=train_model.TEST_YEAR):
+    """Trains the model of one partition and saves its artifacts. Returns a summary dict."""
+    historical = artifacts.load_frame(artifacts.partition_name(features.OUTPUT_ARTIFACT, slug))
+    years = historical['year'].astype(int)
+    summary = {'partition': slug, 'rows': len(historical)}
+    if not (years == test_year).any() or not (years < test_year).any():
+        return {**summary, 'status': f"skipped: needs rows in {test_year} and before"}
+
+    with instrumentation.stage('partitions.train_partition', partition=slug) as stage_metrics:
+        data, _, encoder, scaler = preprocess.preprocess(historical, encoding_mode)
+        engineered = feature_engineering.engineer_features(data)
+        model, metrics = train_model.train(engineered, test_year=test_year, n_jobs=1)
+        stage_metrics.count('rows', len(historical))
+
+    model_dir = PARTITION_MODEL_DIR / slug
+    model_dir.mkdir(parents=True, exist_ok=True)
+    pickle.dump(encoder, open(model_dir / 'encoder.pkl', 'wb'))
+    pickle.dump(scaler, open(model_dir / 'scaler.pkl', 'wb'))
+    pickle.dump(model, open(model_dir / 'josaa_model.pkl', 'wb'))
+    flat_forest.export_forest(model, flat_forest.forest_path(model_dir / 'josaa_model.pkl'))
+    (model_dir / METRICS_FILENAME).write_text(json.dumps(metrics))
+    artifacts.save_frame(artifacts.partition_name('feature_engineered_data', slug), engineered)
+    return {**summary, 'status': 'trained', **metrics}
+
+def train_all(encoding_mode='onehot', test_year=train_model.TEST_YEAR, workers=None, **key_values):
+    """Trains every partition matching key_values, one partition per worker process."""
+    slugs = artifacts.select_partitions(features.OUTPUT_ARTIFACT, **key_values)
+    print(f"Training {len(slugs)} partitions on {workers or os.cpu_count()} processes ({encoding_mode} encoding)")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        summaries = list(pool.map(train_partition, slugs, [encoding_mode] * len(slugs), [test_year] * len(slugs)))
+    summary = pd.DataFrame(summaries)
+    print(summary.to_string(index=False))
+    return summary
+
+def predict_partitions(**key_values):
+    """Predicts for the trained partitions matching key_values, loading only those. Returns the report."""
+    index = artifacts.partition_index(features.OUTPUT_ARTIFACT)
+    reports = []
+    for slug in artifacts.select_partitions(features.OUTPUT_ARTIFACT, **key_values):
+        model_dir = PARTITION_MODEL_DIR / slug
+        if not model_dir.exists():
+            continue
+        with instrumentation.stage('partitions.predict_partition', partition=slug) as metrics:
+            model, scaler, encoder = predict.load_model_artifacts(model_dir)
+            data = predict.load_prediction_data(model, artifacts.partition_name('feature_engineered_data', slug))
+            report = predict.predict(data, model, scaler, encoder)
+            metrics.count('rows', len(report))
+        reports.append(report.assign(**index[slug]['keys']))
+    if not reports:
+        raise ValueError(f"No trained partition matches {key_values}; run `python partitions.py train` first")
+    report = pd.concat(reports, ignore_index=True)
+    return report.sort_values('predicted_closing_rank', kind='stable').reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train and query per-partition (seat type, quota, gender) models.')
+    parser.add_argument('command', choices=['train', 'predict'])
+    parser.add_argument('--seat_type', help='Only partitions with this seat type (e.g. OBC-NCL)')
+    parser.add_argument('--quota', help='Only partitions with this quota (e.g. OS)')
+    parser.add_argument('--gender', help='Only partitions with this gender (e.g. Female-only (including Supernumerary))')
+    parser.add_argument('--encoding', choices=PARTITION_ENCODINGS, default='onehot', help='Encoding used to preprocess each partition')
+    parser.add_argument('--test_year', type=int, default=train_model.TEST_YEAR, help='Year held out for evaluation')
+    parser.add_argument('--workers', type=int, default=None, help='Training processes (default: CPU count)')
+    parser.add_argument('--output', default=REPORT_FILENAME, help='Report written by predict')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    key_values = {'seat_type': args.seat_type, 'quota': args.quota, 'gender': args.gender}
+    with instrumentation.stage(f"partitions.{args.command}", **key_values):
+        if args.command == 'train':
+            train_all(args.encoding, args.test_year, args.workers, **key_values)
+        else:
+            report = predict_partitions(**key_values)
+            report.to_csv(args.output, index=False)
+            print(f"\nPrediction report for {report[features.PARTITION_COLUMNS].drop_duplicates().shape[0]} partitions saved to {args.output}")
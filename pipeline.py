@@ -0,0 +1,183 @@
+"""Runs the full refresh in one process: build_db -> features -> preprocess -> feature_engineering
+-> train_model -> predict, handing DataFrames and fitted objects between the stages in memory.
+
+Every stage after build_db caches its output in .pipeline_cache/, keyed by a hash of the stage's
+source code, its parameters and the cache keys of its inputs (build_db contributes a hash of the
+ingested_files manifest). A stage whose key is already cached is skipped, and its output is only
+read back from disk if a later stage actually needs it.
+
+The final products are written where the individual scripts put them: encoder.pkl, scaler.pkl,
+josaa_model.pkl and its flattened josaa_model.forest/, and prediction_report.csv (plus the
+intermediate artifacts with --save_artifacts).
+"""
+import argparse
+import hashlib
+import json
+import pickle
+import shutil
+import sqlite3
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import artifacts
+import build_db
+import catalog
+import encoding
+import feature_engineering
+import features
+import flat_forest
+import instrumentation
+import predict
+import preprocess
+import train_model
+
+CACHE_DIR = Path('.pipeline_cache')
+SOURCE_DIR = Path(__file__).resolve().parent
+
+# inputs name the upstream stages whose outputs are passed to run(*outputs, **params);
+# sources are the files whose contents are part of the cache key.
+Stage = namedtuple('Stage', ['name', 'run', 'inputs', 'sources'])
+
+def _features_stage(db_fingerprint, db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return artifacts.apply_dtypes('historical_data', features.compute_features(features.load_rankings(conn)))
+    finally:
+        conn.close()
+
+def _preprocess_stage(historical, encoding_mode):
+    data, sparse_block, encoder, scaler = preprocess.preprocess(historical, encoding_mode)
+    return artifacts.apply_dtypes('preprocessed_data', data), sparse_block, encoder, scaler
+
+def _feature_engineering_stage(preprocessed):
+    data, sparse_block, _, _ = preprocessed
+    return artifacts.apply_dtypes('feature_engineered_data', feature_engineering.engineer_features(data))
+
+def _train_stage(preprocessed, engineered):
+    return train_model.train(engineered, sparse_block=preprocessed[1])
+
+def _predict_stage(preprocessed, engineered, trained):
+    _, sparse_block, encoder, scaler = preprocessed
+    model, _ = trained
+    return predict.predict(engineered, model, scaler, encoder, sparse_block=sparse_block)
+
+STAGES = [
+    Stage('features', _features_stage, ['build_db'], ['features.py', 'artifacts.py']),
+    Stage('preprocess', _preprocess_stage, ['features'], ['preprocess.py', 'encoding.py', 'scaling.py', 'artifacts.py']),
+    Stage('feature_engineering', _feature_engineering_stage, ['preprocess'], ['feature_engineering.py', 'artifacts.py']),
+    Stage('train_model', _train_stage, ['preprocess', 'feature_engineering'], ['train_model.py', 'encoding.py', 'flat_forest.py']),
+    Stage('predict', _predict_stage, ['preprocess', 'feature_engineering', 'train_model'], ['predict.py', 'encoding.py', 'scaling.py', 'flat_forest.py']),
+]
+
+def _source_digest(filenames):
+    digest = hashlib.sha256()
+    for filename in filenames:
+        digest.update((SOURCE_DIR / filename).read_bytes())
+    return digest.hexdigest()
+
+def _cache_key(stage, params, input_keys):
+    payload = json.dumps({
+        'stage': stage.name,
+        'source': _source_digest(['pipeline.py'] + stage.sources),
+        'params': params,
+        'inputs': input_keys,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def _db_fingerprint(db_path):
+    """Hash of the ingested_files manifest, i.e. of every source file the database was built from."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT path, year, round, sha256 FROM {build_db.MANIFEST_TABLE_NAME} ORDER BY path").fetchall()
+    finally:
+        conn.close()
+    digest = hashlib.sha256(json.dumps(rows).encode())
+    digest.update(build_db.SCHEMA_PATH.read_bytes())
+    return digest.hexdigest()[:16]
+
+def _report(name, status, seconds):
+    current, peak = instrumentation.memory_mib()
+    current_text = f"{current:8.1f} MiB" if current is not None else "       n/a"
+    print(f"[pipeline] {name:<20} {status:<7} {seconds:8.2f}s  rss {current_text}  peak {peak:8.1f} MiB")
+
+def run_pipeline(base_dir='.', bulk=False, encoding_mode='onehot', use_cache=True, save_artifacts=False):
+    """Runs every stage and returns a dict of stage name -> output for the stages that were run or loaded."""
+    base_dir = Path(base_dir)
+    db_path = base_dir / build_db.DB_FILENAME
+    params = {
+        'features': {'db_path': str(db_path)},
+        'preprocess': {'encoding_mode': encoding_mode},
+    }
+
+    start = time.perf_counter()
+    with instrumentation.stage('pipeline.build_db'):
+        build_db.main(str(base_dir), bulk=bulk)
+    keys = {'build_db': _db_fingerprint(db_path)}
+    loaders = {'build_db': lambda: keys['build_db']}
+    _report('build_db', 'ran', time.perf_counter() - start)
+
+    outputs = {}
+    def value(name):
+        if name not in outputs:
+            outputs[name] = loaders[name]()
+        return outputs[name]
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    for stage in STAGES:
+        stage_params = params.get(stage.name, {})
+        key = _cache_key(stage, stage_params, [keys[name] for name in stage.inputs])
+        keys[stage.name] = key
+        cache_path = CACHE_DIR / f"{stage.name}-{key}.pkl"
+
+        start = time.perf_counter()
+        if use_cache and cache_path.exists():
+            loaders[stage.name] = lambda path=cache_path: pickle.load(open(path, 'rb'))
+            _report(stage.name, 'cached', time.perf_counter() - start)
+            continue
+
+        inputs = [value(name) for name in stage.inputs]  # Reading cached inputs is not part of the stage
+        with instrumentation.stage(f"pipeline.{stage.name}", cache_key=key):
+            outputs[stage.name] = stage.run(*inputs, **stage_params)
+            if use_cache:
+                pickle.dump(outputs[stage.name], open(cache_path, 'wb'), protocol=pickle.HIGHEST_PROTOCOL)
+        _report(stage.name, 'ran', time.perf_counter() - start)
+
+    # Write the final products where the individual scripts put them
+    _, sparse_block, encoder, scaler = value('preprocess')
+    model, _ = value('train_model')
+    pickle.dump(encoder, open('encoder.pkl', 'wb'))
+    pickle.dump(scaler, open('scaler.pkl', 'wb'))
+    pickle.dump(model, open('josaa_model.pkl', 'wb'))
+    flat_forest.export_forest(model, flat_forest.forest_path('josaa_model.pkl'))
+    value('predict').to_csv('prediction_report.csv', index=False)
+    print("Saved encoder.pkl, scaler.pkl, josaa_model.pkl, josaa_model.forest and prediction_report.csv")
+
+    if save_artifacts:
+        historical_path = artifacts.save_frame('historical_data', value('features'))
+        catalog.save_catalog('historical_data', value('features'), historical_path)
+        artifacts.save_frame('preprocessed_data', value('preprocess')[0])
+        artifacts.save_frame('feature_engineered_data', value('feature_engineering'))
+        if sparse_block is not None:
+            encoding.save_sparse_block(sparse_block)
+        print("Saved the historical_data, preprocessed_data and feature_engineered_data artifacts")
+
+    return outputs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the whole JoSAA pipeline in one process with stage caching.')
+    parser.add_argument('--base_dir', default='.', help='Directory containing the year folders and josaa.db')
+    parser.add_argument('--bulk', action='store_true', help='Use the parallel bulk loader in build_db')
+    parser.add_argument('--encoding', choices=encoding.ENCODING_MODES, default='onehot', help='Encoding used by preprocess')
+    parser.add_argument('--no_cache', action='store_true', help='Run every stage and do not read or write the stage cache')
+    parser.add_argument('--clear_cache', action='store_true', help='Delete the stage cache before running')
+    parser.add_argument('--save_artifacts', action='store_true', help='Also write the intermediate artifacts to disk')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    if args.clear_cache and CACHE_DIR.exists():
+        shutil.rmtree(CACHE_DIR)
+    with instrumentation.stage('pipeline'):
+        run_pipeline(args.base_dir, bulk=args.bulk, encoding_mode=args.encoding,
+                     use_cache=not args.no_cache, save_artifacts=args.save_artifacts)
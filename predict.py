@@ -1,124 +1,215 @@
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-import numpy as np
+import argparse
+import os
 import pickle
-from sklearn.preprocessing import StandardScaler
-
-# Load the feature engineered data
-data = pd.read_csv('feature_engineered_data.csv')
-
-# Convert the 'year' column to integer type
-data['year'] = data['year'].astype(int)
-
-# Load the trained model from file
-filename_model = 'josaa_model.pkl'
-model = pickle.load(open(filename_model, 'rb'))
-
-# Load the scaler from file
-filename_scaler = 'scaler.pkl'
-scaler = pickle.load(open(filename_scaler, 'rb'))
-
-# Load the OneHotEncoder from file (ensure this was saved during preprocessing)
-filename_encoder = 'encoder.pkl'
-encoder = pickle.load(open(filename_encoder, 'rb'))
-
-# Identify one-hot encoded college and branch columns
-college_branch_cols = [col for col in data.columns if col.startswith('college_name_') or col.startswith('academic_program_name_')]
-
-# Group by college and branch and get the last row
-last_rows = data.groupby(college_branch_cols, as_index=False).last()
-
-# Create data for 2025, round 6
-year = 2025
-round_num = 6
-
-# Create a new dataframe for 2025 round 6 predictions based on the last known data
-data_2025 = last_rows.copy()
-data_2025['year'] = year
-data_2025['round'] = round_num
-
-# The 'closing_rank' column in data_2025 at this point is the SCALED closing rank
-# from the last historical record for each college/branch combination.
-# We'll save it to inverse_transform later for comparison.
-historical_scaled_closing_rank = data_2025['closing_rank'].copy()
-
-
-# Get the column names from the training data
-X_train_columns = model.feature_names_in_
-
-# Prepare the feature matrix X_2025 for prediction.
-# data_2025 contains all columns, including the historical 'closing_rank'.
-# X_train_columns contains the feature names the model was trained on (and does not include 'closing_rank').
-# Selecting columns from data_2025 using X_train_columns ensures:
-#   1. Only the required features are selected.
-#   2. The historical 'closing_rank' from data_2025 is excluded.
-#   3. The columns are in the correct order as expected by the model.
-X_2025 = data_2025[X_train_columns]
-
-y_pred_2025_scaled = model.predict(X_2025)
-
-# Create a dummy dataframe to inverse transform the scaled predictions
-numerical_cols = ['opening_rank', 'closing_rank', 'prev_year_closing_rank', 'delta_closing_rank_1yr', 'delta_closing_rank_2yr_avg', 'round_relative_rank_diff', 'closing_rank_percent_change_from_round1', 'mean_closing_rank_last_2yrs', 'weighted_moving_avg']
-dummy_df = pd.DataFrame(np.zeros((len(y_pred_2025_scaled), len(numerical_cols))), columns=numerical_cols)
-
-# The model predicts 'closing_rank'. So, place the scaled predictions in the 'closing_rank' column.
-dummy_df['closing_rank'] = y_pred_2025_scaled
-
-# Inverse transform the scaled predictions
-# 'closing_rank' is the second column (index 1) in numerical_cols as defined in preprocess.py
-try:
-    closing_rank_col_index = numerical_cols.index('closing_rank')
-except ValueError:
-    # This should not happen if preprocess.py and predict.py are consistent
-    print("Error: 'closing_rank' not found in numerical_cols. Defaulting to index 1.")
-    closing_rank_col_index = 1
-y_pred_2025 = scaler.inverse_transform(dummy_df)[:, closing_rank_col_index]
-
-# Inverse transform the historical scaled closing ranks
-dummy_df_historical = pd.DataFrame(np.zeros((len(historical_scaled_closing_rank), len(numerical_cols))), columns=numerical_cols)
-dummy_df_historical['closing_rank'] = historical_scaled_closing_rank.values
-historical_unscaled_final_rank = scaler.inverse_transform(dummy_df_historical)[:, closing_rank_col_index]
-
-# Print the predicted closing ranks for 2025
-print("Predicted closing ranks for 2025:")
-
-# Inverse transform one-hot encoded college and branch names
-ohe_columns_for_decode = data_2025[college_branch_cols]
-actual_names_array = encoder.inverse_transform(ohe_columns_for_decode)
-
-# Create a DataFrame for more readable results
-output_df = pd.DataFrame({
-    'college_name': actual_names_array[:, 0],
-    'academic_program_name': actual_names_array[:, 1],
-    'year': data_2025['year'].values,
-    'round': data_2025['round'].values,
-    'historical_final_closing_rank': historical_unscaled_final_rank,
-    'predicted_closing_rank': y_pred_2025
-})
-
-# Ensure ranks are integers for display if appropriate, or round them
-output_df['historical_final_closing_rank'] = output_df['historical_final_closing_rank'].round().astype(int)
-output_df['predicted_closing_rank'] = output_df['predicted_closing_rank'].round().astype(int)
-
-# Sort the DataFrame by predicted closing rank in ascending order
-output_df_sorted = output_df.sort_values(by='predicted_closing_rank', ascending=True)
-
-# Save the sorted DataFrame to a CSV file
-csv_report_filename = "prediction_report.csv"
-output_df_sorted.to_csv(csv_report_filename, index=False)
-
-print(f"\nSorted prediction report saved to {csv_report_filename}")
-
-# The previous text report code is now replaced by CSV saving.
-# If you still want the text report, you can uncomment the lines below
-# and adjust the `report_string` to use `output_df_sorted.to_string()` if needed.
-# pd.set_option('display.max_rows', 100)
-# pd.set_option('display.max_columns', None)
-# pd.set_option('display.width', 1000)
-# pd.set_option('display.max_colwidth', None)
-# report_string = output_df_sorted.to_string() # Or output_df.to_string() if you want unsorted for text
-# report_filename_txt = "prediction_report.txt"
-# with open(report_filename_txt, "w") as f:
-#     f.write("Predicted Closing Ranks for 2025:\n\n") # Removed "First 50 Entries"
-#     f.write(report_string)
-# print(f"Text report saved to {report_filename_txt}")
+
+import instrumentation
+
+# Year and round the report predicts
+PREDICTION_YEAR = 2025
+PREDICTION_ROUND = 6
+# Per-tree prediction quantiles reported around each prediction (None reports the point estimate only)
+PREDICTION_INTERVAL = (0.1, 0.9)
+
+def load_model(filename_model='josaa_model.pkl', flat=False):
+    """Loads the trained model.
+
+    By default this is the pickled forest, whose compiled trees score large batches several times
+    faster per row than the flat walker. With flat=True the flattened forest train_model.py exports
+    next to the pickle is memory-mapped instead; it loads in milliseconds rather than a second and
+    predicts identically, which suits cold starts and small batches. It is skipped if it is older
+    than the pickle (e.g. a stale export next to a model retrained elsewhere).
+    """
+    import flat_forest
+
+    forest_path = flat_forest.forest_path(filename_model)
+    if flat and forest_path.exists() and (not os.path.exists(filename_model) or forest_path.stat().st_mtime >= os.path.getmtime(filename_model)):
+        return flat_forest.load_forest(forest_path)
+    return pickle.load(open(filename_model, 'rb'))
+
+def load_model_artifacts(model_dir='.', flat=False):
+    """Loads the trained model, the scaler and the OneHotEncoder saved by train_model.py and preprocess.py
+    (or, for one partition, by partitions.py into model_dir). `flat` is passed on to load_model()."""
+    # Load the trained model from file
+    with instrumentation.stage('predict.load_model', model_dir=str(model_dir), flat=flat):
+        model = load_model(os.path.join(model_dir, 'josaa_model.pkl'), flat)
+
+    # Load the scaler from file
+    filename_scaler = os.path.join(model_dir, 'scaler.pkl')
+    scaler = pickle.load(open(filename_scaler, 'rb'))
+
+    # Load the OneHotEncoder from file (ensure this was saved during preprocessing)
+    filename_encoder = os.path.join(model_dir, 'encoder.pkl')
+    encoder = pickle.load(open(filename_encoder, 'rb'))
+    return model, scaler, encoder
+
+def load_prediction_data(model, name='feature_engineered_data'):
+    """Loads the feature engineered data (artifact `name`) needed to score `model`."""
+    import artifacts
+
+    # Load the feature engineered data. Only the columns the model was trained on (plus the target)
+    # are read; a model trained on a sparse matrix records no column names, so it gets everything.
+    if hasattr(model, 'feature_names_in_'):
+        data = artifacts.load_frame(name, columns=list(model.feature_names_in_) + ['closing_rank'])
+    else:
+        data = artifacts.load_frame(name)
+    return data
+
+def interval_columns(quantiles):
+    """Report columns of the per-tree quantiles, e.g. predicted_closing_rank_p10."""
+    return [f"predicted_closing_rank_p{quantile * 100:g}" for quantile in quantiles]
+
+def predict(data, model, scaler, encoder, sparse_block=None, year=PREDICTION_YEAR, round_num=PREDICTION_ROUND, interval=PREDICTION_INTERVAL):
+    """Predicts the closing rank of every college/branch for (year, round_num) from its latest historical row.
+
+    With `interval`, a tuple of quantiles, the report also carries those quantiles of the forest's
+    per-tree predictions and their standard deviation (models that are not tree forests get none).
+    Returns the report DataFrame sorted by predicted closing rank.
+    """
+    # Imported here rather than at module level, so that the CLI starts without pandas
+    import pandas as pd
+
+    import encoding
+    import flat_forest
+    import scaling
+
+    # Convert the 'year' column to integer type (without modifying the caller's frame)
+    data = data.assign(year=data['year'].astype(int))
+
+    # Identify the encoded college and branch columns. With the 'sparse' encoding the one-hot block
+    # lives in a separate matrix, so group by the category codes recovered from it instead.
+    encoding_mode = encoding.detect_encoding(data.columns)
+    if encoding_mode == 'onehot':
+        college_branch_cols = [col for col in data.columns if col.startswith('college_name_') or col.startswith('academic_program_name_')]
+    elif encoding_mode == 'codes':
+        college_branch_cols = encoding.code_columns()
+    else:
+        college_branch_cols = encoding.code_columns()
+        if sparse_block is None:
+            sparse_block = encoding.load_sparse_block()
+        data = pd.concat([data, encoding.category_codes(data, encoder, sparse_block)], axis=1)
+
+    # Group by college and branch and get the last row
+    last_rows = data.groupby(college_branch_cols, as_index=False).last()
+
+    # Create a new dataframe for the target year/round predictions based on the last known data
+    data_2025 = last_rows.copy()
+    data_2025['year'] = year
+    data_2025['round'] = round_num
+
+    # The 'closing_rank' column in data_2025 at this point is the SCALED closing rank
+    # from the last historical record for each college/branch combination.
+    # We'll save it to inverse_transform later for comparison.
+    historical_scaled_closing_rank = data_2025['closing_rank'].copy()
+
+
+    # Get the column names from the training data
+    # (a model trained on a sparse matrix has none; its dense columns are all but the target and codes)
+    X_train_columns = getattr(model, 'feature_names_in_', None)
+    if X_train_columns is None:
+        X_train_columns = [col for col in data.columns if col != 'closing_rank' and col not in college_branch_cols]
+
+    # Prepare the feature matrix X_2025 for prediction.
+    # data_2025 contains all columns, including the historical 'closing_rank'.
+    # X_train_columns contains the feature names the model was trained on (and does not include 'closing_rank').
+    # Selecting columns from data_2025 using X_train_columns ensures:
+    #   1. Only the required features are selected.
+    #   2. The historical 'closing_rank' from data_2025 is excluded.
+    #   3. The columns are in the correct order as expected by the model.
+    if encoding_mode == 'sparse':
+        names_2025 = pd.DataFrame(encoding.decode_codes(data_2025, encoder), columns=encoding.CATEGORICAL_COLUMNS)
+        X_2025 = encoding.design_matrix(data_2025, X_train_columns, encoder.transform(names_2025))
+    else:
+        X_2025 = data_2025[X_train_columns]
+
+    # The interval comes from the same per-tree predictions as the point estimate: every tree's
+    # prediction for a block of rows at once, reduced to the mean, quantiles and std per row
+    with_interval = interval is not None and flat_forest.supports_interval(model)
+    with instrumentation.stage('predict.model', interval=with_interval) as metrics:
+        if with_interval:
+            y_pred_2025_scaled, quantiles_scaled, std_scaled = flat_forest.predict_interval(model, X_2025, interval)
+        else:
+            y_pred_2025_scaled = model.predict(X_2025)
+        metrics.count('rows', X_2025.shape[0])
+
+    # Inverse transform the scaled predictions and the historical scaled closing ranks
+    # (only the target column is un-scaled, straight from the scaler's mean and scale)
+    y_pred_2025 = scaling.inverse_transform_target(scaler, y_pred_2025_scaled, copy=False)
+    historical_unscaled_final_rank = scaling.inverse_transform_target(scaler, historical_scaled_closing_rank.to_numpy())
+
+    # Print the predicted closing ranks for 2025
+    print(f"Predicted closing ranks for {year}:")
+
+    # Inverse transform the encoded college and branch names
+    if encoding_mode == 'onehot':
+        ohe_columns_for_decode = data_2025[college_branch_cols]
+        actual_names_array = encoder.inverse_transform(ohe_columns_for_decode)
+    else:
+        actual_names_array = encoding.decode_codes(data_2025, encoder)
+
+    # Create a DataFrame for more readable results
+    output_df = pd.DataFrame({
+        'college_name': actual_names_array[:, 0],
+        'academic_program_name': actual_names_array[:, 1],
+        'year': data_2025['year'].values,
+        'round': data_2025['round'].values,
+        'historical_final_closing_rank': historical_unscaled_final_rank,
+        'predicted_closing_rank': y_pred_2025
+    })
+
+    if with_interval:
+        # The scaling is monotonic, so quantiles of the scaled predictions map to quantiles in ranks
+        for column, values in zip(interval_columns(interval), quantiles_scaled):
+            output_df[column] = scaling.inverse_transform_target(scaler, values, copy=False)
+        output_df['predicted_closing_rank_std'] = scaling.inverse_transform_spread(scaler, std_scaled, copy=False)
+
+    # Ensure ranks are integers for display if appropriate, or round them
+    output_df['historical_final_closing_rank'] = output_df['historical_final_closing_rank'].round().astype(int)
+    output_df['predicted_closing_rank'] = output_df['predicted_closing_rank'].round().astype(int)
+    if with_interval:
+        for column in interval_columns(interval):
+            output_df[column] = output_df[column].round().astype(int)
+        output_df['predicted_closing_rank_std'] = output_df['predicted_closing_rank_std'].round(1)
+
+    # Sort the DataFrame by predicted closing rank in ascending order
+    output_df_sorted = output_df.sort_values(by='predicted_closing_rank', ascending=True)
+
+    return output_df_sorted
+
+def main(interval=PREDICTION_INTERVAL, flat=False):
+    model, scaler, encoder = load_model_artifacts(flat=flat)
+    output_df_sorted = predict(load_prediction_data(model), model, scaler, encoder, interval=interval)
+
+    # Save the sorted DataFrame to a CSV file
+    csv_report_filename = "prediction_report.csv"
+    output_df_sorted.to_csv(csv_report_filename, index=False)
+
+    print(f"\nSorted prediction report saved to {csv_report_filename}")
+
+    # The previous text report code is now replaced by CSV saving.
+    # If you still want the text report, you can uncomment the lines below
+    # and adjust the `report_string` to use `output_df_sorted.to_string()` if needed.
+    # pd.set_option('display.max_rows', 100)
+    # pd.set_option('display.max_columns', None)
+    # pd.set_option('display.width', 1000)
+    # pd.set_option('display.max_colwidth', None)
+    # report_string = output_df_sorted.to_string() # Or output_df.to_string() if you want unsorted for text
+    # report_filename_txt = "prediction_report.txt"
+    # with open(report_filename_txt, "w") as f:
+    #     f.write("Predicted Closing Ranks for 2025:\n\n") # Removed "First 50 Entries"
+    #     f.write(report_string)
+    # print(f"Text report saved to {report_filename_txt}")
+    return output_df_sorted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Predict the closing rank of every college/program.')
+    parser.add_argument('--interval', type=float, nargs=2, metavar=('LOW', 'HIGH'), default=PREDICTION_INTERVAL,
+                        help='Quantiles of the per-tree predictions to report (default: 0.1 0.9)')
+    parser.add_argument('--no_interval', action='store_true', help='Report the point estimate only')
+    parser.add_argument('--flat', action='store_true',
+                        help='Score with the memory-mapped josaa_model.forest/ export: much faster to load, slower per row')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    with instrumentation.stage('predict'):
+        main(None if args.no_interval else tuple(args.interval), args.flat)
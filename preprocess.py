@@ -1,46 +1,91 @@
-import pandas as pd
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.impute import SimpleImputer
+import argparse
+import os
+import tracemalloc
 import pickle
 
-# Load the data
-data = pd.read_csv('historical_data.csv')
+import artifacts
+import encoding
+import instrumentation
+import scaling
 
-# Handle missing values
-# Impute missing values in 'prev_year_closing_rank' with the mean closing rank for that college and branch
-data['prev_year_closing_rank'] = data['prev_year_closing_rank'].fillna(data.groupby(['college_name', 'academic_program_name'])['closing_rank'].transform('mean'))
+def preprocess(data, encoding_mode='onehot'):
+    """Imputes, encodes and scales historical data. Returns (data, sparse_block, encoder, scaler)."""
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
-# For 2020, impute with a global mean
-data['prev_year_closing_rank'] = data['prev_year_closing_rank'].fillna(data['closing_rank'].mean())
+    # Handle missing values
+    # Impute missing values in 'prev_year_closing_rank' with the mean closing rank for that college and branch
+    with instrumentation.stage('preprocess.impute') as metrics:
+        data = data.copy()
+        data['prev_year_closing_rank'] = data['prev_year_closing_rank'].fillna(data.groupby(['college_name', 'academic_program_name'], observed=True)['closing_rank'].transform('mean'))
 
-# One-hot encode 'college_name' and 'academic_program_name'
-encoder = OneHotEncoder(handle_unknown='ignore')
-encoder.fit(data[['college_name', 'academic_program_name']])
+        # For 2020, impute with a global mean
+        data['prev_year_closing_rank'] = data['prev_year_closing_rank'].fillna(data['closing_rank'].mean())
+        metrics.count('rows', len(data))
 
-filename_encoder = 'encoder.pkl'
-pickle.dump(encoder, open(filename_encoder, 'wb'))
-print(f"Encoder saved to {filename_encoder}")
+    # Encode 'college_name' and 'academic_program_name' (the encoder is fitted as one-hot in every mode,
+    # its categories also define the category codes and the sparse column layout)
+    with instrumentation.stage('preprocess.encode', encoding=encoding_mode) as metrics:
+        encoder = OneHotEncoder(handle_unknown='ignore')
+        encoder.fit(data[['college_name', 'academic_program_name']])
 
-encoded_data = encoder.transform(data[['college_name', 'academic_program_name']]).toarray()
-encoded_df = pd.DataFrame(encoded_data, columns=encoder.get_feature_names_out(['college_name', 'academic_program_name']))
+        # Replace the original categorical columns with their encoding
+        data, sparse_block = encoding.encode(data, encoder, encoding_mode)
+        metrics.count('rows', len(data))
+        metrics.count('columns', len(data.columns) + (sparse_block.shape[1] if sparse_block is not None else 0))
 
-# Concatenate encoded features with the original data
-data = pd.concat([data, encoded_df], axis=1)
+    # Scale the numerical features, excluding 'year', 'round', and 'is_final_round'
+    with instrumentation.stage('preprocess.scale') as metrics:
+        numerical_cols = scaling.NUMERICAL_COLUMNS
+        scaler = StandardScaler()
+        data = data.astype({col: 'float64' for col in numerical_cols})  # Ranks are stored as int32
+        data[numerical_cols] = scaler.fit_transform(data[numerical_cols])
+        metrics.count('rows', len(data))
+    return data, sparse_block, encoder, scaler
 
-# Remove original categorical columns
-data = data.drop(['college_name', 'academic_program_name'], axis=1)
+def main(encoding_mode='onehot'):
+    # Load the data
+    data = artifacts.load_frame('historical_data')
 
-# Scale the numerical features, excluding 'year', 'round', and 'is_final_round'
-numerical_cols = ['opening_rank', 'closing_rank', 'prev_year_closing_rank', 'delta_closing_rank_1yr', 'delta_closing_rank_2yr_avg', 'round_relative_rank_diff', 'closing_rank_percent_change_from_round1', 'mean_closing_rank_last_2yrs', 'weighted_moving_avg']
-scaler = StandardScaler()
-data[numerical_cols] = scaler.fit_transform(data[numerical_cols])
+    data, sparse_block, encoder, scaler = preprocess(data, encoding_mode)
 
-# Save the preprocessed data
-data.to_csv('preprocessed_data.csv', index=False)
+    filename_encoder = 'encoder.pkl'
+    pickle.dump(encoder, open(filename_encoder, 'wb'))
+    print(f"Encoder saved to {filename_encoder}")
 
-# Save the scaler to a file
-filename = 'scaler.pkl'
-pickle.dump(scaler, open(filename, 'wb'))
-print(f"Scaler saved to {filename}")
+    # Save the preprocessed data
+    output_files = [artifacts.save_frame('preprocessed_data', data)]
+    if sparse_block is not None:
+        encoding.save_sparse_block(sparse_block)
+        output_files.append(encoding.SPARSE_MATRIX_FILENAME)
 
-print("Data preprocessing complete. Preprocessed data saved to preprocessed_data.csv")
+    # Save the scaler to a file
+    filename = 'scaler.pkl'
+    pickle.dump(scaler, open(filename, 'wb'))
+    print(f"Scaler saved to {filename}")
+
+    print(f"Data preprocessing complete ({encoding_mode} encoding). Preprocessed data saved to {', '.join(map(str, output_files))}")
+    return output_files
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Impute, encode and scale historical_data.csv.')
+    parser.add_argument('--encoding', choices=encoding.ENCODING_MODES, default='onehot',
+                        help='How to encode college and program names: dense one-hot columns (default), '
+                             'a sparse one-hot matrix, or integer category codes')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    # preprocess() imports scikit-learn lazily; import it before tracing starts, so that the
+    # reported peak covers the data and not the library's import-time allocations
+    import sklearn.preprocessing  # noqa: F401
+    tracemalloc.start()
+    with instrumentation.stage('preprocess') as metrics:
+        output_files = main(args.encoding)
+    # With tracemalloc profiling on, the stages reset the traced peak; the outer stage keeps the overall one
+    peak_bytes = metrics.tracemalloc_peak or tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    output_bytes = artifacts.artifact_size('preprocessed_data')
+    if encoding.SPARSE_MATRIX_FILENAME in output_files:
+        output_bytes += os.path.getsize(encoding.SPARSE_MATRIX_FILENAME)
+    print(f"Peak traced memory: {peak_bytes / 2**20:.1f} MiB; output size: {output_bytes / 2**20:.1f} MiB")
@@ -0,0 +1,131 @@
+"""Forecasts the remaining rounds of a live counselling year from its early-round results.
+
+fit      - precomputes, for every (seat type, quota, gender, college, program), the median ratio
+           of each round's closing rank to round 1's over the historical years; ratio - 1 is
+           closing_rank_percent_change_from_round1 / 100. Saved as the round_progression artifact.
+forecast - reads only the target year's rows from the database and scales each program's latest
+           observed closing rank by ratio(target round) / ratio(observed round). Programs or
+           rounds without history fall back to the partition's, then the overall, median ratio.
+
+When a new round file lands, re-ingest it and refresh the forecast without retraining:
+    python round_forecast.py fit --year 2025
+    python round_forecast.py forecast --year 2025 --ingest .
+"""
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+import build_db
+import features
+import instrumentation
+
+PROGRESSION_ARTIFACT = 'round_progression'
+REPORT_FILENAME = 'round_forecast_report.csv'
+KEYS = features.PARTITION_COLUMNS + ['college_name', 'academic_program_name']
+
+LOAD_ROUNDS_SQL = f"""
+SELECT id, institute AS college_name, academic_program_name, quota, seat_type, gender, closing_rank, year, round
+FROM {build_db.LEGACY_VIEW_NAME}
+WHERE year {{condition}} ?
+"""
+
+def load_rounds(conn, year, condition='='):
+    """Reads the round results of `year` (or, with condition '<', of every earlier year)."""
+    rows = pd.read_sql_query(LOAD_ROUNDS_SQL.format(condition=condition), conn, params=(year,))
+    rows = rows.dropna(subset=KEYS + ['closing_rank'])
+    rows = rows[rows['closing_rank'] > 0]
+    # Several rows per (program, year, round) are possible; like features.py, take the first by id
+    return rows.sort_values('id', kind='stable').drop_duplicates(KEYS + ['year', 'round'], keep='first')
+
+def fit_progression(history):
+    """Returns the median closing-rank ratio of every round to round 1, per program, over the years."""
+    round1 = history.loc[history['round'] == 1, KEYS + ['year', 'closing_rank']].rename(columns={'closing_rank': 'round1_closing_rank'})
+    merged = history.merge(round1, on=KEYS + ['year'])
+    merged = merged[merged['round1_closing_rank'] > 0]
+    merged['ratio'] = merged['closing_rank'] / merged['round1_closing_rank']
+    return (merged.groupby(KEYS + ['round'], sort=True)['ratio']
+            .agg(ratio='median', years='size')
+            .reset_index())
+
+def _ratios(frame, progression, round_column):
+    """Progression ratio of every row of frame at the round in frame[round_column], with fallbacks."""
+    keys = frame[KEYS].assign(round=frame[round_column].to_numpy())
+    partition_ratio = progression.groupby(features.PARTITION_COLUMNS + ['round'])['ratio'].median().rename('partition_ratio')
+    overall_ratio = progression.groupby('round')['ratio'].median()
+
+    ratio = keys.merge(progression[KEYS + ['round', 'ratio']], on=KEYS + ['round'], how='left')['ratio']
+    ratio = ratio.fillna(keys.merge(partition_ratio.reset_index(), on=features.PARTITION_COLUMNS + ['round'], how='left')['partition_ratio'])
+    ratio = ratio.fillna(keys['round'].map(overall_ratio).reset_index(drop=True))
+    ratio = ratio.to_numpy(dtype=np.float64)
+    ratio[keys['round'].to_numpy() == 1] = 1.0
+    return ratio
+
+def forecast(current, progression, last_round=None):
+    """Forecasts every round after each program's latest observed round of `current` (one year's rows)."""
+    last_round = last_round or int(progression['round'].max())
+    latest = current.sort_values('round', kind='stable').drop_duplicates(KEYS, keep='last')
+    latest = latest[KEYS + ['year', 'round', 'closing_rank']].rename(columns={'round': 'observed_round', 'closing_rank': 'observed_closing_rank'})
+
+    targets = latest.merge(pd.DataFrame({'round': np.arange(1, last_round + 1)}), how='cross')
+    targets = targets[targets['round'] > targets['observed_round']].reset_index(drop=True)
+    observed_ratio = _ratios(targets, progression, 'observed_round')
+    target_ratio = _ratios(targets, progression, 'round')
+    targets['predicted_closing_rank'] = np.round(targets['observed_closing_rank'].to_numpy() * target_ratio / observed_ratio)
+    targets = targets.dropna(subset=['predicted_closing_rank']).astype({'predicted_closing_rank': 'int64', 'observed_closing_rank': 'int64'})
+    return targets.sort_values(KEYS + ['round'], kind='stable').reset_index(drop=True)
+
+def main_fit(db_path, year):
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    with instrumentation.stage('round_forecast.fit_progression', year=year) as metrics:
+        history = load_rounds(conn, year, condition='<')
+        progression = fit_progression(history)
+        metrics.count('rows', len(history))
+    conn.close()
+    output_path = artifacts.save_frame(PROGRESSION_ARTIFACT, progression)
+    print(f"Fitted round progression for {len(progression)} (program, round) pairs from the years before {year} "
+          f"in {time.perf_counter() - start:.2f}s. Saved to {output_path}")
+
+def main_forecast(db_path, year, ingest_dir=None, last_round=None, output=REPORT_FILENAME):
+    if ingest_dir is not None:
+        build_db.main(ingest_dir, stream=True)  # Writes <ingest_dir>/josaa.db
+
+    start = time.perf_counter()
+    progression = artifacts.load_frame(PROGRESSION_ARTIFACT)
+    conn = sqlite3.connect(db_path)
+    current = load_rounds(conn, year)
+    conn.close()
+    if current.empty:
+        print(f"No round results for {year} in {db_path} yet.")
+        return
+    with instrumentation.stage('round_forecast.forecast', year=year) as metrics:
+        report = forecast(current, progression, last_round)
+        metrics.count('rows', len(current))
+        metrics.count('forecasts', len(report))
+    report.to_csv(output, index=False)
+    print(f"Forecast {len(report)} (program, round) closing ranks for {year} from rounds up to "
+          f"{int(current['round'].max())} in {time.perf_counter() - start:.2f}s. Saved to {output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Forecast the later rounds of a counselling year from its early rounds.')
+    parser.add_argument('command', choices=['fit', 'forecast'])
+    parser.add_argument('--year', type=int, required=True, help='Year being forecast (fit uses every earlier year)')
+    parser.add_argument('--db', default=None, help='SQLite database built by build_db.py (default: josaa.db in --ingest or the current directory)')
+    parser.add_argument('--ingest', default=None, metavar='BASE_DIR', help='Stream new round files from BASE_DIR into the database first')
+    parser.add_argument('--last_round', type=int, default=None, help='Last round to forecast (default: the last historical round)')
+    parser.add_argument('--output', default=REPORT_FILENAME, help='Forecast report written by forecast')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    db_path = args.db or str(Path(args.ingest or '.') / build_db.DB_FILENAME)
+    with instrumentation.stage(f"round_forecast.{args.command}"):
+        if args.command == 'fit':
+            main_fit(db_path, args.year)
+        else:
+            main_forecast(db_path, args.year, args.ingest, args.last_round, args.output)
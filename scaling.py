@@ -0,0 +1,51 @@
+"""Scaling of the numerical columns, shared by preprocess.py and predict.py.
+
+preprocess.py fits one StandardScaler over NUMERICAL_COLUMNS. The model predicts the scaled
+target, so predict.py only ever needs the target column back in ranks; inverse_transform_target()
+does that from the scaler's stored mean and scale instead of inverting the whole matrix.
+"""
+import numpy as np
+
+# Scaled by preprocess.py, in the order the scaler was fitted on ('year', 'round' and
+# 'is_final_round' are left unscaled)
+NUMERICAL_COLUMNS = ['opening_rank', 'closing_rank', 'prev_year_closing_rank', 'delta_closing_rank_1yr', 'delta_closing_rank_2yr_avg', 'round_relative_rank_diff', 'closing_rank_percent_change_from_round1', 'mean_closing_rank_last_2yrs', 'weighted_moving_avg']
+TARGET_COLUMN = 'closing_rank'
+
+def _column_params(scaler, column):
+    """Returns (mean, scale) of one column of a fitted StandardScaler."""
+    names = getattr(scaler, 'feature_names_in_', None)
+    position = list(names).index(column) if names is not None else NUMERICAL_COLUMNS.index(column)
+    # with_mean=False still stores mean_ (as a statistic) but does not subtract it
+    mean = scaler.mean_[position] if scaler.with_mean and scaler.mean_ is not None else 0.0
+    scale = scaler.scale_[position] if scaler.scale_ is not None else 1.0
+    return mean, scale
+
+def inverse_transform_target(scaler, values, column=TARGET_COLUMN, copy=True):
+    """Maps scaled values of one column back to its original units.
+
+    With copy=False a float64 NumPy array is transformed in place (other inputs are still
+    converted); the result is returned either way.
+    """
+    mean, scale = _column_params(scaler, column)
+    values = np.array(values, dtype=np.float64) if copy else np.asarray(values, dtype=np.float64)
+    values *= scale
+    values += mean
+    return values
+
+def transform_target(scaler, values, column=TARGET_COLUMN, copy=True):
+    """Scales values of one column the way the fitted scaler does; inverse of inverse_transform_target()."""
+    mean, scale = _column_params(scaler, column)
+    values = np.array(values, dtype=np.float64) if copy else np.asarray(values, dtype=np.float64)
+    values -= mean
+    values /= scale
+    return values
+
+def inverse_transform_spread(scaler, values, column=TARGET_COLUMN, copy=True):
+    """Maps a spread (e.g. a standard deviation) of scaled values back to the column's units.
+
+    Only the scale applies; the mean cancels out of differences.
+    """
+    _, scale = _column_params(scaler, column)
+    values = np.array(values, dtype=np.float64) if copy else np.asarray(values, dtype=np.float64)
+    values *= abs(scale)
+    return values
@@ -1,12 +1,73 @@
-CREATE TABLE IF NOT EXISTS josaa_rankings (
+-- Dimension tables: every institute and program name is stored once and
+-- referenced by an interned integer id from the rankings fact table.
+CREATE TABLE IF NOT EXISTS colleges (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS academic_program_name (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+-- One row per (institute, program, quota, seat type, gender, year, round).
+-- Ranks are REAL because the scraped files contain values such as "1014892.0".
+CREATE TABLE IF NOT EXISTS rankings (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    institute TEXT,
-    academic_program_name TEXT,
+    college_id INTEGER NOT NULL REFERENCES colleges(id),
+    academic_program_name_id INTEGER NOT NULL REFERENCES academic_program_name(id),
     quota TEXT,
     seat_type TEXT,
     gender TEXT,
-    opening_rank INTEGER,
-    closing_rank INTEGER,
+    opening_rank REAL,
+    closing_rank REAL,
     year INTEGER,
-    round INTEGER 
-);
\ No newline at end of file
+    round INTEGER
+);
+
+-- Serves the per-(college, program, year, round) lookups in query.sql.
+CREATE INDEX IF NOT EXISTS idx_rankings_college_program_year_round
+    ON rankings (college_id, academic_program_name_id, year, round);
+
+-- Serves the category filters (gender, seat type, quota) in query.sql.
+CREATE INDEX IF NOT EXISTS idx_rankings_gender_seat_type_quota
+    ON rankings (gender, seat_type, quota);
+
+-- Flat view with the column layout of the original josaa_rankings table.
+CREATE VIEW IF NOT EXISTS josaa_rankings AS
+SELECT
+    r.id,
+    c.name AS institute,
+    apn.name AS academic_program_name,
+    r.quota,
+    r.seat_type,
+    r.gender,
+    r.opening_rank,
+    r.closing_rank,
+    r.year,
+    r.round
+FROM rankings r
+JOIN colleges c ON r.college_id = c.id
+JOIN academic_program_name apn ON r.academic_program_name_id = apn.id;
+
+-- One row per ingested source file; used by build_db.py to skip unchanged files.
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    year INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    ingested_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Rows rejected by the streaming loader (build_db.py --stream), with the reason and the raw line.
+CREATE TABLE IF NOT EXISTS ingest_rejects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    byte_offset INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    raw TEXT,
+    rejected_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_rejects_path ON ingest_rejects (path);
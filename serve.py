@@ -0,0 +1,181 @@
+"""Long-lived prediction server that keeps the model, scaler and encoder resident.
+
+At startup the artifacts are loaded once and predict.predict() scores the latest historical row
+of every college/program. Queries are then answered from that table without touching the disk:
+  GET /predict?college=<name>&program=<name>    - prediction for one college/program
+  GET /window?min_rank=<r>&max_rank=<r>[&limit=<n>] - programs whose predicted closing rank
+                                                   lies in [min_rank, max_rank], by rank
+  GET /health                                   - number of programs served
+Responses are JSON; each prediction carries predict.py's interval columns (the p10/p90 per-tree
+quantiles and their std). POST /reload re-reads the artifacts after a retrain; if that fails, it
+answers 500 and the previous predictions keep being served.
+
+Run from the repository root after train_model.py (or pipeline.py):
+    python serve.py --port 8765
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+import instrumentation
+import predict
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_WINDOW_LIMIT = 100
+
+class PredictionIndex:
+    """Predicted closing ranks of every college/program, indexed for point and rank-window lookups."""
+
+    def __init__(self, report):
+        report = report.sort_values('predicted_closing_rank', kind='stable').reset_index(drop=True)
+        self.records = report.to_dict('records')
+        self.by_key = {(record['college_name'], record['academic_program_name']): record for record in self.records}
+        self.closing_ranks = report['predicted_closing_rank'].to_numpy()
+
+    @classmethod
+    def load(cls):
+        """Loads the saved artifacts and precomputes the predictions for every college/program."""
+        with instrumentation.stage('serve.load') as metrics:
+            # The memory-mapped flat forest: a reload costs milliseconds, and the startup batch is small
+            model, scaler, encoder = predict.load_model_artifacts(flat=True)
+            index = cls(predict.predict(predict.load_prediction_data(model), model, scaler, encoder))
+            metrics.count('programs', len(index))
+        return index
+
+    def __len__(self):
+        return len(self.records)
+
+    def lookup(self, college, program):
+        """Returns the prediction for (college, program), or None if it is unknown."""
+        return self.by_key.get((college, program))
+
+    def rank_window(self, min_rank, max_rank, limit=None):
+        """Returns the predictions with min_rank <= predicted closing rank <= max_rank, by rank."""
+        start = np.searchsorted(self.closing_ranks, min_rank, side='left')
+        stop = np.searchsorted(self.closing_ranks, max_rank, side='right')
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return self.records[start:stop]
+
+class QueryError(Exception):
+    """A malformed or unanswerable query; carries the HTTP status to respond with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _int_param(params, name, default=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise QueryError(400, f"missing parameter '{name}'")
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise QueryError(400, f"parameter '{name}' must be an integer") from None
+
+def _str_param(params, name):
+    values = params.get(name)
+    if not values:
+        raise QueryError(400, f"missing parameter '{name}'")
+    return values[0]
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so clients can reuse their connection
+    # TCP_NODELAY: _send writes the headers and the body separately, and on a kept-alive
+    # connection Nagle's algorithm would hold the body back until the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        index = self.server.index
+        try:
+            if url.path == '/predict':
+                record = index.lookup(_str_param(params, 'college'), _str_param(params, 'program'))
+                if record is None:
+                    raise QueryError(404, 'unknown college/program')
+                self._send(200, record)
+            elif url.path == '/window':
+                min_rank = _int_param(params, 'min_rank')
+                max_rank = _int_param(params, 'max_rank')
+                limit = _int_param(params, 'limit', DEFAULT_WINDOW_LIMIT)
+                self._send(200, {'results': index.rank_window(min_rank, max_rank, limit)})
+            elif url.path == '/health':
+                self._send(200, {'programs': len(index)})
+            else:
+                raise QueryError(404, f"unknown path '{url.path}'")
+        except QueryError as error:
+            self._send(error.status, {'error': str(error)})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/reload':
+            self._send(404, {'error': f"unknown path '{self.path}'"})
+            return
+        start = time.perf_counter()
+        try:
+            self.server.reload()
+        except Exception as error:  # Missing or half-written artifacts, e.g. during a retrain
+            # The old index is still in place; PredictionServer.reload() only swaps on success
+            self.log_error("reload failed: %s: %s", type(error).__name__, error)
+            self._send(500, {'error': f"reload failed: {type(error).__name__}: {error}"})
+            return
+        self._send(200, {'programs': len(self.server.index), 'seconds': time.perf_counter() - start})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class PredictionServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering queries from a resident PredictionIndex."""
+    daemon_threads = True
+
+    def __init__(self, address, index, verbose=False):
+        super().__init__(address, PredictionHandler)
+        self.index = index
+        self.verbose = verbose
+        self._reload_lock = threading.Lock()
+
+    def reload(self):
+        # Build the new index off to the side; handlers keep using the old one until the swap
+        with self._reload_lock:
+            self.index = PredictionIndex.load()
+
+def main(host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    start = time.perf_counter()
+    index = PredictionIndex.load()
+    server = PredictionServer((host, port), index, verbose=verbose)
+    print(f"Loaded predictions for {len(index)} programs in {time.perf_counter() - start:.2f}s; "
+          f"serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve closing-rank predictions over HTTP with the model kept in memory.')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address to bind')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on (0 picks a free port)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    main(args.host, args.port, verbose=args.verbose)
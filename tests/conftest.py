@@ -0,0 +1,23 @@
+"""Shared fixtures: a few small synthetic years of round files, and the scripts on sys.path."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+os.environ['JOSAA_METRICS'] = 'off'  # The scripts' stage records would otherwise land in the working directory
+
+from benchmarks import synthetic_data  # noqa: E402
+
+FIXTURE_YEARS = (2022, 2024)  # Ends on train_model.TEST_YEAR, so the default train/evaluate split works
+FIXTURE_ROUNDS = 3
+
+
+@pytest.fixture(scope='session')
+def round_files_dir(tmp_path_factory):
+    """Three synthetic years of three rounds each (a dozen institutes), in the scraped layout."""
+    out_dir = tmp_path_factory.mktemp('rounds')
+    synthetic_data.generate(out_dir, FIXTURE_YEARS[0], FIXTURE_YEARS[1], FIXTURE_ROUNDS, scale=0.1, seed=1)
+    return out_dir
@@ -0,0 +1,26 @@
+"""Every artifact backend must give back exactly the frame that was saved."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import artifacts
+
+
+@pytest.mark.parametrize('fmt', artifacts.FORMATS)
+def test_float_frame_round_trips_exactly(fmt, tmp_path, monkeypatch):
+    if fmt in ('parquet', 'feather'):
+        pytest.importorskip('pyarrow')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(artifacts.ARTIFACT_FORMAT_ENV, fmt)
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(5000, 3)) * [1.0, 1e5, 1e-3]
+    values[rng.random(values.shape) < 0.02] = np.nan
+    frame = pd.DataFrame(values, columns=['closing_rank', 'prev_year_closing_rank', 'round_relative_rank_diff'])
+    frame['year'] = np.repeat(np.arange(2016, 2021), 1000).astype('int16')
+    frame['college_name_A'] = rng.integers(0, 2, size=5000).astype('uint8')
+
+    artifacts.save_frame('preprocessed_data', frame)
+    # copy(): the npy backend returns memory-mapped columns, which only differ in their array class
+    pd.testing.assert_frame_equal(artifacts.load_frame('preprocessed_data').copy(), frame, check_exact=True)
+    pd.testing.assert_frame_equal(artifacts.load_frame('preprocessed_data', columns=['year', 'closing_rank']).copy(),
+                                  frame[['closing_rank', 'year']], check_exact=True)
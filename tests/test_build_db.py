@@ -0,0 +1,147 @@
+"""Ingestion: the normalized schema and its view, the manifest, and streaming against row mode."""
+import shutil
+import sqlite3
+
+import build_db
+
+MALFORMED_LINES = "Broken Institute#Some Program#AI\nAnother Institute#Program#AI#OPEN#Gender-Neutral#abc#12\n"
+
+
+def ingest(base_dir, stream, name):
+    db_path = base_dir.parent / f"{name}.db"
+    build_db.create_db_and_table(db_path)
+    build_db.ingest(base_dir, db_path, stream=stream, chunk_size=100)
+    return db_path
+
+
+def table_rows(db_path, query):
+    conn = sqlite3.connect(db_path)
+    rows = sorted(conn.execute(query).fetchall(), key=repr)
+    conn.close()
+    return rows
+
+
+def rankings(db_path):
+    return table_rows(db_path, f"SELECT institute, academic_program_name, quota, seat_type, gender, opening_rank, "
+                               f"closing_rank, year, round FROM {build_db.LEGACY_VIEW_NAME}")
+
+
+def state(db_path):
+    """Everything an ingest writes: the rankings, the manifest and the quarantine."""
+    return (rankings(db_path),
+            table_rows(db_path, f"SELECT path, year, round, size, sha256 FROM {build_db.MANIFEST_TABLE_NAME}"),
+            table_rows(db_path, f"SELECT path, byte_offset, reason, raw FROM {build_db.QUARANTINE_TABLE_NAME}"))
+
+
+def copy_rounds(round_files_dir, tmp_path, malformed=True):
+    base_dir = tmp_path / 'rounds'
+    shutil.copytree(round_files_dir, base_dir)
+    if malformed:
+        with open(base_dir / '2022' / 'round2.psv', 'a', encoding='utf-8') as file:
+            file.write(MALFORMED_LINES)
+    return base_dir
+
+
+def test_stream_matches_row_mode(round_files_dir, tmp_path):
+    base_dir = copy_rounds(round_files_dir, tmp_path)
+    streamed = rankings(ingest(base_dir, stream=True, name='stream'))
+    assert len(streamed) > 0
+    assert streamed == rankings(ingest(base_dir, stream=False, name='rows'))
+
+
+def test_stream_rerun_is_idempotent(round_files_dir, tmp_path):
+    base_dir = copy_rounds(round_files_dir, tmp_path)
+    db_path = ingest(base_dir, stream=True, name='stream')
+    first = state(db_path)
+    assert [reason for _, _, reason, _ in first[2]] == ['too_few_columns', 'bad_rank']
+
+    build_db.ingest(base_dir, db_path, stream=True, chunk_size=100)
+    assert state(db_path) == first
+
+
+def test_stream_append_loads_only_new_lines(round_files_dir, tmp_path):
+    base_dir = copy_rounds(round_files_dir, tmp_path, malformed=False)
+    round_file = base_dir / '2023' / 'round3.psv'
+    full_text = round_file.read_text(encoding='utf-8')
+    lines = full_text.splitlines(keepends=True)
+    # The first half plus a partially written line, which must wait for the next run
+    round_file.write_text(''.join(lines[:len(lines) // 2]) + lines[len(lines) // 2].rstrip('\n'), encoding='utf-8')
+    db_path = ingest(base_dir, stream=True, name='stream')
+
+    round_file.write_text(full_text, encoding='utf-8')
+    build_db.ingest(base_dir, db_path, stream=True, chunk_size=100)
+    assert rankings(db_path) == rankings(ingest(base_dir, stream=False, name='rows'))
+
+
+def slice_rowids(db_path):
+    """(year, round) -> the rowids of that slice; a slice that was re-inserted gets new rowids."""
+    rows = table_rows(db_path, f"SELECT year, round, rowid FROM {build_db.TABLE_NAME}")
+    slices = {}
+    for year, round_num, rowid in rows:
+        slices.setdefault((year, round_num), set()).add(rowid)
+    return slices
+
+
+def test_rerun_skips_unchanged_files(round_files_dir, tmp_path):
+    base_dir = copy_rounds(round_files_dir, tmp_path, malformed=False)
+    db_path = ingest(base_dir, stream=False, name='rows')
+    before = slice_rowids(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert build_db.plan_incremental_load(conn, base_dir, list(build_db.find_round_files(base_dir))) == ([], [])
+    conn.close()
+    build_db.ingest(base_dir, db_path)
+    assert slice_rowids(db_path) == before
+
+
+def test_modified_file_replaces_only_its_slice(round_files_dir, tmp_path):
+    base_dir = copy_rounds(round_files_dir, tmp_path, malformed=False)
+    db_path = ingest(base_dir, stream=False, name='rows')
+    before = slice_rowids(db_path)
+
+    round_file = base_dir / '2023' / 'round2.psv'
+    lines = round_file.read_text(encoding='utf-8').splitlines(keepends=True)
+    round_file.write_text(''.join(lines[:len(lines) // 2]), encoding='utf-8')
+    (base_dir / '2024' / 'round3.psv').unlink()
+    build_db.ingest(base_dir, db_path)
+
+    after = slice_rowids(db_path)
+    assert (2024, 3) not in after
+    assert after[(2023, 2)].isdisjoint(before[(2023, 2)])
+    assert {key: rowids for key, rowids in after.items() if key != (2023, 2)} == \
+           {key: rowids for key, rowids in before.items() if key not in ((2023, 2), (2024, 3))}
+    assert rankings(db_path) == rankings(ingest(base_dir, stream=False, name='fresh'))
+
+
+def test_view_matches_parsed_rows(round_files_dir, tmp_path):
+    base_dir = copy_rounds(round_files_dir, tmp_path, malformed=False)
+    db_path = ingest(base_dir, stream=False, name='rows')
+    parsed = [row for csv_file_path, year, round_num in build_db.find_round_files(base_dir)
+              for row in build_db.parse_csv_file(csv_file_path, year, round_num)[0]]
+    assert rankings(db_path) == sorted(parsed, key=repr)
+
+    institutes = {row[0] for row in parsed}
+    programs = {row[1] for row in parsed}
+    assert table_rows(db_path, f"SELECT name FROM {build_db.COLLEGES_TABLE_NAME}") == sorted([(name,) for name in institutes], key=repr)
+    assert table_rows(db_path, f"SELECT name FROM {build_db.PROGRAMS_TABLE_NAME}") == sorted([(name,) for name in programs], key=repr)
+    assert {'idx_rankings_college_program_year_round', 'idx_rankings_gender_seat_type_quota'} <= \
+           {name for name, in table_rows(db_path, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_flat_table_is_migrated_to_view(round_files_dir, tmp_path):
+    base_dir = copy_rounds(round_files_dir, tmp_path, malformed=False)
+    db_path = ingest(base_dir, stream=False, name='rows')
+    expected = rankings(db_path)
+
+    # A database from before the normalized schema: a flat josaa_rankings table and a stale manifest
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"DROP VIEW {build_db.LEGACY_VIEW_NAME}")
+    conn.execute(f"CREATE TABLE {build_db.LEGACY_VIEW_NAME} AS SELECT * FROM {build_db.TABLE_NAME}")
+    conn.execute(f"DELETE FROM {build_db.TABLE_NAME}")
+    conn.commit()
+    conn.close()
+
+    build_db.create_db_and_table(db_path)
+    build_db.ingest(base_dir, db_path)
+    assert table_rows(db_path, f"SELECT type FROM sqlite_master WHERE name = '{build_db.LEGACY_VIEW_NAME}'") == [('view',)]
+    assert rankings(db_path) == expected
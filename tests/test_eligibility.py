@@ -0,0 +1,83 @@
+"""Eligibility queries on the sorted index must return what a plain pandas filter returns."""
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import artifacts
+import eligibility
+
+SEAT_TYPES = ['OPEN', 'OBC-NCL']
+QUOTAS = ['AI', 'HS', 'OS']
+GENDERS = ['Gender-Neutral', 'Female-only']
+ROUNDS = [1, 2, 3]
+COLUMNS = ['college_name', 'academic_program_name', 'closing_rank', 'seat_type', 'quota', 'gender', 'round']
+
+
+@pytest.fixture
+def report(tmp_path, monkeypatch):
+    """A partition prediction report with distinct closing ranks, so every result order is unambiguous."""
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    keys = list(itertools.product(SEAT_TYPES, QUOTAS, GENDERS, ROUNDS))
+    programs_per_key = 40
+    frame = pd.DataFrame(np.repeat(keys, programs_per_key, axis=0), columns=['seat_type', 'quota', 'gender', 'round'])
+    frame['round'] = frame['round'].astype(int)
+    frame['college_name'] = [f"Institute {i % 17}" for i in range(len(frame))]
+    frame['academic_program_name'] = [f"Program {i}" for i in range(len(frame))]
+    frame['predicted_closing_rank'] = rng.permutation(len(frame)) * 10 + 5
+    frame = frame[(frame['seat_type'] != 'OBC-NCL') | (frame['round'] < 3)]  # So the latest round differs by partition
+    frame.to_csv(artifacts.PARTITION_REPORT_FILENAME, index=False)
+    return frame
+
+
+def expected_rows(report, mask):
+    rows = report[mask].rename(columns={'predicted_closing_rank': 'closing_rank'}).sort_values('closing_rank')
+    return rows[COLUMNS].to_dict('records')
+
+
+def select(report, seat_type, quota, gender, round_num):
+    mask = pd.Series(True, index=report.index)
+    for column, value in (('seat_type', seat_type), ('quota', quota), ('gender', gender)):
+        if value is not None:
+            mask &= report[column] == value
+    if round_num is not None:
+        return mask & (report['round'] == round_num)
+    return mask & (report['round'] == report.groupby(['seat_type', 'quota', 'gender'])['round'].transform('max'))
+
+
+FILTERS = [
+    (None, None, None, None),
+    ('OPEN', None, None, None),
+    ('OBC-NCL', 'HS', None, 2),
+    (None, 'OS', 'Female-only', 1),
+    ('OPEN', 'AI', 'Gender-Neutral', 3),
+]
+
+
+@pytest.mark.parametrize('seat_type, quota, gender, round_num', FILTERS)
+@pytest.mark.parametrize('rank, k', [(0, 5), (1500, 10), (7000, 25), (10 ** 6, 5)])
+def test_reachable_matches_pandas(report, seat_type, quota, gender, round_num, rank, k):
+    index = eligibility.EligibilityIndex.build(['predicted'])
+    mask = select(report, seat_type, quota, gender, round_num) & (report['predicted_closing_rank'] >= rank)
+    results = index.reachable(rank, k, seat_type=seat_type, quota=quota, gender=gender, round_num=round_num)
+    assert results == expected_rows(report, mask)[:k]
+
+
+@pytest.mark.parametrize('seat_type, quota, gender, round_num', FILTERS)
+@pytest.mark.parametrize('min_rank, max_rank', [(0, 10 ** 6), (1005, 3005), (2000, 2000), (5000, 4000)])
+def test_in_range_matches_pandas(report, seat_type, quota, gender, round_num, min_rank, max_rank):
+    index = eligibility.EligibilityIndex.build(['predicted'])
+    mask = (select(report, seat_type, quota, gender, round_num)
+            & report['predicted_closing_rank'].between(min_rank, max_rank))
+    results = index.in_range(min_rank, max_rank, seat_type=seat_type, quota=quota, gender=gender, round_num=round_num)
+    assert results == expected_rows(report, mask)
+
+
+def test_rank_equal_to_closing_rank_is_reachable(report):
+    index = eligibility.EligibilityIndex.build(['predicted'])
+    for row in report.sample(20, random_state=0).itertuples():
+        results = index.reachable(row.predicted_closing_rank, 1, seat_type=row.seat_type, quota=row.quota,
+                                  gender=row.gender, round_num=row.round)
+        assert [result['academic_program_name'] for result in results] == [row.academic_program_name]
@@ -0,0 +1,19 @@
+"""features.compute_features() must reproduce query.sql exactly."""
+import sqlite3
+
+import build_db
+import features
+
+
+def test_compute_features_matches_query_sql(round_files_dir, tmp_path):
+    db_path = tmp_path / build_db.DB_FILENAME
+    build_db.create_db_and_table(db_path)
+    build_db.ingest(round_files_dir, db_path)
+
+    conn = sqlite3.connect(db_path)
+    expected = features.run_legacy_query(conn)
+    computed = features.compute_features(features.load_rankings(conn))
+    conn.close()
+
+    assert len(expected) > 0
+    assert features.frames_match(computed, expected)
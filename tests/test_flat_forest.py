@@ -0,0 +1,64 @@
+"""The flattened forest must predict exactly what the scikit-learn forest predicts."""
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestRegressor
+
+import flat_forest
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 8))
+    X[:, 7] = rng.integers(0, 10, size=2000)  # Split midpoints such as 4.5 are exact in float32, so rows can tie
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + X[:, 7] + rng.normal(scale=0.1, size=2000)
+    X[rng.random(X.shape) < 0.05] = np.nan  # Missing values take each split's learned direction
+    return X, y
+
+
+@pytest.fixture(scope='module')
+def model(data):
+    X, y = data
+    return RandomForestRegressor(n_estimators=20, max_depth=12, random_state=0).fit(X, y)
+
+
+def test_predictions_bit_identical(model, data, tmp_path):
+    X, _ = data
+    expected = model.predict(X)
+    assert np.array_equal(flat_forest.as_flat_forest(model).predict(X), expected)
+
+    loaded = flat_forest.load_forest(flat_forest.export_forest(model, tmp_path / 'model.forest'))
+    assert np.array_equal(loaded.predict(X), expected)
+
+
+def test_rows_on_split_thresholds(model, data):
+    X, _ = data
+    # A row equal to a split's threshold goes left, as in scikit-learn
+    thresholds = np.concatenate([estimator.tree_.threshold[estimator.tree_.feature == 7] for estimator in model.estimators_])
+    thresholds = thresholds[np.isfinite(thresholds)]  # Splits that only separate the missing values have inf
+    rows = np.repeat(np.nan_to_num(X[:1]), len(thresholds), axis=0)
+    rows[:, 7] = thresholds
+    assert len(thresholds) > 0
+    assert np.array_equal(flat_forest.as_flat_forest(model).predict(rows), model.predict(rows))
+
+
+def test_sparse_input(model, data):
+    X, _ = data
+    X = np.nan_to_num(X)
+    assert np.array_equal(flat_forest.as_flat_forest(model).predict(sp.csr_matrix(X)), model.predict(X))
+
+
+def test_interval_paths_agree(model, data):
+    X, _ = data
+    quantiles = (0.1, 0.9)
+    mean, quantile_values, std = flat_forest.predict_interval(model, X, quantiles)
+    flat_mean, flat_quantiles, flat_std = flat_forest.predict_interval(flat_forest.as_flat_forest(model), X, quantiles)
+
+    assert np.array_equal(mean, model.predict(X))
+    assert np.array_equal(flat_mean, mean)
+    assert np.array_equal(flat_quantiles, quantile_values)
+    np.testing.assert_allclose(flat_std, std)
+
+    tree_values = np.stack([estimator.predict(X) for estimator in model.estimators_])
+    np.testing.assert_array_equal(quantile_values, np.quantile(tree_values, quantiles, axis=0))
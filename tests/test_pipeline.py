@@ -0,0 +1,32 @@
+"""The in-memory pipeline must write the same prediction report as the scripts run one after another."""
+import shutil
+
+import pandas as pd
+
+import build_db
+import feature_engineering
+import features
+import pipeline
+import predict
+import preprocess
+import train_model
+
+
+def test_pipeline_matches_script_chain(round_files_dir, tmp_path, monkeypatch):
+    scripts_dir = shutil.copytree(round_files_dir, tmp_path / 'scripts')
+    monkeypatch.chdir(scripts_dir)
+    build_db.main('.')
+    features.main(build_db.DB_FILENAME)
+    preprocess.main('onehot')
+    feature_engineering.main()
+    train_model.main()
+    predict.main()
+    expected = pd.read_csv(scripts_dir / 'prediction_report.csv')
+
+    pipeline_dir = shutil.copytree(round_files_dir, tmp_path / 'pipeline')
+    monkeypatch.chdir(pipeline_dir)
+    pipeline.run_pipeline('.', use_cache=False)
+    report = pd.read_csv(pipeline_dir / 'prediction_report.csv')
+
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(report, expected, check_exact=True)
@@ -0,0 +1,84 @@
+"""Round forecasts scale a program's latest closing rank by its historical round-to-round progression."""
+import shutil
+
+import pandas as pd
+import pytest
+
+import artifacts
+import build_db
+import round_forecast
+
+PARTITION = {'seat_type': 'OPEN', 'quota': 'AI', 'gender': 'Gender-Neutral'}
+
+
+def rows(college, program, year, closing_ranks, **partition):
+    """One row per round, closing_ranks[i] being round i + 1's."""
+    partition = {**PARTITION, **partition}
+    return [{**partition, 'college_name': college, 'academic_program_name': program, 'year': year,
+             'round': round_num, 'closing_rank': rank} for round_num, rank in enumerate(closing_ranks, start=1)]
+
+
+@pytest.fixture
+def progression():
+    history = pd.DataFrame(
+        rows('IIT A', 'CSE', 2021, [1000, 1100, 1200])
+        + rows('IIT A', 'CSE', 2022, [1000, 1300, 1400])
+        + rows('IIT A', 'CSE', 2023, [2000, 2400, 3000])
+        + rows('IIT A', 'EE', 2023, [4000, 6000, 8000])
+        + rows('IIT B', 'ME', 2023, [5000, 5500, 6000], seat_type='OBC-NCL'))
+    return round_forecast.fit_progression(history)
+
+
+def test_fit_takes_the_median_ratio_over_the_years(progression):
+    cse = progression[(progression['college_name'] == 'IIT A') & (progression['academic_program_name'] == 'CSE')]
+    assert cse['round'].tolist() == [1, 2, 3]
+    assert cse['ratio'].tolist() == [1.0, 1.2, 1.4]
+    assert cse['years'].tolist() == [3, 3, 3]
+
+
+def test_forecast_scales_the_latest_observed_round(progression):
+    current = pd.DataFrame(rows('IIT A', 'CSE', 2024, [3000]) + rows('IIT A', 'EE', 2024, [4000, 5000]))
+    report = round_forecast.forecast(current, progression)
+    forecasts = {(row.academic_program_name, row.round): (row.observed_round, row.predicted_closing_rank)
+                 for row in report.itertuples()}
+    assert forecasts == {
+        ('CSE', 2): (1, 3600),   # 3000 * 1.2
+        ('CSE', 3): (1, 4200),   # 3000 * 1.4
+        ('EE', 3): (2, 6667),    # 5000 * 2.0 / 1.5, rounded
+    }
+
+
+def test_forecast_falls_back_to_partition_then_overall_ratio(progression):
+    current = pd.DataFrame(rows('IIT C', 'New', 2024, [1000])
+                           + rows('IIT D', 'New', 2024, [1000], seat_type='EWS'))
+    report = round_forecast.forecast(current, progression).set_index(['college_name', 'round'])
+    # No history for either program: IIT C's partition has CSE (1.2, 1.4) and EE (1.5, 2.0);
+    # EWS has no history at all, so the median over every program is used
+    assert report.loc[('IIT C', 2), 'predicted_closing_rank'] == 1350
+    assert report.loc[('IIT C', 3), 'predicted_closing_rank'] == 1700
+    assert report.loc[('IIT D', 2), 'predicted_closing_rank'] == 1200
+    assert report.loc[('IIT D', 3), 'predicted_closing_rank'] == 1400
+
+
+def test_refresh_after_a_new_round_lands(round_files_dir, tmp_path, monkeypatch):
+    base_dir = shutil.copytree(round_files_dir, tmp_path / 'rounds')
+    monkeypatch.chdir(tmp_path)
+    held_back = base_dir.parent / 'round2.psv'
+    shutil.move(base_dir / '2024' / 'round2.psv', held_back)
+    (base_dir / '2024' / 'round3.psv').unlink()
+    db_path = base_dir / build_db.DB_FILENAME
+    build_db.main(str(base_dir))
+    round_forecast.main_fit(db_path, 2024)
+    assert artifacts.find_artifact(round_forecast.PROGRESSION_ARTIFACT)
+
+    round_forecast.main_forecast(db_path, 2024, output='after_round1.csv')
+    after_round1 = pd.read_csv('after_round1.csv')
+    assert set(after_round1['observed_round']) == {1}
+    assert set(after_round1['round']) == {2, 3}
+
+    shutil.move(held_back, base_dir / '2024' / 'round2.psv')
+    round_forecast.main_forecast(db_path, 2024, ingest_dir=str(base_dir), output='after_round2.csv')
+    after_round2 = pd.read_csv('after_round2.csv')
+    assert set(after_round2['round']) == {3}
+    assert (after_round2['observed_round'] == 2).mean() > 0.5
+    assert len(after_round2) == len(after_round1[after_round1['round'] == 3])
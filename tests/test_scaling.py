@@ -0,0 +1,46 @@
+"""Scaling one column from the scaler's parameters must match the scaler on the whole matrix."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+import scaling
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(0)
+    values = rng.normal(loc=5000, scale=3000, size=(500, len(scaling.NUMERICAL_COLUMNS)))
+    return pd.DataFrame(values, columns=scaling.NUMERICAL_COLUMNS[::-1])  # Not in NUMERICAL_COLUMNS order
+
+
+@pytest.mark.parametrize('with_mean, with_std', [(True, True), (False, True), (True, False)])
+def test_target_matches_full_inverse_transform(frame, with_mean, with_std):
+    scaler = StandardScaler(with_mean=with_mean, with_std=with_std).fit(frame)
+    scaled = scaler.transform(frame)
+    position = list(frame.columns).index(scaling.TARGET_COLUMN)
+    expected = scaler.inverse_transform(scaled)[:, position]
+
+    np.testing.assert_array_equal(scaling.inverse_transform_target(scaler, scaled[:, position]), expected)
+    np.testing.assert_array_equal(scaling.transform_target(scaler, frame[scaling.TARGET_COLUMN]), scaled[:, position])
+
+    column = scaled[:, position].copy()
+    assert scaling.inverse_transform_target(scaler, column, copy=False) is column
+    np.testing.assert_array_equal(column, expected)
+
+
+def test_scaler_fitted_without_names(frame):
+    # Without feature_names_in_, the columns are taken to be in NUMERICAL_COLUMNS order
+    values = frame[scaling.NUMERICAL_COLUMNS].to_numpy()
+    scaler = StandardScaler().fit(values)
+    position = scaling.NUMERICAL_COLUMNS.index(scaling.TARGET_COLUMN)
+    scaled = scaler.transform(values)
+    np.testing.assert_array_equal(scaling.inverse_transform_target(scaler, scaled[:, position]),
+                                  scaler.inverse_transform(scaled)[:, position])
+
+
+def test_spread_scales_without_the_mean(frame):
+    scaler = StandardScaler().fit(frame)
+    spread = np.array([0.0, 0.5, 2.0])
+    np.testing.assert_allclose(scaling.inverse_transform_spread(scaler, spread),
+                               scaling.inverse_transform_target(scaler, spread) - scaling.inverse_transform_target(scaler, 0.0))
@@ -0,0 +1,43 @@
+"""A failed /reload must answer 500 and keep serving the previous predictions."""
+import http.client
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+import serve
+
+
+@pytest.fixture
+def server():
+    report = pd.DataFrame({'college_name': ['A', 'B'], 'academic_program_name': ['X', 'Y'],
+                           'predicted_closing_rank': [200, 100]})
+    server = serve.PredictionServer(('127.0.0.1', 0), serve.PredictionIndex(report))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=10)
+    conn.request(method, path)
+    response = conn.getresponse()
+    result = response.status, json.loads(response.read())
+    conn.close()
+    return result
+
+
+def test_failed_reload_keeps_old_index(server, monkeypatch):
+    def missing_artifacts(cls):
+        raise FileNotFoundError("josaa_model.pkl")
+    monkeypatch.setattr(serve.PredictionIndex, 'load', classmethod(missing_artifacts))
+    old_index = server.index
+
+    status, body = request(server, 'POST', '/reload')
+    assert status == 500
+    assert 'FileNotFoundError' in body['error']
+    assert server.index is old_index
+    assert request(server, 'GET', '/predict?college=B&program=Y') == (200, {'college_name': 'B', 'academic_program_name': 'Y', 'predicted_closing_rank': 100})
@@ -1,49 +1,237 @@
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import numpy as np
-import pickle
 
-# Load the feature engineered data
-data = pd.read_csv('feature_engineered_data.csv')
+import artifacts
+import encoding
+import flat_forest
+import instrumentation
+
+MODEL_FILENAME = 'josaa_model.pkl'
+LEADERBOARD_FILENAME = 'model_leaderboard.csv'
+
+# The model is evaluated on TEST_YEAR and trained on every earlier year
+TEST_YEAR = 2024
+
+# Years validated on by the sweep; each fold trains on all years before its validation year
+VALIDATION_YEARS = [2022, 2023, 2024]
+
+# (family, parameters) configurations compared by the sweep
+SWEEP_CONFIGS = [
+    ('random_forest', {'n_estimators': 100}),
+    ('random_forest', {'n_estimators': 200, 'max_features': 0.5}),
+    ('random_forest', {'n_estimators': 200, 'min_samples_leaf': 2}),
+    ('lightgbm', {'n_estimators': 500, 'learning_rate': 0.05, 'num_leaves': 63}),
+    ('lightgbm', {'n_estimators': 1000, 'learning_rate': 0.03, 'num_leaves': 127}),
+    ('xgboost', {'n_estimators': 500, 'learning_rate': 0.05, 'max_depth': 8}),
+    ('xgboost', {'n_estimators': 1000, 'learning_rate': 0.03, 'max_depth': 10}),
+]
+
+def make_model(family, params, n_jobs=-1):
+    """Builds an unfitted regressor of the given family. The libraries are imported on demand."""
+    if family == 'random_forest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+    if family == 'lightgbm':
+        import lightgbm
+        return lightgbm.LGBMRegressor(random_state=42, n_jobs=n_jobs, verbose=-1, **params)
+    if family == 'xgboost':
+        import xgboost
+        return xgboost.XGBRegressor(random_state=42, n_jobs=n_jobs, **params)
+    raise ValueError(f"Unknown model family '{family}'; expected random_forest, lightgbm or xgboost")
+
+def split_by_year(data, sparse_block, test_year, train_years=None):
+    """Returns (X_train, y_train, X_test, y_test): test_year against train_years (default: every earlier year)."""
+    feature_columns = [col for col in data.columns if col != 'closing_rank']
+    if train_years is None:
+        train_mask = (data['year'] < test_year).to_numpy()
+    else:
+        train_mask = data['year'].isin(train_years).to_numpy()
+    test_mask = (data['year'] == test_year).to_numpy()
+    train_data = data[train_mask]
+    test_data = data[test_mask]
+
+    X_train = encoding.design_matrix(train_data, feature_columns, sparse_block[train_mask] if sparse_block is not None else None)
+    X_test = encoding.design_matrix(test_data, feature_columns, sparse_block[test_mask] if sparse_block is not None else None)
+    return X_train, train_data['closing_rank'], X_test, test_data['closing_rank']
+
+def _prepare(data, sparse_block):
+    # Convert the 'year' column to integer type (without modifying the caller's frame)
+    data = data.assign(year=data['year'].astype(int))
+
+    # With the 'sparse' encoding the one-hot college/program block lives in a separate matrix
+    # and is appended after the dense feature columns.
+    encoding_mode = encoding.detect_encoding(data.columns)
+    if encoding_mode == 'sparse' and sparse_block is None:
+        sparse_block = encoding.load_sparse_block()
+    return data, sparse_block, encoding_mode
+
+def train(data, sparse_block=None, test_year=TEST_YEAR, n_jobs=-1, model=None, extra_estimators=0):
+    """Trains the Random Forest on the years before test_year and evaluates it on test_year. Returns (model, metrics).
+
+    Passing a fitted forest as `model` grows it with warm_start: extra_estimators new trees are
+    fitted on the current training data and the existing trees are kept.
+    """
+    data, sparse_block, encoding_mode = _prepare(data, sparse_block)
+
+    # Split the data into training and testing sets based on year
+    with instrumentation.stage('train_model.split', test_year=test_year) as split_metrics:
+        X_train, y_train, X_test, y_test = split_by_year(data, sparse_block, test_year)
+        split_metrics.count('train_rows', X_train.shape[0])
+        split_metrics.count('test_rows', X_test.shape[0])
+    print(f"Training on {X_train.shape[0]} rows x {X_train.shape[1]} features ({encoding_mode} encoding)")
+
+    # Train the Random Forest Regression model on every core
+    if model is None:
+        model = make_model('random_forest', {'n_estimators': 100}, n_jobs=n_jobs)
+    else:
+        if model.n_features_in_ != X_train.shape[1]:
+            raise ValueError(f"Cannot grow a forest trained on {model.n_features_in_} features with "
+                             f"{X_train.shape[1]} features; retrain it from scratch")
+        print(f"Growing the existing {model.n_estimators}-tree forest by {extra_estimators} trees")
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + extra_estimators, n_jobs=n_jobs)
+    start = time.perf_counter()
+    with instrumentation.stage('train_model.fit', trees=model.n_estimators, n_jobs=n_jobs, encoding=encoding_mode) as fit_metrics:
+        model.fit(X_train, y_train)
+        fit_metrics.count('rows', X_train.shape[0])
+        fit_metrics.count('features', X_train.shape[1])
+    print(f"Fitted in {time.perf_counter() - start:.2f}s")
+
+    # Evaluate the model
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+    with instrumentation.stage('train_model.evaluate') as evaluate_metrics:
+        y_pred = model.predict(X_test)
+        evaluate_metrics.count('rows', X_test.shape[0])
+
+    mae = mean_absolute_error(y_test, y_pred)
+    mse = mean_squared_error(y_test, y_pred)
+    rmse = np.sqrt(mse)
+    r2 = r2_score(y_test, y_pred)
+
+    print(f"Mean Absolute Error: {mae}")
+    print(f"Mean Squared Error: {mse}")
+    print(f"Root Mean Squared Error: {rmse}")
+    print(f"R-squared: {r2}")
+
+    print("Model training complete.")
+    return model, {'mae': mae, 'mse': mse, 'rmse': rmse, 'r2': r2}
+
+# The sweep's worker processes receive the data once, through the pool initializer
+_sweep_data = None
+
+def _init_sweep_worker(data, sparse_block):
+    global _sweep_data
+    _sweep_data = (data, sparse_block)
+
+def _evaluate_fold(family, params, validation_year):
+    """Fits one configuration on the years before validation_year and measures it on validation_year."""
+    from sklearn.metrics import mean_absolute_error
+    data, sparse_block = _sweep_data
+    X_train, y_train, X_val, y_val = split_by_year(data, sparse_block, validation_year)
+    model = make_model(family, params, n_jobs=1)
+
+    start = time.perf_counter()
+    with instrumentation.stage('train_model.sweep_fit', model=family, params=repr(params), validation_year=validation_year) as fit_metrics:
+        model.fit(X_train, y_train)
+        fit_metrics.count('rows', X_train.shape[0])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_val)
+    batch_seconds = time.perf_counter() - start
+
+    single_row = X_val[:1]
+    single_row_times = []
+    for _ in range(20):
+        start = time.perf_counter()
+        model.predict(single_row)
+        single_row_times.append(time.perf_counter() - start)
+
+    return {
+        'model': family,
+        'params': repr(params),
+        'validation_year': validation_year,
+        'mae': mean_absolute_error(y_val, y_pred),
+        'fit_seconds': fit_seconds,
+        'predict_us_per_row': batch_seconds / len(y_val) * 1e6,
+        'predict_single_row_ms': float(np.median(single_row_times)) * 1e3,
+        'model_bytes': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+    }
+
+def sweep(data, sparse_block=None, configs=SWEEP_CONFIGS, validation_years=VALIDATION_YEARS, workers=None):
+    """Evaluates every configuration with rolling-year validation, one fold per worker process.
 
-# Convert the 'year' column to integer type
-data['year'] = data['year'].astype(int)
+    Returns the leaderboard DataFrame (one row per configuration, averaged over the folds) sorted by MAE.
+    """
+    data, sparse_block, encoding_mode = _prepare(data, sparse_block)
+    tasks = [(family, params, year) for family, params in configs for year in validation_years]
+    print(f"Sweeping {len(configs)} configurations x {len(validation_years)} validation years "
+          f"({encoding_mode} encoding) on {workers or os.cpu_count()} processes")
 
-# Define features and target
-features = data.drop(['closing_rank'], axis=1)
-target = data['closing_rank']
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker, initargs=(data, sparse_block)) as pool:
+        futures = {pool.submit(_evaluate_fold, *task): task for task in tasks}
+        for future, (family, params, year) in futures.items():
+            try:
+                results.append(future.result())
+            except ImportError as error:
+                print(f"Skipping {family} {params} ({year}): {error}")
 
-# Split the data into training and testing sets based on year
-train_data = data[data['year'].isin([2020, 2021, 2022, 2023])]
-test_data = data[data['year'] == 2024]
+    folds = pd.DataFrame(results)
+    leaderboard = (folds.groupby(['model', 'params'], as_index=False, sort=False)
+                   .agg(mae=('mae', 'mean'), mae_std=('mae', 'std'), folds=('mae', 'size'),
+                        fit_seconds=('fit_seconds', 'mean'), predict_us_per_row=('predict_us_per_row', 'mean'),
+                        predict_single_row_ms=('predict_single_row_ms', 'mean'), model_bytes=('model_bytes', 'mean'))
+                   .sort_values('mae', kind='stable')
+                   .reset_index(drop=True))
+    return leaderboard
 
-X_train = train_data.drop(['closing_rank'], axis=1)
-y_train = train_data['closing_rank']
-X_test = test_data.drop(['closing_rank'], axis=1)
-y_test = test_data['closing_rank']
+def main(n_jobs=-1, warm_start=0, test_year=TEST_YEAR):
+    # Load the feature engineered data
+    data = artifacts.load_frame('feature_engineered_data')
 
-# Train the Random Forest Regression model
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+    # Grow the saved forest instead of retraining it when asked to
+    model = pickle.load(open(MODEL_FILENAME, 'rb')) if warm_start else None  # Always the pickle: a flattened forest cannot be grown
+    model, _ = train(data, test_year=test_year, n_jobs=n_jobs, model=model, extra_estimators=warm_start)
 
-# Evaluate the model
-y_pred = model.predict(X_test)
+    # Save the trained model to a file
+    filename = MODEL_FILENAME
+    with instrumentation.stage('train_model.save'):
+        pickle.dump(model, open(filename, 'wb'))
+    print(f"Trained model saved to {filename}")
 
-mae = mean_absolute_error(y_test, y_pred)
-mse = mean_squared_error(y_test, y_pred)
-rmse = np.sqrt(mse)
-r2 = r2_score(y_test, y_pred)
+    # Export the compact, memory-mappable copy that predict.py loads
+    with instrumentation.stage('train_model.export_forest'):
+        forest_path = flat_forest.export_forest(model, flat_forest.forest_path(filename))
+    print(f"Flattened forest saved to {forest_path}")
 
-print(f"Mean Absolute Error: {mae}")
-print(f"Mean Squared Error: {mse}")
-print(f"Root Mean Squared Error: {rmse}")
-print(f"R-squared: {r2}")
+def main_sweep(workers=None, validation_years=VALIDATION_YEARS):
+    data = artifacts.load_frame('feature_engineered_data')
+    leaderboard = sweep(data, validation_years=validation_years, workers=workers)
+    leaderboard.to_csv(LEADERBOARD_FILENAME, index=False)
+    print(leaderboard.to_string(index=False))
+    print(f"Leaderboard saved to {LEADERBOARD_FILENAME}")
 
-print("Model training complete.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train the closing-rank model, or sweep model configurations.')
+    parser.add_argument('--n_jobs', type=int, default=-1, help='Cores used to fit the forest (default: all)')
+    parser.add_argument('--warm_start', type=int, default=0, metavar='N',
+                        help=f"Grow the forest in {MODEL_FILENAME} by N trees fitted on the current data instead of retraining")
+    parser.add_argument('--test_year', type=int, default=TEST_YEAR, help='Year held out for evaluation; earlier years are trained on')
+    parser.add_argument('--sweep', action='store_true', help=f"Compare RandomForest/LightGBM/XGBoost configurations and write {LEADERBOARD_FILENAME}")
+    parser.add_argument('--workers', type=int, default=None, help='Processes for --sweep (default: CPU count)')
+    parser.add_argument('--validation_years', type=int, nargs='+', default=VALIDATION_YEARS, help='Validation years for --sweep')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
 
-# Save the trained model to a file
-filename = 'josaa_model.pkl'
-pickle.dump(model, open(filename, 'wb'))
-print(f"Trained model saved to {filename}")
+    with instrumentation.stage('train_model', mode='sweep' if args.sweep else 'train'):
+        if args.sweep:
+            main_sweep(workers=args.workers, validation_years=args.validation_years)
+        else:
+            main(n_jobs=args.n_jobs, warm_start=args.warm_start, test_year=args.test_year)
@@ -1,97 +1,214 @@
 import argparse
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-
-# Command-line argument parsing
-parser = argparse.ArgumentParser(description='Plot closing ranks over years.')
-parser.add_argument('--college_type', type=str, choices=['NIT', 'IIIT', 'GFTI'], help='College type (NIT, IIIT, GFTI)')
-parser.add_argument('--branch_number', type=int, help='Branch number')
-parser.add_argument('--rank_number', type=int, help='Rank number to center the plot around')
-parser.add_argument('--list_branches', action='store_true', help='List available branches and exit')
-args = parser.parse_args()
-
-df = pd.read_csv('historical_data.csv')
-
-# List available branches and exit
-if args.list_branches:
-    available_branches = df['academic_program_name'].unique()
-    print("Available Branches:")
-    for i, branch in enumerate(available_branches):
-        print(f"{i+1}: {branch}")
-    exit()
-
-# Check if required arguments are provided
-if not all([args.college_type, args.branch_number, args.rank_number]):
-    parser.error("The following arguments are required: --college_type, --branch_number, --rank_number")
-
-plt.figure(figsize=(20, 30))
-
-# Get branch name from branch number
-branch_number = args.branch_number
-available_branches = df['academic_program_name'].unique()
-if branch_number < 1 or branch_number > len(available_branches):
-    print("Invalid branch number.")
-    exit()
-branch = available_branches[branch_number - 1]
-
-# Filter by college type
-college_type = args.college_type
-if college_type == "NIT":
-    college_filter = "national institute of technology"
-elif college_type == "IIIT":
-    college_filter = "indian institute of information technology"
-else:
-    college_filter = ""
-
-if college_type == "GFTI":
-    program_df = df[(df['academic_program_name'] == branch) & (df['is_final_round'] == 1) & (~df['college_name'].str.lower().str.contains("national institute of technology")) & (~df['college_name'].str.lower().str.contains("indian institute of information technology"))]
-else:
-    program_df = df[(df['academic_program_name'] == branch) & (df['is_final_round'] == 1) & (df['college_name'].str.lower().str.contains(college_filter))]
-
-if program_df.empty:
-    print(f"No data found for {college_type} in branch {branch}.")
-
-# Group by college and academic program
-grouped = program_df.groupby(['college_name', 'academic_program_name'])
-
-# Use a colormap to generate distinct colors for each group
-cmap = cm.get_cmap('tab20', len(grouped))
-
-# Plot the closing ranks for each group
-for i, (name, group) in enumerate(grouped):
-    color = cmap(i)
-    college_name = group['college_name'].iloc[0]
-    place_name = college_name
-    plt.plot(group['year'], group['closing_rank'], marker='o', color=color)
-    ha = 'left' if i % 2 == 0 else 'right'
-    xytext_x = 10 if i % 2 == 0 else -10
-    truncated_college_name = place_name
-    # Find the year where closing_rank is closest to rank_number
-    closest_year_index = (group['closing_rank'] - args.rank_number).abs().idxmin()
-    closest_year = group.loc[closest_year_index, 'year']
-    closest_rank = group.loc[closest_year_index, 'closing_rank']
-
-    plt.annotate(truncated_college_name, xy=(closest_year, closest_rank), textcoords="offset points", xytext=(xytext_x,10), ha=ha)
-    plt.text(group['year'].iloc[-1] + 0.1, group['closing_rank'].iloc[-1], str(group['closing_rank'].iloc[-1]), ha='left', va='center')
-
-title = f"{college_type}: {branch}"
-plt.title(title)
-plt.xlabel('Year')
-plt.ylabel('Closing Rank')
-plt.gca().yaxis.set_ticks_position('right')
-plt.gca().yaxis.set_label_position('right')
-
-plt.gca().set_xticks(program_df['year'].unique())
-plt.grid(True)
-plt.tight_layout(rect=[0, 0.05, 1, 0.95])
-
-# Adjust y-axis limits
-rank_number = args.rank_number
-min_rank = program_df['closing_rank'].min()
-plt.ylim(min_rank - 5000, rank_number + 15000)
-
-# Save the plot as a PNG image
-filename = f"{college_type.lower()}_branch{branch_number}.png"
-plt.savefig(filename)
-plt.close()
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import catalog
+import instrumentation
+
+COLLEGE_TYPES = ['NIT', 'IIIT', 'GFTI']
+# Lowercase name fragments identifying each college type; GFTI is every college matching neither
+COLLEGE_TYPE_PATTERNS = {
+    'NIT': "national institute of technology",
+    'IIIT': "indian institute of information technology",
+}
+BATCH_OUTPUT_DIR = Path('trend_charts')
+BATCH_MANIFEST_FILENAME = 'manifest.json'
+
+def college_type(name):
+    """The college type (NIT, IIIT or GFTI) of a college name."""
+    lowered = name.lower()
+    if COLLEGE_TYPE_PATTERNS['NIT'] in lowered:
+        return 'NIT'
+    if COLLEGE_TYPE_PATTERNS['IIIT'] in lowered:
+        return 'IIIT'
+    return 'GFTI'
+
+def load_trend_data():
+    """Loads historical_data with a categorical 'college_type' column."""
+    import pandas as pd
+
+    import artifacts
+    df = artifacts.load_frame('historical_data', columns=['year', 'closing_rank', 'is_final_round', 'college_name', 'academic_program_name'])
+
+    # Classify each distinct college name once instead of every row on every query
+    names = df['college_name'].astype('category').cat.categories
+    type_by_name = pd.Series([college_type(name) for name in names], index=names)
+    df['college_type'] = pd.Categorical(df['college_name'].map(type_by_name).astype(object), categories=COLLEGE_TYPES)
+    return df
+
+def available_branches(df):
+    """Branches in order of first appearance; the branch number is the 1-based position in this list."""
+    return df['academic_program_name'].unique()
+
+def chart_filename(college_type, branch_number):
+    return f"{college_type.lower()}_branch{branch_number}.png"
+
+def plot_trend(program_df, college_type, branch, rank_number, filename):
+    """Plots the final-round closing ranks of every college in program_df over the years."""
+    import matplotlib.cm as cm
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(20, 30))
+
+    # Group by college and academic program
+    grouped = program_df.groupby(['college_name', 'academic_program_name'], observed=True)
+
+    # Use a colormap to generate distinct colors for each group
+    cmap = cm.get_cmap('tab20', len(grouped))
+
+    # Plot the closing ranks for each group
+    for i, (name, group) in enumerate(grouped):
+        color = cmap(i)
+        college_name = group['college_name'].iloc[0]
+        place_name = college_name
+        plt.plot(group['year'], group['closing_rank'], marker='o', color=color)
+        ha = 'left' if i % 2 == 0 else 'right'
+        xytext_x = 10 if i % 2 == 0 else -10
+        truncated_college_name = place_name
+        # Find the year where closing_rank is closest to rank_number
+        closest_year_index = (group['closing_rank'] - rank_number).abs().idxmin()
+        closest_year = group.loc[closest_year_index, 'year']
+        closest_rank = group.loc[closest_year_index, 'closing_rank']
+
+        plt.annotate(truncated_college_name, xy=(closest_year, closest_rank), textcoords="offset points", xytext=(xytext_x,10), ha=ha)
+        plt.text(group['year'].iloc[-1] + 0.1, group['closing_rank'].iloc[-1], str(group['closing_rank'].iloc[-1]), ha='left', va='center')
+
+    title = f"{college_type}: {branch}"
+    plt.title(title)
+    plt.xlabel('Year')
+    plt.ylabel('Closing Rank')
+    plt.gca().yaxis.set_ticks_position('right')
+    plt.gca().yaxis.set_label_position('right')
+
+    plt.gca().set_xticks(program_df['year'].unique())
+    plt.grid(True)
+    plt.tight_layout(rect=[0, 0.05, 1, 0.95])
+
+    # Adjust y-axis limits
+    min_rank = program_df['closing_rank'].min()
+    plt.ylim(min_rank - 5000, rank_number + 15000)
+
+    # Save the plot as a PNG image
+    plt.savefig(filename)
+    plt.close()
+
+def slice_hash(program_df, college_type, branch, rank_number):
+    """Hash of everything a chart is drawn from, used to skip charts whose input has not changed."""
+    import pandas as pd
+
+    digest = hashlib.sha256(json.dumps([college_type, branch, rank_number]).encode())
+    digest.update(pd.util.hash_pandas_object(program_df[['year', 'closing_rank', 'college_name']].astype(str), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _init_batch_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _render_chart(args):
+    program_df, college_type, branch, rank_number, filename = args
+    plot_trend(program_df, college_type, branch, rank_number, filename)
+    return filename
+
+def render_all(df, rank_number, output_dir=BATCH_OUTPUT_DIR, workers=None, force=False):
+    """Renders every branch x college type chart into output_dir in a process pool.
+
+    Charts whose input slice hash matches the manifest from the previous run are skipped.
+    Returns (rendered, skipped) counts.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / BATCH_MANIFEST_FILENAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() and not force else {}
+
+    branches = available_branches(df)
+    branch_numbers = {branch: number for number, branch in enumerate(branches, start=1)}
+    jobs = []
+    new_manifest = {}
+    skipped = 0
+    # One groupby instead of a boolean filter per chart
+    final_rounds = df[df['is_final_round'] == 1]
+    for (college_type, branch), program_df in final_rounds.groupby(['college_type', 'academic_program_name'], observed=True, sort=False):
+        filename = output_dir / chart_filename(college_type, branch_numbers[branch])
+        key = filename.name
+        new_manifest[key] = slice_hash(program_df, college_type, branch, rank_number)
+        if manifest.get(key) == new_manifest[key] and filename.exists():
+            skipped += 1
+            continue
+        jobs.append((program_df, college_type, branch, rank_number, str(filename)))
+
+    with instrumentation.stage('trend_analysis.render_all') as metrics, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as pool:
+        for _ in pool.map(_render_chart, jobs, chunksize=4):
+            pass
+        metrics.count('rendered', len(jobs))
+        metrics.count('skipped', skipped)
+    manifest_path.write_text(json.dumps(new_manifest, indent=1))
+    return len(jobs), skipped
+
+if __name__ == "__main__":
+    # Command-line argument parsing
+    parser = argparse.ArgumentParser(description='Plot closing ranks over years.')
+    parser.add_argument('--college_type', type=str, choices=COLLEGE_TYPES, help='College type (NIT, IIIT, GFTI)')
+    parser.add_argument('--branch_number', type=int, help='Branch number')
+    parser.add_argument('--rank_number', type=int, help='Rank number to center the plot around')
+    parser.add_argument('--list_branches', action='store_true', help='List available branches and exit')
+    parser.add_argument('--list_colleges', action='store_true', help='List the colleges, of --college_type if given, and exit')
+    parser.add_argument('--all', action='store_true', help=f"Render every branch x college type chart into {BATCH_OUTPUT_DIR}/")
+    parser.add_argument('--output_dir', default=str(BATCH_OUTPUT_DIR), help='Output directory for --all')
+    parser.add_argument('--workers', type=int, default=None, help='Rendering processes for --all (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='With --all, re-render charts whose input has not changed')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+
+    # The listings are served from the catalog sidecar, without pandas or the full artifact
+    if args.list_branches:
+        print("Available Branches:")
+        for i, branch in enumerate(catalog.load_catalog()['branches']):
+            print(f"{i+1}: {branch}")
+        exit()
+
+    if args.list_colleges:
+        for name in catalog.load_catalog()['colleges']:
+            if args.college_type in (None, college_type(name)):
+                print(f"{college_type(name)}: {name}")
+        exit()
+
+    if args.all:
+        if not args.rank_number:
+            parser.error("--all requires --rank_number")
+        with instrumentation.stage('trend_analysis.load_trend_data') as metrics:
+            df = load_trend_data()
+            metrics.count('rows', len(df))
+        rendered, skipped = render_all(df, args.rank_number, args.output_dir, args.workers, args.force)
+        print(f"Rendered {rendered} charts into {args.output_dir} ({skipped} unchanged charts skipped)")
+        exit()
+
+    # Check if required arguments are provided
+    if not all([args.college_type, args.branch_number, args.rank_number]):
+        parser.error("The following arguments are required: --college_type, --branch_number, --rank_number")
+
+    # Get branch name from branch number
+    branch_number = args.branch_number
+    branches = catalog.load_catalog()['branches']
+    if branch_number < 1 or branch_number > len(branches):
+        print("Invalid branch number.")
+        exit()
+    branch = branches[branch_number - 1]
+
+    with instrumentation.stage('trend_analysis.load_trend_data') as metrics:
+        df = load_trend_data()
+        metrics.count('rows', len(df))
+
+    # Filter by college type
+    selected_type = args.college_type
+    program_df = df[(df['academic_program_name'] == branch) & (df['is_final_round'] == 1) & (df['college_type'] == selected_type)]
+
+    if program_df.empty:
+        print(f"No data found for {selected_type} in branch {branch}.")
+
+    with instrumentation.stage('trend_analysis.plot_trend', college_type=selected_type, branch_number=branch_number) as metrics:
+        plot_trend(program_df, selected_type, branch, args.rank_number, chart_filename(selected_type, branch_number))
+        metrics.count('rows', len(program_df))